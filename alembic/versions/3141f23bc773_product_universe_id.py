@@ -0,0 +1,87 @@
+"""product universe id
+
+Revision ID: 3141f23bc773
+Revises: c676a0991fa4
+Create Date: 2026-10-17 03:17:55.841818
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3141f23bc773'
+down_revision: Union[str, None] = 'c676a0991fa4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Таблицы товаров, которым нужна вселенная персонажа
+PRODUCT_TABLES = ("device", "sweet", "toy")
+
+# Вселенная товара при добавлении и при смене персонажа берётся из персонажа. Ручную правку колонки триггер тоже
+# перезаписывает, поэтому она всегда совпадает со вселенной персонажа. Триггер срабатывает раньше проверки внешнего
+# ключа, поэтому несуществующий персонаж - это нарушение внешнего ключа, а не NOT NULL пустой вселенной.
+# Строка персонажа читается с FOR SHARE: иначе товар, добавленный одновременно с переносом персонажа в другую
+# вселенную, получил бы старую вселенную, а UPDATE товаров из триггера персонажа его бы ещё не увидел.
+# FOR KEY SHARE, как у проверки внешнего ключа, не подходит - он не конфликтует со сменой universe_id
+PRODUCT_UNIVERSE_FUNCTION = """
+    CREATE FUNCTION product_universe_id() RETURNS trigger AS $$
+    BEGIN
+        SELECT character.universe_id INTO NEW.universe_id FROM character WHERE character.id = NEW.character_id
+            FOR SHARE;
+        IF NOT FOUND THEN
+            RAISE foreign_key_violation USING
+                MESSAGE = format('insert or update on table "%s" violates foreign key constraint', TG_TABLE_NAME),
+                DETAIL = format('Key (character_id)=(%s) is not present in table "character".', NEW.character_id),
+                TABLE = TG_TABLE_NAME,
+                COLUMN = 'character_id';
+        END IF;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+# При переносе персонажа в другую вселенную переносим и все его товары
+CHARACTER_UNIVERSE_FUNCTION = f"""
+    CREATE FUNCTION character_products_universe_id() RETURNS trigger AS $$
+    BEGIN
+        {" ".join(f"UPDATE {table} SET universe_id = NEW.universe_id WHERE character_id = NEW.id;"
+                  for table in PRODUCT_TABLES)}
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    for table in PRODUCT_TABLES:
+        # Добавляем колонку и заполняем её для существующих товаров одним UPDATE ... FROM на таблицу
+        op.add_column(table, sa.Column('universe_id', sa.SMALLINT(), nullable=True))
+        op.execute(f"UPDATE {table} SET universe_id = character.universe_id "
+                   f"FROM character WHERE character.id = {table}.character_id")
+        op.alter_column(table, 'universe_id', nullable=False)
+        op.create_index(f'ix_{table}_universe_id_id', table, ['universe_id', 'id'], unique=False)
+        op.create_index(f'ix_{table}_universe_id_price_id', table, ['universe_id', 'price', 'id'], unique=False)
+    op.execute(PRODUCT_UNIVERSE_FUNCTION)
+    for table in PRODUCT_TABLES:
+        op.execute(f"CREATE TRIGGER {table}_universe_id BEFORE INSERT OR UPDATE OF character_id, universe_id "
+                   f"ON {table} FOR EACH ROW EXECUTE FUNCTION product_universe_id()")
+    op.execute(CHARACTER_UNIVERSE_FUNCTION)
+    op.execute("CREATE TRIGGER character_products_universe_id AFTER UPDATE OF universe_id ON character "
+               "FOR EACH ROW WHEN (OLD.universe_id IS DISTINCT FROM NEW.universe_id) "
+               "EXECUTE FUNCTION character_products_universe_id()")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER character_products_universe_id ON character")
+    op.execute("DROP FUNCTION character_products_universe_id()")
+    for table in PRODUCT_TABLES:
+        op.execute(f"DROP TRIGGER {table}_universe_id ON {table}")
+    op.execute("DROP FUNCTION product_universe_id()")
+    for table in reversed(PRODUCT_TABLES):
+        op.drop_index(f'ix_{table}_universe_id_price_id', table_name=table)
+        op.drop_index(f'ix_{table}_universe_id_id', table_name=table)
+        op.drop_column(table, 'universe_id')
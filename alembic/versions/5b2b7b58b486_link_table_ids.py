@@ -0,0 +1,36 @@
+"""link table ids
+
+Revision ID: 5b2b7b58b486
+Revises: 3141f23bc773
+Create Date: 2026-10-17 03:36:19.336279
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2b7b58b486'
+down_revision: Union[str, None] = '3141f23bc773'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Таблицы связей, ID которых до этой миграции никто не выдавал
+LINK_TABLES = ("comics_authors", "comics_characters")
+
+
+def upgrade() -> None:
+    for table in LINK_TABLES:
+        op.execute(f"CREATE SEQUENCE {table}_id_seq AS smallint OWNED BY {table}.id")
+        # Связи, добавленные через API, сохранялись с ID 0: выдаём им ID после максимального загруженного
+        op.execute(f"SELECT setval('{table}_id_seq', coalesce(max(id), 0) + 1, false) FROM {table}")
+        op.execute(f"UPDATE {table} SET id = nextval('{table}_id_seq') WHERE id = 0")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq')")
+
+
+def downgrade() -> None:
+    for table in LINK_TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT")
+        op.execute(f"DROP SEQUENCE {table}_id_seq")
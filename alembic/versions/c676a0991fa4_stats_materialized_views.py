@@ -0,0 +1,84 @@
+"""stats materialized views
+
+Revision ID: c676a0991fa4
+Revises: 231296bebbff
+Create Date: 2026-10-17 03:11:28.043939
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c676a0991fa4'
+down_revision: Union[str, None] = '231296bebbff'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Товары всех видов одной выборкой
+PRODUCTS = """
+    SELECT 'device' AS kind, device.type_of_device AS type, device.price AS price, device.character_id AS character_id
+    FROM device
+    UNION ALL
+    SELECT 'sweet', CAST(NULL AS VARCHAR), sweet.price, sweet.character_id
+    FROM sweet
+    UNION ALL
+    SELECT 'toy', toy.type_of_toy, toy.price, toy.character_id
+    FROM toy
+"""
+
+# Запросы представлений и ключи их уникальных индексов, без которых невозможен REFRESH ... CONCURRENTLY.
+# Строки итогов ROLLUP хранят NULL в ключе, поэтому индексы создаются с NULLS NOT DISTINCT (PostgreSQL 15+)
+VIEWS = {
+    "stats_universe": (f"""
+        SELECT character.universe_id,
+               count(*) FILTER (WHERE products.kind = 'device') AS devices,
+               count(*) FILTER (WHERE products.kind = 'sweet') AS sweets,
+               count(*) FILTER (WHERE products.kind = 'toy') AS toys,
+               count(*) AS products, min(products.price) AS price_min, round(avg(products.price), 2) AS price_avg,
+               max(products.price) AS price_max
+        FROM ({PRODUCTS}) AS products JOIN character ON character.id = products.character_id
+        GROUP BY ROLLUP(character.universe_id)
+    """, "universe_id"),
+    "stats_character": (f"""
+        SELECT character.id AS character_id, character.universe_id,
+               count(*) FILTER (WHERE products.kind = 'device') AS devices,
+               count(*) FILTER (WHERE products.kind = 'sweet') AS sweets,
+               count(*) FILTER (WHERE products.kind = 'toy') AS toys,
+               count(*) AS products, min(products.price) AS price_min, round(avg(products.price), 2) AS price_avg,
+               max(products.price) AS price_max
+        FROM ({PRODUCTS}) AS products JOIN character ON character.id = products.character_id
+        GROUP BY character.id
+    """, "character_id"),
+    "stats_product_type": (f"""
+        SELECT products.kind, products.type, count(*) AS products, min(products.price) AS price_min,
+               round(avg(products.price), 2) AS price_avg, max(products.price) AS price_max
+        FROM ({PRODUCTS}) AS products
+        GROUP BY ROLLUP(products.kind, products.type)
+        HAVING NOT (products.kind = 'sweet' AND grouping(products.type) = 0)
+    """, "kind, type"),
+    "stats_author": ("""
+        SELECT author.id AS author_id, count(character.id) AS characters
+        FROM author LEFT OUTER JOIN character ON author.id = character.author_id
+        GROUP BY author.id
+    """, "author_id"),
+    "stats_comics": ("""
+        SELECT comics.country, count(*) AS comics, min(comics.price) AS price_min,
+               round(avg(comics.price), 2) AS price_avg, max(comics.price) AS price_max
+        FROM comics
+        GROUP BY ROLLUP(comics.country)
+    """, "country"),
+}
+
+
+def upgrade() -> None:
+    for name, (query, key) in VIEWS.items():
+        op.execute(f"CREATE MATERIALIZED VIEW {name} AS {query}")
+        op.execute(f"CREATE UNIQUE INDEX ix_{name}_key ON {name} ({key}) NULLS NOT DISTINCT")
+
+
+def downgrade() -> None:
+    for name in reversed(VIEWS):
+        op.execute(f"DROP MATERIALIZED VIEW {name}")
@@ -1,9 +1,66 @@
+from asyncio import CancelledError, create_task
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator
+
 from fastapi import FastAPI
+from sqlalchemy.exc import IntegrityError
+
+from src.api.errors import integrity_error_handler, invalid_cursor_handler
+from src.api.health import router as health_router
+from src.api.metrics import router as metrics_router
 from src.api.router import router as api_router
+from src.database.base import Base
+from src.database.replicas import REPLICAS, check_replication_lag, check_replication_lag_periodically, dispose_replicas
+from src.database.stats import refresh_stats_periodically
+from src.types.pagination import InvalidCursor
+from src.middleware import ETagMiddleware, MetricsMiddleware, ReadYourWritesMiddleware
+from src.settings import SETTINGS
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Жизненный цикл приложения: в режиме материализованной статистики обновляем её в фоне, при репликах следим
+    за их отставанием, а при остановке воркера закрываем соединения пулов, чтобы они не оставались висеть на стороне БД
+    до таймаута
+    :param app:
+    :return:
+    """
+    refresher = create_task(refresh_stats_periodically()) if SETTINGS.STATS_MATERIALIZED else None
+    # Первое отставание реплик измеряем до приёма запросов, дальше - в фоне
+    await check_replication_lag()
+    lag_checker = create_task(check_replication_lag_periodically()) if REPLICAS else None
+    yield
+    # Останавливаем фоновые задачи
+    for task in (refresher, lag_checker):
+        if task is not None:
+            task.cancel()
+            with suppress(CancelledError):
+                await task
+    # Закрываем соединения асинхронных пулов
+    await Base.async_engine.dispose()
+    await dispose_replicas()
+
 
 # Самый главный роутер
 app = FastAPI(
-    title="API Гиг-Магазина"
+    title="API Гиг-Магазина",
+    lifespan=lifespan
 )
 # Подключаем к самому главному роутеру роутер API
 app.include_router(router=api_router)
+# Подключаем проверку готовности
+app.include_router(router=health_router)
+# Подключаем метрики в формате Prometheus
+app.include_router(router=metrics_router)
+# Нарушения уникальности и внешних ключей отдаём как 409/422, а не 500
+app.add_exception_handler(IntegrityError, integrity_error_handler)
+# Курсор от списка с другой сортировкой отдаём как 422
+app.add_exception_handler(InvalidCursor, invalid_cursor_handler)
+# Проставляем ETag ответам на GET-запросы и отдаём 304, если у клиента актуальная версия
+app.add_middleware(ETagMiddleware)
+# При репликах после своих записей клиент какое-то время читает с основной БД
+if REPLICAS:
+    app.add_middleware(ReadYourWritesMiddleware)
+# Собираем метрики запросов по маршрутам, включая время работы остальных middleware
+app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,152 @@
+"""
+Микробенчмарки горячего пути ответа: валидация схем представления и сериализация через orjson.
+Запуск с сохранением результатов и сравнение с сохранённым базовым прогоном:
+    pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Tuple, Type
+
+from fastapi.responses import ORJSONResponse
+from orjson import dumps
+from pydantic import TypeAdapter
+from pytest import fixture, mark
+
+from src.database.base import Base
+from src.database.models import Character, Device, Sweet, Toy, Universe
+from src.types.base import DTO
+from src.types.character import CharacterDetail
+from src.types.device import DeviceDetail
+from src.types.fields import row_serializer
+from src.types.pagination import MAX_PAGE_LIMIT
+from src.types.sweet import SweetDetail
+from src.types.toy import ToyDetail
+from src.types.universe import UniverseDetail
+
+# Количество записей в одном ответе, как у страницы списка с максимальным лимитом
+ROWS_PER_RESPONSE = MAX_PAGE_LIMIT
+
+# Схемы представления, модели и генераторы строк, какими их возвращает БД
+CASES: Dict[str, Tuple[Type[DTO], Type[Base], Callable[[int], Dict[str, Any]]]] = {
+    "universe": (UniverseDetail, Universe, lambda n: {
+        "id": n, "slug": f"universe-{n}-2000-01-01", "title": f"Universe {n}", "date_created": date(2000, 1, 1)
+    }),
+    "character": (CharacterDetail, Character, lambda n: {
+        "id": n, "slug": f"character-{n}-2000-01-01", "name": f"Character {n}", "date_created": date(2000, 1, 1),
+        "role": "Hero", "power": "Strength", "universe_id": 1, "author_id": 1
+    }),
+    "device": (DeviceDetail, Device, lambda n: {
+        "id": n, "slug": f"device-{n}-gadget-50", "title": f"Device {n}", "type_of_device": "Gadget",
+        "price": Decimal("50.00"), "character_id": 1
+    }),
+    "sweet": (SweetDetail, Sweet, lambda n: {
+        "id": n, "slug": f"sweet-{n}-250-50", "title": f"Sweet {n}", "price": Decimal("50.00"), "weight": 250,
+        "character_id": 1
+    }),
+    "toy": (ToyDetail, Toy, lambda n: {
+        "id": n, "slug": f"toy-{n}-figure-50", "title": f"Toy {n}", "age": 6, "type_of_toy": "Figure",
+        "price": Decimal("50.00"), "character_id": 1
+    }),
+}
+
+
+@fixture(params=list(CASES), scope="module")
+def case(request) -> Tuple[Type[DTO], Type[Base], List[Dict[str, Any]]]:
+    """
+    Схема представления, модель и строки одного ответа
+    :param request:
+    :return:
+    """
+    detail, model, make_row = CASES[request.param]
+    return detail, model, [make_row(n) for n in range(1, ROWS_PER_RESPONSE + 1)]
+
+
+def bench_validate_rows(benchmark, case):
+    """
+    Валидация строк Core-запроса (mappings) схемой представления
+    :param benchmark:
+    :param case:
+    :return:
+    """
+    detail, _, rows = case
+    benchmark(lambda: [detail.model_validate(obj=row) for row in rows])
+
+
+def bench_validate_orm_objects(benchmark, case):
+    """
+    Валидация ORM-объектов схемой представления через from_attributes
+    :param benchmark:
+    :param case:
+    :return:
+    """
+    detail, model, rows = case
+    objects = [model(**row) for row in rows]
+    benchmark(lambda: [detail.model_validate(obj=obj) for obj in objects])
+
+
+def bench_validate_list_adapter(benchmark, case):
+    """
+    Валидация всего ответа одним адаптером списка, как это делает response_model
+    :param benchmark:
+    :param case:
+    :return:
+    """
+    detail, _, rows = case
+    adapter = TypeAdapter(List[detail])
+    benchmark(adapter.validate_python, rows)
+
+
+def bench_orjson_dumps(benchmark, case):
+    """
+    Сериализация готовых схем: model_dump(mode="json") и orjson
+    :param benchmark:
+    :param case:
+    :return:
+    """
+    detail, _, rows = case
+    items = [detail.model_validate(obj=row) for row in rows]
+    benchmark(lambda: dumps([item.model_dump(mode="json") for item in items]))
+
+
+@mark.parametrize("validate", [False, True], ids=["prevalidated", "with-validation"])
+def bench_orjson_response(benchmark, case, validate):
+    """
+    Полный путь ответа ORJSONResponse: при validate - вместе с валидацией строк
+    :param benchmark:
+    :param case:
+    :param validate:
+    :return:
+    """
+    detail, _, rows = case
+    adapter = TypeAdapter(List[detail])
+    items = adapter.validate_python(rows)
+
+    def render() -> bytes:
+        content = adapter.validate_python(rows) if validate else items
+        return ORJSONResponse(content=adapter.dump_python(content, mode="json")).body
+
+    benchmark(render)
+
+
+@mark.parametrize("trusted", [False, True], ids=["model-validate", "row-serializer"])
+def bench_page_response(benchmark, case, trusted):
+    """
+    Ответ страницы списка из строк БД: через валидацию схемой представления, как было, или через row_serializer
+    без валидации, как отвечают эндпоинты сейчас. Тела ответов обоих путей совпадают
+    :param benchmark:
+    :param case:
+    :param trusted:
+    :return:
+    """
+    detail, _, rows = case
+    serialize = row_serializer(detail=detail)
+
+    def validated() -> bytes:
+        return ORJSONResponse(content=[detail.model_validate(obj=row).model_dump(mode="json") for row in rows]).body
+
+    def serialized() -> bytes:
+        return ORJSONResponse(content=[serialize(row) for row in rows]).body
+
+    assert serialized() == validated()
+    benchmark(serialized if trusted else validated)
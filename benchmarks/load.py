@@ -0,0 +1,269 @@
+"""
+Нагрузочный прогон всех GET-маршрутов /api/v1 запущенного сервера с отчётом по перцентилям задержки и RPS.
+ID в путях и в параметре ids пакетных запросов выбираются случайно из диапазонов ID в БД, а запросы поиска
+собираются из названий случайных записей каталога, с фиксированным зерном для воспроизводимости.
+
+Пример:
+    python -m benchmarks.load --base-url http://localhost:8001 --requests 500 --concurrency 32 --output run.json
+    python -m benchmarks.load --baseline run.json
+    python -m benchmarks.load --routes /search --max-p95 20
+"""
+from argparse import ArgumentParser
+from asyncio import gather, run
+from json import dump, load
+from random import Random
+from re import compile, findall
+from statistics import quantiles
+from sys import exit
+from time import perf_counter
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi.routing import APIRoute
+from httpx import AsyncClient, HTTPError, Limits
+from sqlalchemy import func, select
+
+from app import app
+from src.database.base import Base
+from src.database.search import SEARCH_TABLES
+from src.types.search import MIN_QUERY_LENGTH
+
+# Маршруты, не попадающие в прогон по умолчанию: выгрузки отдают таблицу целиком
+DEFAULT_EXCLUDE = r"/export/"
+# Количество ID в одном пакетном запросе
+BATCH_IDS = 20
+# Количество записей каталога, из названий которых собираются запросы поиска
+SEARCH_SAMPLE = 200
+# Количество запросов на маршрут перед замером, чтобы прогреть пул соединений и кэши
+WARMUP_REQUESTS = 10
+
+
+class RouteResult(NamedTuple):
+    """
+    Результат прогона одного маршрута
+    """
+    requests: int
+    errors: int
+    rps: float
+    p50: float
+    p95: float
+    p99: float
+
+
+def discover_routes(include: Optional[str], exclude: Optional[str]) -> List[str]:
+    """
+    Шаблоны путей всех GET-маршрутов /api/v1 с учётом фильтров
+    :param include:
+    :param exclude:
+    :return:
+    """
+    include_regex = compile(include) if include else None
+    exclude_regex = compile(exclude) if exclude else None
+    return [
+        route.path for route in app.routes
+        if isinstance(route, APIRoute) and route.path.startswith("/api/v1/") and "GET" in route.methods
+        and (include_regex is None or include_regex.search(route.path))
+        and (exclude_regex is None or not exclude_regex.search(route.path))
+    ]
+
+
+def id_ranges() -> Dict[str, Tuple[int, int]]:
+    """
+    Минимальный и максимальный ID каждой непустой таблицы
+    :return:
+    """
+    ranges = {}
+    with Base.engine.connect() as connection:
+        for name, table in Base.metadata.tables.items():
+            low, high = connection.execute(select(func.min(table.c.id), func.max(table.c.id))).one()
+            if low is not None:
+                ranges[name] = (low, high)
+    return ranges
+
+
+def _table_for(param: str, ranges: Dict[str, Tuple[int, int]]) -> str:
+    """
+    Таблица, на запись которой ссылается параметр пути или префикс роутера:
+    character_id -> character, comics_character_id -> comics_characters, toys -> toy
+    :param param:
+    :param ranges:
+    :return:
+    """
+    name = param.removesuffix("_id")
+    for table in (name, f"{name}s", name.removesuffix("s")):
+        if table in ranges:
+            return table
+    raise ValueError(f"Нет данных для параметра {param}, заполните БД: python -m benchmarks.seed")
+
+
+def search_terms(ranges: Dict[str, Tuple[int, int]], rng: Random) -> List[str]:
+    """
+    Запросы поиска из названий случайных записей каталога: название целиком, его начало, название с опечаткой
+    и первое слово названия, которое совпадает с множеством записей
+    :param ranges:
+    :param rng:
+    :return:
+    """
+    titles = []
+    with Base.engine.connect() as connection:
+        for _, model, title in SEARCH_TABLES:
+            if model.__tablename__ in ranges:
+                low, high = ranges[model.__tablename__]
+                ids = [rng.randint(low, high) for _ in range(SEARCH_SAMPLE // len(SEARCH_TABLES))]
+                titles += connection.scalars(select(title).where(model.id.in_(ids)).order_by(model.id)).all()
+    if not titles:
+        raise ValueError("Нет записей для запросов поиска, заполните БД: python -m benchmarks.seed")
+    terms = []
+    for title in titles:
+        # Соседние буквы в середине названия меняются местами
+        middle = len(title) // 2
+        terms += [
+            title,
+            title[:max(MIN_QUERY_LENGTH, len(title) * 2 // 3)],
+            title[:middle - 1] + title[middle] + title[middle - 1] + title[middle + 1:],
+            title.split()[0],
+        ]
+    return terms
+
+
+def generate_urls(path: str, count: int, ranges: Dict[str, Tuple[int, int]], rng: Random,
+                  terms: List[str]) -> Iterator[str]:
+    """
+    URL запросов к маршруту со случайными ID, а для пакетных запросов и поиска - с обязательными query-параметрами
+    :param path:
+    :param count:
+    :param ranges:
+    :param rng:
+    :param terms:
+    :return:
+    """
+    params = {param: ranges[_table_for(param=param, ranges=ranges)] for param in findall(r"{(\w+)}", path)}
+    # Пакетный запрос берёт ID из таблицы своего роутера: /api/v1/toys/batch/ -> toy
+    batch = ranges[_table_for(param=path.split("/")[-3], ranges=ranges)] if path.endswith("/batch/") else None
+    for _ in range(count):
+        url = path.format(**{param: rng.randint(low, high) for param, (low, high) in params.items()})
+        if batch is not None:
+            url += "?" + urlencode({"ids": ",".join(str(rng.randint(*batch)) for _ in range(BATCH_IDS))})
+        elif path.endswith("/search/"):
+            url += "?" + urlencode({"q": rng.choice(terms)})
+        yield url
+
+
+async def run_route(client: AsyncClient, urls: List[str], concurrency: int) -> RouteResult:
+    """
+    Отправка запросов к маршруту заданным количеством параллельных клиентов
+    :param client:
+    :param urls:
+    :param concurrency:
+    :return:
+    """
+    latencies: List[float] = []
+    errors = 0
+    pending = iter(urls)
+
+    async def worker() -> None:
+        nonlocal errors
+        for url in pending:
+            started = perf_counter()
+            try:
+                response = await client.get(url)
+                # Ошибкой считаем любой ответ, кроме успешного
+                if response.status_code >= 300:
+                    errors += 1
+            except HTTPError:
+                errors += 1
+            latencies.append(perf_counter() - started)
+
+    started = perf_counter()
+    await gather(*(worker() for _ in range(concurrency)))
+    elapsed = perf_counter() - started
+    # Перцентили в миллисекундах
+    cuts = quantiles([latency * 1000 for latency in latencies], n=100, method="inclusive")
+    return RouteResult(
+        requests=len(latencies), errors=errors, rps=len(latencies) / elapsed, p50=cuts[49], p95=cuts[94], p99=cuts[98]
+    )
+
+
+async def run_all(base_url: str, routes: List[str], requests: int, concurrency: int,
+                  seed: int) -> Dict[str, RouteResult]:
+    """
+    Последовательный прогон маршрутов
+    :param base_url:
+    :param routes:
+    :param requests:
+    :param concurrency:
+    :param seed:
+    :return:
+    """
+    rng, ranges = Random(seed), id_ranges()
+    # Запросы поиска собираются, только если поиск есть среди маршрутов
+    terms = search_terms(ranges=ranges, rng=rng) if any(path.endswith("/search/") for path in routes) else []
+    results = {}
+    limits = Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        for path in routes:
+            warmup = list(generate_urls(path=path, count=WARMUP_REQUESTS, ranges=ranges, rng=rng, terms=terms))
+            await run_route(client=client, urls=warmup, concurrency=1)
+            urls = list(generate_urls(path=path, count=requests, ranges=ranges, rng=rng, terms=terms))
+            results[path] = await run_route(client=client, urls=urls, concurrency=concurrency)
+            print(_format_row(path=path, result=results[path]), flush=True)
+    return results
+
+
+def _format_row(path: str, result: RouteResult, baseline: Optional[dict] = None) -> str:
+    """
+    Строка отчёта по маршруту, при наличии базового прогона - с изменением p95
+    :param path:
+    :param result:
+    :param baseline:
+    :return:
+    """
+    row = (f"{path:<60} {result.requests:>7} {result.errors:>6} {result.rps:>9.1f} "
+           f"{result.p50:>8.2f} {result.p95:>8.2f} {result.p99:>8.2f}")
+    if baseline is not None:
+        row += f" {(result.p95 / baseline['p95'] - 1) * 100:>+8.1f}%"
+    return row
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Точка входа командной строки
+    :param argv:
+    :return:
+    """
+    parser = ArgumentParser(description="Нагрузочный прогон GET-маршрутов /api/v1")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="Адрес запущенного сервера")
+    parser.add_argument("--requests", type=int, default=200, help="Количество запросов на маршрут")
+    parser.add_argument("--concurrency", type=int, default=16, help="Количество параллельных клиентов")
+    parser.add_argument("--routes", help="Регулярка путей, которые нужно прогнать")
+    parser.add_argument("--exclude", default=DEFAULT_EXCLUDE, help="Регулярка путей, которые нужно пропустить")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно выбора ID для воспроизводимости")
+    parser.add_argument("--output", help="Файл для сохранения результатов в JSON")
+    parser.add_argument("--baseline", help="Файл результатов предыдущего прогона для сравнения p95")
+    parser.add_argument("--max-p95", type=float, help="Бюджет p95 в миллисекундах, при превышении прогон падает")
+    args = parser.parse_args(argv)
+    routes = discover_routes(include=args.routes, exclude=args.exclude)
+    print(f"{'Маршрут':<60} {'Запросы':>7} {'Ошибки':>6} {'RPS':>9} {'p50, мс':>8} {'p95, мс':>8} {'p99, мс':>8}")
+    results = run(run_all(base_url=args.base_url, routes=routes, requests=args.requests,
+                          concurrency=args.concurrency, seed=args.seed))
+    # Если передан базовый прогон, печатаем сравнение с ним
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = load(file)
+        print("\nСравнение с базовым прогоном (последняя колонка - изменение p95):")
+        for path, result in results.items():
+            if path in baseline:
+                print(_format_row(path=path, result=result, baseline=baseline[path]))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            dump({path: result._asdict() for path, result in results.items()}, file, ensure_ascii=False, indent=2)
+    # Если задан бюджет p95, маршруты сверх него завершают прогон с ошибкой
+    if args.max_p95 is not None:
+        slow = [path for path, result in results.items() if result.p95 > args.max_p95]
+        if slow:
+            print(f"\np95 больше {args.max_p95} мс: {', '.join(slow)}")
+            exit(1)
+
+
+if __name__ == "__main__":
+    main()
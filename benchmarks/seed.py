@@ -0,0 +1,153 @@
+"""
+Заполнение БД каталогом заданного размера для нагрузочного тестирования.
+Строки генерируются на стороне PostgreSQL через generate_series, поэтому миллион товаров создаётся за секунды.
+
+Пример:
+    python -m benchmarks.seed --universes 100 --characters 10000 --products 1000000 --truncate
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+from src.database.base import Base
+
+# Таблицы каталога в порядке зависимостей
+CATALOG_TABLES = (
+    "universe", "author", "character", "comics", "device", "sweet", "toy", "comics_authors", "comics_characters"
+)
+
+# Запросы генерации строк. Слаги собираются так же, как их строят схемы представления, чтобы PUT их не менял
+SEED_STATEMENTS = {
+    "universe": """
+        INSERT INTO universe (id, slug, title, date_created)
+        SELECT n, 'universe-' || n || '-' || to_char(DATE '1900-01-01' + n, 'YYYY-MM-DD'), 'Universe ' || n,
+               DATE '1900-01-01' + n
+        FROM generate_series(1, :universes) AS n
+    """,
+    "author": """
+        INSERT INTO author (id, slug, name, surname, birthday)
+        SELECT n, lower(name || '-' || surname) || '-' || to_char(birthday, 'YYYY-MM-DD'), name, surname, birthday
+        FROM generate_series(1, :authors) AS n,
+             LATERAL (SELECT 'Author' || translate(n::text, '0123456789', 'abcdefghij') AS name,
+                             'Surname' || translate(n::text, '0123456789', 'abcdefghij') AS surname,
+                             DATE '1950-01-01' + n % 10000 AS birthday) AS author
+    """,
+    "character": """
+        INSERT INTO character (id, slug, name, date_created, role, power, universe_id, author_id)
+        SELECT n, 'character-' || n || '-' || to_char(DATE '1960-01-01' + n % 20000, 'YYYY-MM-DD'), 'Character ' || n,
+               DATE '1960-01-01' + n % 20000, 'Hero', 'Strength', 1 + n % :universes, 1 + n % :authors
+        FROM generate_series(1, :characters) AS n
+    """,
+    "comics": """
+        INSERT INTO comics (id, slug, title, volume, date_created, price, country)
+        SELECT n, 'comics-' || n || '-' || (1 + n % 50) || '-' || to_char(DATE '1970-01-01' + n % 20000, 'YYYY-MM-DD'),
+               'Comics ' || n, 1 + n % 50, DATE '1970-01-01' + n % 20000, 100 + n % 900, 'Russia'
+        FROM generate_series(1, :comics) AS n
+    """,
+    "device": """
+        INSERT INTO device (id, slug, title, type_of_device, price, character_id)
+        SELECT n, 'device-' || n || '-gadget-' || (10 + n % 90), 'Device ' || n, 'Gadget', 10 + n % 90,
+               1 + n % :characters
+        FROM generate_series(1, :devices) AS n
+    """,
+    "sweet": """
+        INSERT INTO sweet (id, slug, title, price, weight, character_id)
+        SELECT n, 'sweet-' || n || '-' || (50 + n % 500) || '-' || (10 + n % 90), 'Sweet ' || n, 10 + n % 90,
+               50 + n % 500, 1 + n % :characters
+        FROM generate_series(1, :sweets) AS n
+    """,
+    "toy": """
+        INSERT INTO toy (id, slug, title, age, type_of_toy, price, character_id)
+        SELECT n, 'toy-' || n || '-figure-' || (10 + n % 90), 'Toy ' || n, 3 + n % 14, 'Figure', 10 + n % 90,
+               1 + n % :characters
+        FROM generate_series(1, :toys) AS n
+    """,
+    "comics_authors": """
+        INSERT INTO comics_authors (id, comics_id, author_id)
+        SELECT n, n, 1 + n % :authors FROM generate_series(1, :comics) AS n
+    """,
+    "comics_characters": """
+        INSERT INTO comics_characters (id, comics_id, character_id)
+        SELECT n, n, 1 + n % :characters FROM generate_series(1, :comics) AS n
+    """,
+}
+
+
+def seed(universes: int, authors: int, characters: int, comics: int, products: int, truncate: bool) -> Dict[str, float]:
+    """
+    Заполнение таблиц каталога в одной транзакции
+    :param universes:
+    :param authors:
+    :param characters:
+    :param comics:
+    :param products:
+    :param truncate:
+    :return:
+    """
+    # Товары делятся поровну между девайсами, сладостями и игрушками
+    parameters = {
+        "universes": universes,
+        "authors": authors,
+        "characters": characters,
+        "comics": comics,
+        "devices": products - 2 * (products // 3),
+        "sweets": products // 3,
+        "toys": products // 3,
+    }
+    timings = {}
+    with Base.engine.begin() as connection:
+        # Если нужно начать с пустого каталога
+        if truncate:
+            connection.execute(text(f"TRUNCATE {', '.join(CATALOG_TABLES)} RESTART IDENTITY CASCADE"))
+        # В другом случае заполняем только пустой каталог, чтобы не смешивать данные
+        else:
+            for table in CATALOG_TABLES:
+                if connection.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {table})")):
+                    raise ValueError(f"Таблица {table} не пуста, передайте --truncate")
+        for table, statement in SEED_STATEMENTS.items():
+            started = perf_counter()
+            connection.execute(text(statement), parameters)
+            # ID заданы явно, поэтому сдвигаем последовательность за максимальный из них
+            connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), max(id)) FROM {table} HAVING count(*) > 0"
+            ))
+            timings[table] = perf_counter() - started
+    # Обновляем статистику планировщика после массовой вставки
+    with Base.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"ANALYZE {', '.join(CATALOG_TABLES)}"))
+    return timings
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Точка входа командной строки
+    :param argv:
+    :return:
+    """
+    parser = ArgumentParser(description="Заполнение БД каталогом заданного размера для нагрузочного тестирования")
+    parser.add_argument("--universes", type=int, default=100, help="Количество вселенных")
+    parser.add_argument("--authors", type=int, default=100, help="Количество авторов")
+    parser.add_argument("--characters", type=int, default=10000, help="Количество персонажей, не больше 32767")
+    parser.add_argument("--comics", type=int, default=1000, help="Количество комиксов, у каждого один автор и персонаж")
+    parser.add_argument("--products", type=int, default=1000000, help="Количество товаров всех видов")
+    parser.add_argument("--truncate", action="store_true", help="Очистить таблицы каталога перед заполнением")
+    args = parser.parse_args(argv)
+    try:
+        timings = seed(
+            universes=args.universes,
+            authors=args.authors,
+            characters=args.characters,
+            comics=args.comics,
+            products=args.products,
+            truncate=args.truncate
+        )
+    except ValueError as exc:
+        parser.exit(status=1, message=f"{exc}\n")
+    for table, seconds in timings.items():
+        print(f"{table}: {seconds:.2f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Конфигурация gunicorn для запуска в продакшене:
+    gunicorn app:app -c gunicorn.conf.py
+"""
+from os import cpu_count
+
+from src.settings import SETTINGS
+
+# Адрес, на котором слушает сервер
+bind = "0.0.0.0:8000"
+# Воркер uvicorn с uvloop и httptools
+worker_class = "src.worker.UvloopWorker"
+# Асинхронному воркеру хватает одного процесса на ядро
+workers = SETTINGS.WEB_CONCURRENCY or cpu_count() or 1
+# Плавный перезапуск воркеров, чтобы ограничить рост памяти
+max_requests = SETTINGS.WORKER_MAX_REQUESTS
+max_requests_jitter = SETTINGS.WORKER_MAX_REQUESTS_JITTER
+# Время на завершение текущих запросов и закрытие пула соединений при остановке
+graceful_timeout = SETTINGS.WORKER_GRACEFUL_TIMEOUT
+# Приложение импортируется в каждом воркере, чтобы у каждого процесса были свой движок и пул соединений
+preload_app = False
+# Логи доступа и ошибок в stdout/stderr контейнера
+accesslog = "-"
+errorlog = "-"
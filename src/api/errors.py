@@ -0,0 +1,49 @@
+from fastapi import Request, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.exc import IntegrityError
+
+from src.types.pagination import InvalidCursor
+
+# Код ошибки PostgreSQL при нарушении уникальности
+UNIQUE_VIOLATION = "23505"
+# Код ошибки PostgreSQL при нарушении внешнего ключа
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+async def integrity_error_handler(request: Request, exc: IntegrityError) -> ORJSONResponse:
+    """
+    Обработчик нарушений ограничений БД при записи.
+    Уникальность проверяется уникальными индексами в момент INSERT/UPDATE, а не отдельными запросами при валидации
+    :param request:
+    :param exc:
+    :return:
+    """
+    # Код ошибки отдают и asyncpg, и psycopg2, но под разными именами
+    code = getattr(exc.orig, "sqlstate", None) or getattr(exc.orig, "pgcode", None)
+    # Если запись с такими уникальными полями уже существует
+    if code == UNIQUE_VIOLATION:
+        return ORJSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"detail": "Запись с такими данными уже существует"}
+        )
+    # Если связанная запись не найдена
+    if code == FOREIGN_KEY_VIOLATION:
+        return ORJSONResponse(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            content={"detail": "Связанная запись не найдена"}
+        )
+    # Остальные нарушения ограничений (CHECK, NOT NULL) считаем невалидными данными
+    return ORJSONResponse(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        content={"detail": "Данные нарушают ограничения БД"}
+    )
+
+
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor) -> ORJSONResponse:
+    """
+    Обработчик курсора, который не подходит к запрошенной сортировке списка
+    :param request:
+    :param exc:
+    :return:
+    """
+    return ORJSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content={"detail": str(exc)})
@@ -0,0 +1,96 @@
+from csv import writer
+from io import StringIO
+from typing import AsyncIterator, Type
+
+from fastapi.responses import StreamingResponse
+from orjson import dumps
+from sqlalchemy import select
+
+from src.database.models import Base
+from src.database.replicas import read_sessionmaker
+from src.types.base import DTO
+from src.types.export import ExportFormat
+from src.types.fields import row_serializer
+
+# Количество строк, которое забирается из серверного курсора и сериализуется за один раз
+EXPORT_CHUNK_SIZE = 1000
+# MIME-типы форматов выгрузки
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def _serialize_ndjson(rows: list) -> bytes:
+    """
+    Сериализация пачки строк в NDJSON
+    :param rows:
+    :return:
+    """
+    # Каждая запись занимает отдельную строку
+    return b"".join(dumps(row) + b"\n" for row in rows)
+
+
+def _serialize_csv(rows: list, fields: list) -> bytes:
+    """
+    Сериализация пачки строк в CSV
+    :param rows:
+    :param fields:
+    :return:
+    """
+    # Пишем строки в буфер в порядке полей заголовка
+    buffer = StringIO()
+    writer(buffer).writerows([row[field] for field in fields] for row in rows)
+    # Возвращаем пачку в кодировке UTF-8
+    return buffer.getvalue().encode()
+
+
+async def _export_chunks(model: Type[Base], detail: Type[DTO], export_format: ExportFormat) -> AsyncIterator[bytes]:
+    """
+    Генератор выгрузки таблицы пачками через серверный курсор
+    :param model:
+    :param detail:
+    :param export_format:
+    :return:
+    """
+    # Поля выгрузки в порядке схемы представления
+    fields = list(detail.model_fields)
+    serialize = row_serializer(detail=detail)
+    # Если выгрузка в CSV
+    if export_format is ExportFormat.CSV:
+        # Первой строкой отдаём заголовок, не дожидаясь выполнения запроса
+        yield _serialize_csv(rows=[{field: field for field in fields}], fields=fields)
+    # Сессия открывается внутри генератора, так как живёт всё время отправки ответа. Выгрузка только читает,
+    # поэтому идёт с реплики, если они настроены
+    async with read_sessionmaker()() as session:
+        # Читаем строки таблицы без ORM-объектов серверным курсором, по EXPORT_CHUNK_SIZE строк за раз
+        result = await session.stream(
+            select(*model.public_columns()).order_by(model.id).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        async for partition in result.mappings().partitions():
+            # Приводим строки к представлению API без повторной валидации: данные в БД уже проверены при записи
+            rows = [serialize(row) for row in partition]
+            # Если выгрузка в CSV
+            if export_format is ExportFormat.CSV:
+                # Отдаём очередную пачку строк CSV
+                yield _serialize_csv(rows=rows, fields=fields)
+            # В другом случае
+            else:
+                # Отдаём очередную пачку строк NDJSON
+                yield _serialize_ndjson(rows=rows)
+
+
+def stream_export(model: Type[Base], detail: Type[DTO], export_format: ExportFormat) -> StreamingResponse:
+    """
+    Потоковая выгрузка всех записей таблицы
+    :param model:
+    :param detail:
+    :param export_format:
+    :return:
+    """
+    # Отдаём выгрузку по мере чтения курсора, не собирая её целиком в памяти
+    return StreamingResponse(
+        content=_export_chunks(model=model, detail=detail, export_format=export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{model.__tablename__}.{export_format.value}"'}
+    )
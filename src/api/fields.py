@@ -0,0 +1,58 @@
+from typing import Iterable, List, Mapping, Optional, Tuple, Type
+
+from fastapi.responses import ORJSONResponse
+
+from src.types.base import DTO
+from src.types.batch import BatchKey
+from src.types.fields import row_serializer
+
+
+def fields_page(detail: Type[DTO], rows: Iterable, next_cursor: Optional[str],
+                fields: Optional[Tuple[str, ...]] = None) -> ORJSONResponse:
+    """
+    Готовый ответ со страницей строк БД, сериализованных без валидации схемой представления.
+    response_model эндпоинта остаётся для документации: повторно проверять строки из БД при каждом чтении незачем,
+    а с выбором полей он бы ещё и отверг неполные записи
+    :param detail:
+    :param rows:
+    :param next_cursor:
+    :param fields:
+    :return:
+    """
+    serialize = row_serializer(detail=detail, fields=fields)
+    return ORJSONResponse(content={"items": [serialize(row._mapping) for row in rows], "next_cursor": next_cursor})
+
+
+def fields_batch(detail: Type[DTO], rows: Iterable[Mapping], missing: List[BatchKey],
+                 fields: Optional[Tuple[str, ...]] = None) -> ORJSONResponse:
+    """
+    Готовый ответ пакетного запроса: найденные строки БД, сериализованные без валидации, и ключи ненайденных
+    :param detail:
+    :param rows:
+    :param missing:
+    :param fields:
+    :return:
+    """
+    serialize = row_serializer(detail=detail, fields=fields)
+    return ORJSONResponse(content={"items": [serialize(row) for row in rows], "missing": missing})
+
+
+def fields_list(detail: Type[DTO], rows: Iterable[Mapping]) -> ORJSONResponse:
+    """
+    Готовый ответ со списком строк БД, сериализованных без валидации схемой представления
+    :param detail:
+    :param rows:
+    :return:
+    """
+    serialize = row_serializer(detail=detail)
+    return ORJSONResponse(content=[serialize(row) for row in rows])
+
+
+def fields_row(detail: Type[DTO], row: Mapping) -> ORJSONResponse:
+    """
+    Готовый ответ с одной строкой БД, сериализованной без валидации схемой представления
+    :param detail:
+    :param row:
+    :return:
+    """
+    return ORJSONResponse(content=row_serializer(detail=detail)(row))
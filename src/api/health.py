@@ -0,0 +1,50 @@
+from asyncio import wait_for
+
+from fastapi import APIRouter, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.database.base import Base
+from src.settings import SETTINGS
+from src.types.service import HealthStatus
+
+# Роутер проверки готовности, подключается вне /api, чтобы путь не зависел от версии API
+router = APIRouter(
+    tags=["Служебное"],
+    default_response_class=ORJSONResponse
+)
+
+
+async def _ping_database() -> None:
+    """
+    Лёгкий запрос к БД через соединение из пула
+    :return:
+    """
+    async with Base.async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+@router.get(
+    path="/health",
+    status_code=status.HTTP_200_OK,
+    response_model=HealthStatus,
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"model": HealthStatus}},
+    name="Проверка готовности"
+)
+async def health():
+    """
+    Проверка готовности: процесс получает соединение из пула и БД на него отвечает
+    :return:
+    """
+    try:
+        # Ждём не дольше таймаута проверки, а не таймаута пула, чтобы зонд не висел при исчерпанном пуле
+        await wait_for(_ping_database(), timeout=SETTINGS.HEALTH_CHECK_TIMEOUT)
+    except (SQLAlchemyError, OSError, TimeoutError):
+        # Если БД недоступна или свободного соединения нет, процесс не готов принимать запросы
+        return ORJSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content=HealthStatus(status="unavailable", pool=Base.async_engine.pool.stats()).model_dump(mode="json")
+        )
+    # Возвращаем статус и состояние пула
+    return HealthStatus(status="ok", pool=Base.async_engine.pool.stats())
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, status
+from fastapi.responses import PlainTextResponse
+
+from src.cache import RESPONSE_CACHE
+from src.database.replicas import engine_pools
+from src.metrics import REQUEST_METRICS, format_labels
+
+# Тип содержимого текстового формата Prometheus, кодировку utf-8 добавляет PlainTextResponse
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Метрики пула соединений: имя, тип, поле PoolStats и описание
+POOL_METRICS = (
+    ("db_pool_size", "gauge", "size", "Количество постоянных соединений в пуле"),
+    ("db_pool_checked_in", "gauge", "checked_in", "Количество соединений, ожидающих в пуле"),
+    ("db_pool_checked_out", "gauge", "checked_out", "Количество соединений, выданных запросам"),
+    ("db_pool_overflow", "gauge", "overflow", "Количество соединений сверх размера пула"),
+    ("db_pool_timeouts_total", "counter", "timeouts", "Количество запросов, не дождавшихся соединения"),
+)
+
+# Роутер метрик, подключается вне /api, по стандартному для Prometheus пути
+router = APIRouter(
+    tags=["Служебное"]
+)
+
+
+@router.get(
+    path="/metrics",
+    status_code=status.HTTP_200_OK,
+    response_class=PlainTextResponse,
+    name="Получение метрик в формате Prometheus"
+)
+async def get_metrics():
+    """
+    Метрики процесса в текстовом формате Prometheus: HTTP-запросы, кэш ответов и пул соединений с БД
+    :return:
+    """
+    cache = RESPONSE_CACHE.stats()
+    # Пулы соединений основной БД и реплик по меткам, чтобы было видно, какому движку не хватает соединений
+    pools = engine_pools()
+    lines = REQUEST_METRICS.exposition()
+    # Счётчики и размер кэша ответов
+    for name, kind, value, description in (
+            ("response_cache_hits_total", "counter", cache.hits, "Количество ответов, отданных из кэша"),
+            ("response_cache_misses_total", "counter", cache.misses, "Количество запросов, ушедших в БД"),
+            ("response_cache_evictions_total", "counter", cache.evictions, "Количество вытесненных записей"),
+            ("response_cache_size", "gauge", cache.size, "Текущее количество записей в кэше"),
+    ):
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}", f"{name} {value}"]
+    # Состояние и таймауты каждого пула
+    pool_stats = {label: pool.stats() for label, pool in pools.items()}
+    for name, kind, attribute, description in POOL_METRICS:
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+        lines += [
+            f"{name}{format_labels(pool=label)} {getattr(stats, attribute)}" for label, stats in pool_stats.items()
+        ]
+    # Время ожидания соединения из каждого пула
+    lines += [
+        "# HELP db_pool_wait_seconds Время получения соединения из пула",
+        "# TYPE db_pool_wait_seconds histogram",
+    ]
+    for label, pool in pools.items():
+        lines += pool.wait_time.exposition("db_pool_wait_seconds", pool=label)
+    return PlainTextResponse(content="\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
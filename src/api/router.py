@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from fastapi.responses import ORJSONResponse
+from .service import router as service_router
 from .v1.router import router as v1_router
 
 # Роутер, отвечающий за ветку API целеком
@@ -9,4 +10,6 @@ router = APIRouter(
 )
 
 # Подключаем роутер V1 к основному роутеру API
-router.include_router(router=v1_router)
\ No newline at end of file
+router.include_router(router=v1_router)
+# Подключаем роутер служебных эндпоинтов к основному роутеру API
+router.include_router(router=service_router)
\ No newline at end of file
@@ -0,0 +1,60 @@
+from typing import Dict, List
+
+from fastapi import APIRouter, status
+from fastapi.responses import ORJSONResponse
+
+from src.cache import RESPONSE_CACHE
+from src.database.replicas import REPLICAS, engine_pools
+from src.types.service import CacheStats, PoolStats, ReplicaStats
+
+# Роутер служебных эндпоинтов
+router = APIRouter(
+    prefix="/service",
+    tags=["Служебное"],
+    default_response_class=ORJSONResponse
+)
+
+
+@router.get(
+    path="/cache/",
+    status_code=status.HTTP_200_OK,
+    response_model=CacheStats,
+    name="Получение счётчиков кэша ответов"
+)
+async def get_cache_stats():
+    """
+    Получение счётчиков кэша ответов
+    :return:
+    """
+    # Возвращаем текущие счётчики кэша
+    return RESPONSE_CACHE.stats()
+
+
+@router.get(
+    path="/pool/",
+    status_code=status.HTTP_200_OK,
+    response_model=Dict[str, PoolStats],
+    name="Получение состояния пулов соединений с БД"
+)
+async def get_pool_stats():
+    """
+    Получение состояния пулов соединений с основной БД и репликами: primary и адреса реплик без пароля
+    :return:
+    """
+    # Возвращаем состояние пулов асинхронных движков этого процесса
+    return {label: pool.stats() for label, pool in engine_pools().items()}
+
+
+@router.get(
+    path="/replicas/",
+    status_code=status.HTTP_200_OK,
+    response_model=List[ReplicaStats],
+    name="Получение состояния реплик только для чтения"
+)
+async def get_replica_stats():
+    """
+    Получение состояния реплик только для чтения
+    :return:
+    """
+    # Возвращаем отставание и состояние пулов реплик, измеренные этим процессом
+    return [replica.stats() for replica in REPLICAS]
@@ -1,16 +1,29 @@
-from typing import List
+from typing import Any, List, Optional, Tuple
 
-from fastapi import APIRouter, status, Path, HTTPException
+from fastapi import APIRouter, status, Path, HTTPException, Body
 from fastapi.responses import ORJSONResponse
 from pydantic import PositiveInt
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.dependencies import get_db_session
-from src.types.аuthor import AuthorDetail, AuthorAddForm, AuthorUpdateForm
+from src.api.fields import fields_batch, fields_list, fields_page
+from src.database.batch import fetch_batch
+from src.database.fields import select_fields
+from src.database.pagination import paginate
+from src.database.update import update_returning, patch_returning
+from src.dependencies import (
+    get_batch_keys, get_db_session, get_read_session, get_cached_read_session, get_pagination, get_author_fields
+)
+from src.types.аuthor import AuthorDetail, AuthorAddForm, AuthorUpdateForm, AuthorPatchForm, AuthorBulkUpdateForm
 from src.types.character import CharacterDetail
 from src.types.comics import ComicsDetail
-from src.database.models import Author, Comics
+from src.types.batch import BatchKeys, BatchResult
+from src.types.fields import row_serializer
+from src.types.pagination import Page, Pagination
+from src.types.bulk import MAX_BULK_SIZE, BulkResult, BulkDeleteForm, BulkDeleteResult, validate_bulk
+from src.cache import RESPONSE_CACHE, cached_response
+from src.database.models import Author, Comics, ComicsAuthors, Character, Device, Sweet, Toy
+from src.database.bulk import bulk_create, bulk_update, bulk_delete
 
 # Роутер персонажей
 router = APIRouter(
@@ -23,19 +36,25 @@ router = APIRouter(
 @router.get(
     path="/",
     status_code=status.HTTP_200_OK,
-    response_model=List[AuthorDetail],
+    response_model=Page[AuthorDetail],
     name="Получение списка всех авторов"
 )
-async def get_list_authors(session: Session = get_db_session):
+async def get_list_authors(fields: Optional[Tuple[str, ...]] = get_author_fields,
+                           pagination: Pagination = get_pagination,
+                           session: AsyncSession = get_read_session):
     """
     Получение списка всех авторов
+    :param fields:
+    :param pagination:
     :param session:
     :return:
     """
-    # Достаём всех авторов
-    authors = session.scalars(select(Author).order_by(Author.id))
-    # Возвращаем список всех авторов
-    return [AuthorDetail.model_validate(obj=author, from_attributes=True) for author in authors]
+    # Достаём страницу авторов только с выбранными полями, начиная после курсора
+    statement = select_fields(model=Author, fields=fields)
+    authors, next_cursor = await paginate(session=session, statement=statement, column=Author.id,
+                                          pagination=pagination)
+    # Возвращаем страницу авторов с выбранными полями и курсором следующей страницы
+    return fields_page(detail=AuthorDetail, rows=authors, next_cursor=next_cursor, fields=fields)
 
 
 @router.post(
@@ -44,7 +63,7 @@ async def get_list_authors(session: Session = get_db_session):
     response_model=AuthorDetail,
     name="Добавление нового автора"
 )
-async def add_new_author(form: AuthorAddForm, session: Session = get_db_session):
+async def add_new_author(form: AuthorAddForm, session: AsyncSession = get_db_session):
     """
     Добавление нового автора
     :param form:
@@ -58,34 +77,138 @@ async def add_new_author(form: AuthorAddForm, session: Session = get_db_session)
     # Добавляем нового автора в БД
     session.add(author)
     # Сохраняем изменения в БД
-    session.commit()
-    # Дописываем ID, если это не обходимо
-    session.refresh(author)
+    await session.commit()
+    # Сбрасываем из кэша возможную устаревшую запись с таким ID
+    RESPONSE_CACHE.invalidate(model=Author, obj_id=author.id)
     # Возвращаем нового автора в виде основной схемы представления автора
     return AuthorDetail.model_validate(obj=author, from_attributes=True)
 
 
+@router.post(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResult[AuthorDetail],
+    name="Массовое добавление авторов"
+)
+async def bulk_add_authors(payload: List[Any] = Body(default=..., max_length=MAX_BULK_SIZE),
+                           session: AsyncSession = get_db_session):
+    """
+    Массовое добавление авторов
+    :param payload:
+    :param session:
+    :return:
+    """
+    # Валидируем весь список одним адаптером, собирая ошибки по позициям записей
+    forms, errors = validate_bulk(form=AuthorAddForm, payload=payload)
+    # Добавляем все валидные авторов одним запросом и одним коммитом
+    result = await bulk_create(session=session, model=Author, detail=AuthorDetail, forms=forms, errors=errors)
+    # Сбрасываем из кэша возможные устаревшие записи с такими ID
+    for author in result.items:
+        RESPONSE_CACHE.invalidate(model=Author, obj_id=author.id)
+    # Возвращаем добавленные авторов и ошибки остальных записей
+    return result
+
+
+@router.patch(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResult[AuthorDetail],
+    name="Массовое обновление авторов"
+)
+async def bulk_update_authors(payload: List[Any] = Body(default=..., max_length=MAX_BULK_SIZE),
+                              session: AsyncSession = get_db_session):
+    """
+    Массовое обновление авторов
+    :param payload:
+    :param session:
+    :return:
+    """
+    # Валидируем весь список одним адаптером, собирая ошибки по позициям записей
+    forms, errors = validate_bulk(form=AuthorBulkUpdateForm, payload=payload)
+    # Обновляем все валидные авторов одним запросом и одним коммитом
+    result = await bulk_update(session=session, model=Author, detail=AuthorDetail, forms=forms, errors=errors)
+    # Сбрасываем из кэша устаревшие записи
+    for author in result.items:
+        RESPONSE_CACHE.invalidate(model=Author, obj_id=author.id)
+    # Возвращаем обновлённые авторов и ошибки остальных записей
+    return result
+
+
+@router.delete(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkDeleteResult,
+    name="Массовое удаление авторов"
+)
+async def bulk_delete_authors(form: BulkDeleteForm, session: AsyncSession = get_db_session):
+    """
+    Массовое удаление авторов
+    :param form:
+    :param session:
+    :return:
+    """
+    # Удаляем все авторов одним запросом и одним коммитом
+    result = await bulk_delete(session=session, model=Author, ids=form.ids)
+    # Сбрасываем из кэша удалённые записи
+    for author_id in result.deleted:
+        RESPONSE_CACHE.invalidate(model=Author, obj_id=author_id)
+    # Сбрасываем из кэша записи, каскадно удалённые БД
+    RESPONSE_CACHE.invalidate_models(Character, Device, Sweet, Toy)
+    # Возвращаем ID удалённых и ненайденных авторов
+    return result
+
+
+@router.get(
+    path="/batch/",
+    status_code=status.HTTP_200_OK,
+    response_model=BatchResult[AuthorDetail],
+    name="Получение нескольких авторов по ID или слагам"
+)
+async def get_batch_of_authors(keys: BatchKeys = get_batch_keys,
+                               fields: Optional[Tuple[str, ...]] = get_author_fields,
+                               session: AsyncSession = get_read_session):
+    """
+    Получение нескольких авторов одним запросом по списку ID или слагов
+    :param keys:
+    :param fields:
+    :param session:
+    :return:
+    """
+    # Достаём всех запрошенных авторов одним запросом в порядке переданных ключей
+    authors, missing = await fetch_batch(session=session, model=Author, keys=keys, fields=fields)
+    # Возвращаем найденных авторов с выбранными полями и ключи ненайденных
+    return fields_batch(detail=AuthorDetail, rows=authors, missing=missing, fields=fields)
+
+
 @router.get(
     path="/{author_id}/",
     status_code=status.HTTP_200_OK,
     response_model=AuthorDetail,
     name="Получение конкретного автора"
 )
-async def get_author(author_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def get_author(author_id: PositiveInt = Path(default=..., ge=1), session: AsyncSession = get_cached_read_session):
     """
     Получение конкретного автора
     :param author_id:
     :param session:
     :return:
     """
+    # Если ответ уже есть в кэше, отдаём его без обращения к БД
+    entry = RESPONSE_CACHE.get(model=Author, obj_id=author_id)
+    if entry is not None:
+        return cached_response(entry=entry)
+    # Запоминаем поколение кэша до запроса, чтобы не закэшировать строку, изменённую во время чтения
+    generation = RESPONSE_CACHE.generation()
     # Достаём конкретного автора по его ID
-    author = session.scalar(select(Author).filter_by(id=author_id))
+    author = (await session.execute(select_fields(model=Author).where(Author.id == author_id))).mappings().first()
     # Если автор не найден
     if author is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого автора не существует")
-    # В другом случае возвращаем валидированные данные
-    return AuthorDetail.model_validate(obj=author, from_attributes=True)
+    # В другом случае кэшируем и возвращаем строку, сериализованную без повторной валидации
+    content = row_serializer(detail=AuthorDetail)(author)
+    entry = RESPONSE_CACHE.set(model=Author, obj_id=author_id, content=content, generation=generation)
+    return cached_response(entry=entry)
 
 
 @router.put(
@@ -95,7 +218,7 @@ async def get_author(author_id: PositiveInt = Path(default=..., ge=1), session:
     name="Обновление конкретного автора"
 )
 async def update_author(form: AuthorUpdateForm, author_id: PositiveInt = Path(default=..., ge=1),
-                        session: Session = get_db_session):
+                        session: AsyncSession = get_db_session):
     """
     Обновление конкретного автора
     :param form:
@@ -103,24 +226,50 @@ async def update_author(form: AuthorUpdateForm, author_id: PositiveInt = Path(de
     :param session:
     :return:
     """
-    # Достаём конкретного автора по его ID
-    author = session.scalar(select(Author).filter_by(id=author_id))
+    # Валидируем полученные данные
+    form_author = AuthorDetail(id=author_id, **form.model_dump())
+    # Обновляем запись одним запросом UPDATE ... RETURNING
+    author = await update_returning(session=session, model=Author, obj_id=author_id,
+                                    values=form_author.model_dump(exclude={"id"}))
     # Если автор не найден
     if author is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого автора не существует")
-    # Валидируем полученные данные
-    form_author = AuthorDetail(id=author_id, **form.model_dump())
-    # Достаём ключи и их значения в провалидированных данных
-    for name, value in form_author:
-        # Изменяем полученого по ID автора
-        setattr(author, name, value)
     # Сохраняем изменения в БД
-    session.commit()
-    # Дописываем ID, если это необходимо
-    session.refresh(author)
+    await session.commit()
+    # Сбрасываем из кэша устаревшую запись
+    RESPONSE_CACHE.invalidate(model=Author, obj_id=author_id)
     # Возвращаем изменённого автора в виде основной схемы представления автора
-    return AuthorDetail.model_validate(obj=author, from_attributes=True)
+    return AuthorDetail.model_validate(obj=author)
+
+
+@router.patch(
+    path="/{author_id}/",
+    status_code=status.HTTP_200_OK,
+    response_model=AuthorDetail,
+    name="Частичное обновление конкретного автора"
+)
+async def patch_author(form: AuthorPatchForm, author_id: PositiveInt = Path(default=..., ge=1),
+                       session: AsyncSession = get_db_session):
+    """
+    Частичное обновление конкретного автора
+    :param form:
+    :param author_id:
+    :param session:
+    :return:
+    """
+    # Обновляем только переданные поля, слаг пересчитывается, только если меняются его поля
+    author = await patch_returning(session=session, model=Author, detail=AuthorDetail, obj_id=author_id, form=form)
+    # Если автор не найден
+    if author is None:
+        # Выдаём ошибку
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого автора не существует")
+    # Сохраняем изменения в БД
+    await session.commit()
+    # Сбрасываем из кэша устаревшую запись
+    RESPONSE_CACHE.invalidate(model=Author, obj_id=author_id)
+    # Возвращаем изменённого автора в виде основной схемы представления автора
+    return AuthorDetail.model_validate(obj=author)
 
 
 @router.delete(
@@ -128,19 +277,25 @@ async def update_author(form: AuthorUpdateForm, author_id: PositiveInt = Path(de
     status_code=status.HTTP_200_OK,
     name="Удаление конкретного автора"
 )
-async def delete_author(author_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def delete_author(author_id: PositiveInt = Path(default=..., ge=1), session: AsyncSession = get_db_session):
     """
     Удаление конкретного автора
     :param author_id:
     :param session:
     :return:
     """
-    # Достаём конкретного автора по его ID
-    author = session.scalar(select(Author).filter_by(id=author_id))
-    # Удаляем выбранного автора
-    session.delete(author)
+    # Удаляем выбранного автора одним запросом, дочерние записи удаляет БД каскадно по внешним ключам
+    deleted_id = await session.scalar(delete(Author).where(Author.id == author_id).returning(Author.id))
+    # Если автор не найден
+    if deleted_id is None:
+        # Выдаём ошибку
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого автора не существует")
     # Сохраняем изменения в БД
-    session.commit()
+    await session.commit()
+    # Сбрасываем из кэша удалённую запись
+    RESPONSE_CACHE.invalidate(model=Author, obj_id=author_id)
+    # Сбрасываем из кэша записи, каскадно удалённые БД
+    RESPONSE_CACHE.invalidate_models(Character, Device, Sweet, Toy)
     # Возвращаем сообщение об успешном удалении конкретного автора
     return {"msg": "Done"}
 
@@ -152,21 +307,23 @@ async def delete_author(author_id: PositiveInt = Path(default=..., ge=1), sessio
     name="Получение списка всех персонажей конкретного автора"
 )
 async def get_list_characters_of_author(author_id: PositiveInt = Path(default=..., ge=1),
-                                        session: Session = get_db_session):
+                                        session: AsyncSession = get_read_session):
     """
     Получение списка персонажей конкретного автора
     :param author_id:
     :param session:
     :return:
     """
-    # Достаём конкретного автора по его ID
-    author = session.scalar(select(Author).filter_by(id=author_id))
-    # Если автор не найден
-    if author is None:
+    # Достаём персонажей конкретного автора одним запросом по индексу author_id
+    characters = (await session.execute(
+        select_fields(model=Character).where(Character.author_id == author_id).order_by(Character.id)
+    )).mappings().all()
+    # Если персонажи не найдены и самого автора не существует
+    if not characters and await session.scalar(select(Author.id).filter_by(id=author_id)) is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого автора не существует")
-    # Возвращаем список персонажей конкретного автора
-    return [CharacterDetail.model_validate(obj=character, from_attributes=True) for character in author.characters]
+    # Возвращаем список персонажей конкретного автора, сериализованных без повторной валидации
+    return fields_list(detail=CharacterDetail, rows=characters)
 
 
 @router.get(
@@ -176,18 +333,21 @@ async def get_list_characters_of_author(author_id: PositiveInt = Path(default=..
     name="Получение всех комиксов конкретного автора"
 )
 async def get_list_comics_of_author(author_id: PositiveInt = Path(default=..., ge=1),
-                                    session: Session = get_db_session):
+                                    session: AsyncSession = get_read_session):
     """
     Получение списка комиксов конкретного автора
     :param author_id:
     :param session:
     :return:
     """
-    # Достаём конкретного автора по его ID
-    author = session.scalar(select(Author).filter_by(id=author_id))
-    # Если автор не найден
-    if author is None:
+    # Достаём комиксы конкретного автора одним запросом через таблицу связей
+    comics = (await session.execute(
+        select_fields(model=Comics).join(ComicsAuthors, ComicsAuthors.comics_id == Comics.id)
+        .where(ComicsAuthors.author_id == author_id).order_by(Comics.id)
+    )).mappings().all()
+    # Если комиксы не найдены и самого автора не существует
+    if not comics and await session.scalar(select(Author.id).filter_by(id=author_id)) is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого автора не существует")
-    # Возвращаем список комиксов кокнретного автора
-    return [ComicsDetail.model_validate(obj=comics, from_attributes=True) for comics in author.comics]
+    # Возвращаем список комиксов конкретного автора, сериализованных без повторной валидации
+    return fields_list(detail=ComicsDetail, rows=comics)
@@ -1,19 +1,36 @@
-from typing import List
+from typing import Any, List, Optional, Tuple
 
-from fastapi import APIRouter, status, Path, HTTPException
+from fastapi import APIRouter, status, Path, HTTPException, Body, Response
 from fastapi.responses import ORJSONResponse
 from pydantic import PositiveInt
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.models import Character
-from src.dependencies import get_db_session
-from src.types.character import CharacterAddForm, CharacterDetail, CharacterUpdateForm
+from src.api.fields import fields_batch, fields_list, fields_page, fields_row
+from src.cache import RESPONSE_CACHE, cached_response
+from src.database.models import Character, Universe, Author, Device, Sweet, Toy
+from src.database.bulk import bulk_create, bulk_update, bulk_delete
+from src.database.batch import fetch_batch
+from src.database.documents import CHARACTER_DOCUMENT, fetch_document
+from src.database.fields import select_fields
+from src.database.pagination import paginate
+from src.database.update import update_returning, patch_returning
+from src.dependencies import (
+    get_batch_keys, get_db_session, get_read_session, get_cached_read_session, get_pagination, get_character_fields
+)
+from src.types.character import (
+    CharacterAddForm, CharacterDetail, CharacterUpdateForm, CharacterPatchForm, CharacterBulkUpdateForm
+)
 from src.types.universe import UniverseDetail
 from src.types.аuthor import AuthorDetail
 from src.types.device import DeviceDetail
 from src.types.sweet import SweetDetail
 from src.types.toy import ToyDetail
+from src.types.batch import BatchKeys, BatchResult
+from src.types.documents import CharacterFull
+from src.types.fields import row_serializer
+from src.types.pagination import Page, Pagination
+from src.types.bulk import MAX_BULK_SIZE, BulkResult, BulkDeleteForm, BulkDeleteResult, validate_bulk
 
 # Роутер персонажей комиксов и вселенных
 router = APIRouter(
@@ -26,19 +43,25 @@ router = APIRouter(
 @router.get(
     path="/",
     status_code=status.HTTP_200_OK,
-    response_model=List[CharacterDetail],
+    response_model=Page[CharacterDetail],
     name="Получение списка всех персонажей"
 )
-async def get_list_characters(session: Session = get_db_session):
+async def get_list_characters(fields: Optional[Tuple[str, ...]] = get_character_fields,
+                              pagination: Pagination = get_pagination,
+                              session: AsyncSession = get_read_session):
     """
     Получение списка всех персонажей
+    :param fields:
+    :param pagination:
     :param session:
     :return:
     """
-    # Достаём всех персонажей
-    characters = session.scalars(select(Character).order_by(Character.id))
-    # Возвращаем список всех персонажей
-    return [CharacterDetail.model_validate(obj=character, from_attributes=True) for character in characters]
+    # Достаём страницу персонажей только с выбранными полями, начиная после курсора
+    statement = select_fields(model=Character, fields=fields)
+    characters, next_cursor = await paginate(session=session, statement=statement, column=Character.id,
+                                             pagination=pagination)
+    # Возвращаем страницу персонажей с выбранными полями и курсором следующей страницы
+    return fields_page(detail=CharacterDetail, rows=characters, next_cursor=next_cursor, fields=fields)
 
 
 @router.post(
@@ -47,7 +70,7 @@ async def get_list_characters(session: Session = get_db_session):
     response_model=CharacterDetail,
     name="Добавление нового персонажа"
 )
-async def add_new_character(form: CharacterAddForm, session: Session = get_db_session):
+async def add_new_character(form: CharacterAddForm, session: AsyncSession = get_db_session):
     """
     Добавление нового персонажа
     :param form:
@@ -61,34 +84,140 @@ async def add_new_character(form: CharacterAddForm, session: Session = get_db_se
     # Добавляем нового персонажа в БД
     session.add(character)
     # Сохраняем изменения в БД
-    session.commit()
-    # Дописываем ID, если это не обходимо
-    session.refresh(character)
+    await session.commit()
+    # Сбрасываем из кэша возможную устаревшую запись с таким ID
+    RESPONSE_CACHE.invalidate(model=Character, obj_id=character.id)
     # Возвращаем нового персонажа в виде основной схемы представления персонажа
     return CharacterDetail.model_validate(obj=character, from_attributes=True)
 
 
+@router.post(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResult[CharacterDetail],
+    name="Массовое добавление персонажей"
+)
+async def bulk_add_characters(payload: List[Any] = Body(default=..., max_length=MAX_BULK_SIZE),
+                              session: AsyncSession = get_db_session):
+    """
+    Массовое добавление персонажей
+    :param payload:
+    :param session:
+    :return:
+    """
+    # Валидируем весь список одним адаптером, собирая ошибки по позициям записей
+    forms, errors = validate_bulk(form=CharacterAddForm, payload=payload)
+    # Добавляем все валидные персонажей одним запросом и одним коммитом
+    result = await bulk_create(session=session, model=Character, detail=CharacterDetail, forms=forms, errors=errors)
+    # Сбрасываем из кэша возможные устаревшие записи с такими ID
+    for character in result.items:
+        RESPONSE_CACHE.invalidate(model=Character, obj_id=character.id)
+    # Возвращаем добавленные персонажей и ошибки остальных записей
+    return result
+
+
+@router.patch(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResult[CharacterDetail],
+    name="Массовое обновление персонажей"
+)
+async def bulk_update_characters(payload: List[Any] = Body(default=..., max_length=MAX_BULK_SIZE),
+                                 session: AsyncSession = get_db_session):
+    """
+    Массовое обновление персонажей
+    :param payload:
+    :param session:
+    :return:
+    """
+    # Валидируем весь список одним адаптером, собирая ошибки по позициям записей
+    forms, errors = validate_bulk(form=CharacterBulkUpdateForm, payload=payload)
+    # Обновляем все валидные персонажей одним запросом и одним коммитом
+    result = await bulk_update(session=session, model=Character, detail=CharacterDetail, forms=forms, errors=errors)
+    # Сбрасываем из кэша устаревшие записи
+    for character in result.items:
+        RESPONSE_CACHE.invalidate(model=Character, obj_id=character.id)
+    # Возвращаем обновлённые персонажей и ошибки остальных записей
+    return result
+
+
+@router.delete(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkDeleteResult,
+    name="Массовое удаление персонажей"
+)
+async def bulk_delete_characters(form: BulkDeleteForm, session: AsyncSession = get_db_session):
+    """
+    Массовое удаление персонажей
+    :param form:
+    :param session:
+    :return:
+    """
+    # Удаляем все персонажей одним запросом и одним коммитом
+    result = await bulk_delete(session=session, model=Character, ids=form.ids)
+    # Сбрасываем из кэша удалённые записи
+    for character_id in result.deleted:
+        RESPONSE_CACHE.invalidate(model=Character, obj_id=character_id)
+    # Сбрасываем из кэша записи, каскадно удалённые БД
+    RESPONSE_CACHE.invalidate_models(Device, Sweet, Toy)
+    # Возвращаем ID удалённых и ненайденных персонажей
+    return result
+
+
+@router.get(
+    path="/batch/",
+    status_code=status.HTTP_200_OK,
+    response_model=BatchResult[CharacterDetail],
+    name="Получение нескольких персонажей по ID или слагам"
+)
+async def get_batch_of_characters(keys: BatchKeys = get_batch_keys,
+                                  fields: Optional[Tuple[str, ...]] = get_character_fields,
+                                  session: AsyncSession = get_read_session):
+    """
+    Получение нескольких персонажей одним запросом по списку ID или слагов
+    :param keys:
+    :param fields:
+    :param session:
+    :return:
+    """
+    # Достаём всех запрошенных персонажей одним запросом в порядке переданных ключей
+    characters, missing = await fetch_batch(session=session, model=Character, keys=keys, fields=fields)
+    # Возвращаем найденных персонажей с выбранными полями и ключи ненайденных
+    return fields_batch(detail=CharacterDetail, rows=characters, missing=missing, fields=fields)
+
+
 @router.get(
     path="/{character_id}/",
     status_code=status.HTTP_200_OK,
     response_model=CharacterDetail,
     name="Получение конкретного персонажа"
 )
-async def get_character(character_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def get_character(character_id: PositiveInt = Path(default=..., ge=1),
+                        session: AsyncSession = get_cached_read_session):
     """
     Получение конкретного персонажа
     :param character_id:
     :param session:
     :return:
     """
+    # Если ответ уже есть в кэше, отдаём его без обращения к БД
+    entry = RESPONSE_CACHE.get(model=Character, obj_id=character_id)
+    if entry is not None:
+        return cached_response(entry=entry)
+    # Запоминаем поколение кэша до запроса, чтобы не закэшировать строку, изменённую во время чтения
+    generation = RESPONSE_CACHE.generation()
     # Достаём конкретного персонажа по его ID
-    character = session.scalar(select(Character).filter_by(id=character_id))
+    statement = select_fields(model=Character).where(Character.id == character_id)
+    character = (await session.execute(statement)).mappings().first()
     # Если персонаж не найден
     if character is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого персонажа не существует")
-    # В другом случае возвращаем валидированные данные
-    return CharacterDetail.model_validate(obj=character, from_attributes=True)
+    # В другом случае кэшируем и возвращаем строку, сериализованную без повторной валидации
+    content = row_serializer(detail=CharacterDetail)(character)
+    entry = RESPONSE_CACHE.set(model=Character, obj_id=character_id, content=content, generation=generation)
+    return cached_response(entry=entry)
 
 
 @router.put(
@@ -98,7 +227,7 @@ async def get_character(character_id: PositiveInt = Path(default=..., ge=1), ses
     name="Обновление конкретного персонажа"
 )
 async def update_character(form: CharacterUpdateForm, character_id: PositiveInt = Path(default=..., ge=1),
-                           session: Session = get_db_session):
+                           session: AsyncSession = get_db_session):
     """
     Обновление конкретного персонажа
     :param form:
@@ -106,24 +235,51 @@ async def update_character(form: CharacterUpdateForm, character_id: PositiveInt
     :param session:
     :return:
     """
-    # Достаём конкретного персонажа по его ID
-    character = session.scalar(select(Character).filter_by(id=character_id))
+    # Валидируем полученные данные
+    form_character = CharacterDetail(id=character_id, **form.model_dump())
+    # Обновляем запись одним запросом UPDATE ... RETURNING
+    character = await update_returning(session=session, model=Character, obj_id=character_id,
+                                       values=form_character.model_dump(exclude={"id"}))
     # Если персонаж не найден
     if character is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого персонажа не существует")
-    # Валидируем полученные данные
-    form_character = CharacterDetail(id=character_id, **form.model_dump())
-    # Достаём ключи и их значения в провалидированных данных
-    for name, value in form_character:
-        # Изменяем полученного по ID персонажа
-        setattr(character, name, value)
     # Сохраняем изменения в БД
-    session.commit()
-    # Дописываем ID, если это необходимо
-    session.refresh(character)
+    await session.commit()
+    # Сбрасываем из кэша устаревшую запись
+    RESPONSE_CACHE.invalidate(model=Character, obj_id=character_id)
     # Возвращаем изменённого персонажа в виде основной схемы представления персонажа
-    return CharacterDetail.model_validate(obj=character, from_attributes=True)
+    return CharacterDetail.model_validate(obj=character)
+
+
+@router.patch(
+    path="/{character_id}/",
+    status_code=status.HTTP_200_OK,
+    response_model=CharacterDetail,
+    name="Частичное обновление конкретного персонажа"
+)
+async def patch_character(form: CharacterPatchForm, character_id: PositiveInt = Path(default=..., ge=1),
+                          session: AsyncSession = get_db_session):
+    """
+    Частичное обновление конкретного персонажа
+    :param form:
+    :param character_id:
+    :param session:
+    :return:
+    """
+    # Обновляем только переданные поля, слаг пересчитывается, только если меняются его поля
+    character = await patch_returning(session=session, model=Character, detail=CharacterDetail, obj_id=character_id,
+                                      form=form)
+    # Если персонаж не найден
+    if character is None:
+        # Выдаём ошибку
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого персонажа не существует")
+    # Сохраняем изменения в БД
+    await session.commit()
+    # Сбрасываем из кэша устаревшую запись
+    RESPONSE_CACHE.invalidate(model=Character, obj_id=character_id)
+    # Возвращаем изменённого персонажа в виде основной схемы представления персонажа
+    return CharacterDetail.model_validate(obj=character)
 
 
 @router.delete(
@@ -131,23 +287,25 @@ async def update_character(form: CharacterUpdateForm, character_id: PositiveInt
     status_code=status.HTTP_200_OK,
     name="Удаление конкретного персонажа"
 )
-async def delete_character(character_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def delete_character(character_id: PositiveInt = Path(default=..., ge=1), session: AsyncSession = get_db_session):
     """
     Удаление конкретного персонажа
     :param character_id:
     :param session:
     :return:
     """
-    # Достаём конкретного персонажа по его ID
-    character = session.scalar(select(Character).filter_by(id=character_id))
+    # Удаляем выбранного персонажа одним запросом, дочерние записи удаляет БД каскадно по внешним ключам
+    deleted_id = await session.scalar(delete(Character).where(Character.id == character_id).returning(Character.id))
     # Если персонаж не найден
-    if character is None:
+    if deleted_id is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого персонажа не существует")
-    # Удаляем выбранного персонажа
-    session.delete(character)
     # Сохраняем изменения в БД
-    session.commit()
+    await session.commit()
+    # Сбрасываем из кэша удалённую запись
+    RESPONSE_CACHE.invalidate(model=Character, obj_id=character_id)
+    # Сбрасываем из кэша записи, каскадно удалённые БД
+    RESPONSE_CACHE.invalidate_models(Device, Sweet, Toy)
     # Возвращаем сообщение об успешном удалении конкретного персонажа
     return {"msg": "Done"}
 
@@ -159,21 +317,24 @@ async def delete_character(character_id: PositiveInt = Path(default=..., ge=1),
     name="Получение вселенной конкретного персонажа"
 )
 async def get_universe_of_character(character_id: PositiveInt = Path(default=..., ge=1),
-                                    session: Session = get_db_session):
+                                    session: AsyncSession = get_read_session):
     """
     Получение вселенной конкретного персонажа
     :param character_id:
     :param session:
     :return:
     """
-    # Достаём конкретного персонажа по его ID
-    character = session.scalar(select(Character).filter_by(id=character_id))
+    # Достаём вселенную конкретного персонажа одним запросом
+    universe = (await session.execute(
+        select_fields(model=Universe).join(Character, Character.universe_id == Universe.id)
+        .where(Character.id == character_id)
+    )).mappings().first()
     # Если персонаж не найден
-    if character is None:
+    if universe is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого персонажа не существует")
-    # Возвращаем конкретную вселенную конкретного персонажа
-    return UniverseDetail.model_validate(obj=character.universe, from_attributes=True)
+    # Возвращаем конкретную вселенную конкретного персонажа, сериализованную без повторной валидации
+    return fields_row(detail=UniverseDetail, row=universe)
 
 
 @router.get(
@@ -183,21 +344,24 @@ async def get_universe_of_character(character_id: PositiveInt = Path(default=...
     name="Получение автора конкретного персонажа"
 )
 async def get_author_of_character(character_id: PositiveInt = Path(default=..., ge=1),
-                                  session: Session = get_db_session):
+                                  session: AsyncSession = get_read_session):
     """
     Получение автора конкретного персонажа
     :param character_id:
     :param session:
     :return:
     """
-    # Достаём конкретного персонажа по его ID
-    character = session.scalar(select(Character).filter_by(id=character_id))
+    # Достаём автора конкретного персонажа одним запросом
+    author = (await session.execute(
+        select_fields(model=Author).join(Character, Character.author_id == Author.id)
+        .where(Character.id == character_id)
+    )).mappings().first()
     # Если персонаж не найден
-    if character is None:
+    if author is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого персонажа не существует")
-    # Возвращаем конкретного автора конкретного персонажа
-    return AuthorDetail.model_validate(obj=character.author, from_attributes=True)
+    # Возвращаем конкретного автора конкретного персонажа, сериализованного без повторной валидации
+    return fields_row(detail=AuthorDetail, row=author)
 
 
 @router.get(
@@ -207,21 +371,23 @@ async def get_author_of_character(character_id: PositiveInt = Path(default=...,
     name="Получение списка девайсов кокнертного персонажа"
 )
 async def get_list_devices_of_character(character_id: PositiveInt = Path(default=..., ge=1),
-                                        session: Session = get_db_session):
+                                        session: AsyncSession = get_read_session):
     """
     Получение списка девайсов кокнертного персонажа
     :param character_id:
     :param session:
     :return:
     """
-    # Достаём конкретного персонажа по его ID
-    character = session.scalar(select(Character).filter_by(id=character_id))
-    # Если персонаж не найден
-    if character is None:
+    # Достаём девайсы конкретного персонажа одним запросом по индексу character_id
+    devices = (await session.execute(
+        select_fields(model=Device).where(Device.character_id == character_id).order_by(Device.id)
+    )).mappings().all()
+    # Если девайсов не найдено и самого персонажа не существует
+    if not devices and await session.scalar(select(Character.id).filter_by(id=character_id)) is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого персонажа не существует")
-    # Возвращаем список девайсов, к которому относится конкретный персонаж
-    return [DeviceDetail.model_validate(obj=device, from_attributes=True) for device in character.devices]
+    # Возвращаем список девайсов конкретного персонажа, сериализованных без повторной валидации
+    return fields_list(detail=DeviceDetail, rows=devices)
 
 
 @router.get(
@@ -231,21 +397,23 @@ async def get_list_devices_of_character(character_id: PositiveInt = Path(default
     name="Получение списка сладостей конкретного персонажа"
 )
 async def get_list_sweets_of_character(character_id: PositiveInt = Path(default=..., ge=1),
-                                       session: Session = get_db_session):
+                                       session: AsyncSession = get_read_session):
     """
     Получение списка сладостей конкретного персонажа
     :param character_id:
     :param session:
     :return:
     """
-    # Достаём конкретного персонажа по его ID
-    character = session.scalar(select(Character).filter_by(id=character_id))
-    # Если персонаж не найден
-    if character is None:
+    # Достаём сладости конкретного персонажа одним запросом по индексу character_id
+    sweets = (await session.execute(
+        select_fields(model=Sweet).where(Sweet.character_id == character_id).order_by(Sweet.id)
+    )).mappings().all()
+    # Если сладостей не найдено и самого персонажа не существует
+    if not sweets and await session.scalar(select(Character.id).filter_by(id=character_id)) is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого персонажа не существует")
-    # Возвращаем список сладостей, к которому относится конкретный персонаж
-    return [SweetDetail.model_validate(obj=sweet, from_attributes=True) for sweet in character.sweets]
+    # Возвращаем список сладостей конкретного персонажа, сериализованных без повторной валидации
+    return fields_list(detail=SweetDetail, rows=sweets)
 
 
 @router.get(
@@ -255,19 +423,44 @@ async def get_list_sweets_of_character(character_id: PositiveInt = Path(default=
     name="Получение списка игрушек конркетного персонажа"
 )
 async def get_list_toys_of_character(character_id: PositiveInt = Path(default=..., ge=1),
-                                     session: Session = get_db_session):
+                                     session: AsyncSession = get_read_session):
     """
     Получение списка игрушек конркетного персонажа
     :param character_id:
     :param session:
     :return:
     """
-    # Достаём конкретного персонажа по его ID
-    character = session.scalar(select(Character).filter_by(id=character_id))
-    # Если персонаж не найден
-    if character is None:
+    # Достаём игрушки конкретного персонажа одним запросом по индексу character_id
+    toys = (await session.execute(
+        select_fields(model=Toy).where(Toy.character_id == character_id).order_by(Toy.id)
+    )).mappings().all()
+    # Если игрушек не найдено и самого персонажа не существует
+    if not toys and await session.scalar(select(Character.id).filter_by(id=character_id)) is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого персонажа не существует")
-    # Возвращаем список игрушек, к которому относится конкретный персонаж
-    return [ToyDetail.model_validate(obj=toy, from_attributes=True) for toy in character.toys]
+    # Возвращаем список игрушек конкретного персонажа, сериализованных без повторной валидации
+    return fields_list(detail=ToyDetail, rows=toys)
+
 
+@router.get(
+    path="/{character_id}/full/",
+    status_code=status.HTTP_200_OK,
+    response_model=CharacterFull,
+    name="Получение персонажа со вселенной, автором и товарами"
+)
+async def get_full_character(character_id: PositiveInt = Path(default=..., ge=1),
+                             session: AsyncSession = get_read_session):
+    """
+    Получение страницы персонажа одним запросом: персонаж, его вселенная, автор, девайсы, сладости и игрушки
+    :param character_id:
+    :param session:
+    :return:
+    """
+    # Собираем весь документ одним запросом в PostgreSQL и отдаём готовый JSON без разбора в Python
+    document = await fetch_document(session=session, document=CHARACTER_DOCUMENT, model=Character, obj_id=character_id)
+    # Если персонаж не найден
+    if document is None:
+        # Выдаём ошибку
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого персонажа не существует")
+    # В другом случае возвращаем документ персонажа как есть
+    return Response(content=document, media_type="application/json")
@@ -1,16 +1,35 @@
-from typing import List
+from typing import Any, List, Optional, Tuple
 
 from fastapi.responses import ORJSONResponse
 from pydantic import PositiveInt
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.dependencies import get_db_session
-from src.types.comics import ComicsDetail, ComicsAddForm, ComicsUpdateForm
+from src.api.fields import fields_batch, fields_list, fields_page
+from src.database.filters import apply_filters
+from src.database.batch import fetch_batch
+from src.database.documents import COMICS_DOCUMENT, fetch_document
+from src.database.fields import select_fields
+from src.database.pagination import paginate
+from src.database.update import update_returning, patch_returning
+from src.dependencies import (
+    get_batch_keys, get_db_session, get_read_session, get_cached_read_session, get_pagination, get_comics_filters,
+    get_comics_fields
+)
+from src.types.comics import (
+    ComicsDetail, ComicsAddForm, ComicsUpdateForm, ComicsPatchForm, ComicsBulkUpdateForm, ComicsFilter
+)
 from src.types.аuthor import AuthorDetail
 from src.types.character import CharacterDetail
-from src.database.models import Comics
-from fastapi import APIRouter, status, Path, HTTPException
+from src.types.batch import BatchKeys, BatchResult
+from src.types.documents import ComicsFull
+from src.types.fields import row_serializer
+from src.types.pagination import Page, Pagination
+from src.types.bulk import MAX_BULK_SIZE, BulkResult, BulkDeleteForm, BulkDeleteResult, validate_bulk
+from src.cache import RESPONSE_CACHE, cached_response
+from src.database.models import Author, Character, Comics, ComicsAuthors, ComicsCharacters
+from src.database.bulk import bulk_create, bulk_update, bulk_delete
+from fastapi import APIRouter, status, Path, HTTPException, Body, Response
 
 # Роутер комиксов
 router = APIRouter(
@@ -23,19 +42,28 @@ router = APIRouter(
 @router.get(
     path="/",
     status_code=status.HTTP_200_OK,
-    response_model=List[ComicsDetail],
+    response_model=Page[ComicsDetail],
     name="Получение списка всех комиксов"
 )
-async def get_list_comics(session: Session = get_db_session):
+async def get_list_comics(filters: ComicsFilter = get_comics_filters,
+                          fields: Optional[Tuple[str, ...]] = get_comics_fields,
+                          pagination: Pagination = get_pagination,
+                          session: AsyncSession = get_read_session):
     """
     Получение списка всех комиксов
+    :param filters:
+    :param fields:
+    :param pagination:
     :param session:
     :return:
     """
-    # Достаём все комиксы
-    all_comics = session.scalars(select(Comics).order_by(Comics.id))
-    # Возвращаем список всех комиксов
-    return [ComicsDetail.model_validate(obj=comics, from_attributes=True) for comics in all_comics]
+    # Отбираем комиксы по фильтрам и достаём страницу в порядке сортировки, начиная после курсора
+    statement = select_fields(model=Comics, fields=fields, sort=filters.sort)
+    statement = apply_filters(statement=statement, model=Comics, filters=filters)
+    all_comics, next_cursor = await paginate(session=session, statement=statement, column=Comics.id,
+                                             pagination=pagination, sort=filters.sort)
+    # Возвращаем страницу комиксов с выбранными полями и курсором следующей страницы
+    return fields_page(detail=ComicsDetail, rows=all_comics, next_cursor=next_cursor, fields=fields)
 
 
 @router.post(
@@ -44,7 +72,7 @@ async def get_list_comics(session: Session = get_db_session):
     response_model=ComicsDetail,
     name="Добавление нового комикса"
 )
-async def add_new_comics(form: ComicsAddForm, session: Session = get_db_session):
+async def add_new_comics(form: ComicsAddForm, session: AsyncSession = get_db_session):
     """
     Добавление нового комикса
     :param form:
@@ -58,34 +86,136 @@ async def add_new_comics(form: ComicsAddForm, session: Session = get_db_session)
     # Добавляем новый комикс в БД
     session.add(comics)
     # Сохраняем изменения в БД
-    session.commit()
-    # Дописываем ID, если это необходимо
-    session.refresh(comics)
+    await session.commit()
+    # Сбрасываем из кэша возможную устаревшую запись с таким ID
+    RESPONSE_CACHE.invalidate(model=Comics, obj_id=comics.id)
     # Возвращаем новую вселенную в виде основной схемы представления вселенной
     return ComicsDetail.model_validate(obj=comics, from_attributes=True)
 
 
+@router.post(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResult[ComicsDetail],
+    name="Массовое добавление комиксов"
+)
+async def bulk_add_comics(payload: List[Any] = Body(default=..., max_length=MAX_BULK_SIZE),
+                          session: AsyncSession = get_db_session):
+    """
+    Массовое добавление комиксов
+    :param payload:
+    :param session:
+    :return:
+    """
+    # Валидируем весь список одним адаптером, собирая ошибки по позициям записей
+    forms, errors = validate_bulk(form=ComicsAddForm, payload=payload)
+    # Добавляем все валидные комиксы одним запросом и одним коммитом
+    result = await bulk_create(session=session, model=Comics, detail=ComicsDetail, forms=forms, errors=errors)
+    # Сбрасываем из кэша возможные устаревшие записи с такими ID
+    for comics in result.items:
+        RESPONSE_CACHE.invalidate(model=Comics, obj_id=comics.id)
+    # Возвращаем добавленные комиксы и ошибки остальных записей
+    return result
+
+
+@router.patch(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResult[ComicsDetail],
+    name="Массовое обновление комиксов"
+)
+async def bulk_update_comics(payload: List[Any] = Body(default=..., max_length=MAX_BULK_SIZE),
+                             session: AsyncSession = get_db_session):
+    """
+    Массовое обновление комиксов
+    :param payload:
+    :param session:
+    :return:
+    """
+    # Валидируем весь список одним адаптером, собирая ошибки по позициям записей
+    forms, errors = validate_bulk(form=ComicsBulkUpdateForm, payload=payload)
+    # Обновляем все валидные комиксы одним запросом и одним коммитом
+    result = await bulk_update(session=session, model=Comics, detail=ComicsDetail, forms=forms, errors=errors)
+    # Сбрасываем из кэша устаревшие записи
+    for comics in result.items:
+        RESPONSE_CACHE.invalidate(model=Comics, obj_id=comics.id)
+    # Возвращаем обновлённые комиксы и ошибки остальных записей
+    return result
+
+
+@router.delete(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkDeleteResult,
+    name="Массовое удаление комиксов"
+)
+async def bulk_delete_comics(form: BulkDeleteForm, session: AsyncSession = get_db_session):
+    """
+    Массовое удаление комиксов
+    :param form:
+    :param session:
+    :return:
+    """
+    # Удаляем все комиксы одним запросом и одним коммитом
+    result = await bulk_delete(session=session, model=Comics, ids=form.ids)
+    # Сбрасываем из кэша удалённые записи
+    for comics_id in result.deleted:
+        RESPONSE_CACHE.invalidate(model=Comics, obj_id=comics_id)
+    # Возвращаем ID удалённых и ненайденных комиксов
+    return result
+
+
+@router.get(
+    path="/batch/",
+    status_code=status.HTTP_200_OK,
+    response_model=BatchResult[ComicsDetail],
+    name="Получение нескольких комиксов по ID или слагам"
+)
+async def get_batch_of_comics(keys: BatchKeys = get_batch_keys,
+                              fields: Optional[Tuple[str, ...]] = get_comics_fields,
+                              session: AsyncSession = get_read_session):
+    """
+    Получение нескольких комиксов одним запросом по списку ID или слагов
+    :param keys:
+    :param fields:
+    :param session:
+    :return:
+    """
+    # Достаём всех запрошенных комиксов одним запросом в порядке переданных ключей
+    all_comics, missing = await fetch_batch(session=session, model=Comics, keys=keys, fields=fields)
+    # Возвращаем найденных комиксов с выбранными полями и ключи ненайденных
+    return fields_batch(detail=ComicsDetail, rows=all_comics, missing=missing, fields=fields)
+
+
 @router.get(
     path="/{comics_id}/",
     status_code=status.HTTP_200_OK,
     response_model=ComicsDetail,
     name="Получение конкретный комикс"
 )
-async def get_comics(comics_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def get_comics(comics_id: PositiveInt = Path(default=..., ge=1), session: AsyncSession = get_cached_read_session):
     """
     Получение кокнретный комикс
     :param comics_id:
     :param session:
     :return:
     """
+    # Если ответ уже есть в кэше, отдаём его без обращения к БД
+    entry = RESPONSE_CACHE.get(model=Comics, obj_id=comics_id)
+    if entry is not None:
+        return cached_response(entry=entry)
+    # Запоминаем поколение кэша до запроса, чтобы не закэшировать строку, изменённую во время чтения
+    generation = RESPONSE_CACHE.generation()
     # Получение кокнретного комикса по его ID
-    comics = session.scalar(select(Comics).filter_by(id=comics_id))
+    comics = (await session.execute(select_fields(model=Comics).where(Comics.id == comics_id))).mappings().first()
     # Если комикс не найден
     if comics is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого комикса не существует")
-    # В другом случае возвращаем валидированные данные
-    return ComicsDetail.model_validate(obj=comics, from_attributes=True)
+    # В другом случае кэшируем и возвращаем строку, сериализованную без повторной валидации
+    content = row_serializer(detail=ComicsDetail)(comics)
+    entry = RESPONSE_CACHE.set(model=Comics, obj_id=comics_id, content=content, generation=generation)
+    return cached_response(entry=entry)
 
 
 @router.put(
@@ -95,7 +225,7 @@ async def get_comics(comics_id: PositiveInt = Path(default=..., ge=1), session:
     name="Обновление конкретного комикса"
 )
 async def update_comics(form: ComicsUpdateForm, comics_id: PositiveInt = Path(default=..., ge=1),
-                        session: Session = get_db_session):
+                        session: AsyncSession = get_db_session):
     """
     Обновление кокнретного комикса
     :param comics_id:
@@ -103,24 +233,50 @@ async def update_comics(form: ComicsUpdateForm, comics_id: PositiveInt = Path(de
     :param session:
     :return:
     """
-    # Получение кокнретного комикса по его ID
-    comics = session.scalar(select(Comics).filter_by(id=comics_id))
+    # Валидируем полученные данные
+    form_comics = ComicsDetail(id=comics_id, **form.model_dump())
+    # Обновляем запись одним запросом UPDATE ... RETURNING
+    comics = await update_returning(session=session, model=Comics, obj_id=comics_id,
+                                    values=form_comics.model_dump(exclude={"id"}))
     # Если комикс не найден
     if comics is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого комикса не существует")
-    # Валидируем полученные данные
-    form_comics = ComicsDetail(id=comics_id, **form.model_dump())
-    # Достаём ключи и их значения в провалидированных данных
-    for name, value in form_comics:
-        # Изменяем полученный по ID комикса
-        setattr(comics, name, value)
     # Сохраняем изменения в БД
-    session.commit()
-    # Дописываем ID, если это необходимо
-    session.refresh(comics)
+    await session.commit()
+    # Сбрасываем из кэша устаревшую запись
+    RESPONSE_CACHE.invalidate(model=Comics, obj_id=comics_id)
     # Возвращаем изменённый комикс в виде основной схемы представления комикса
-    return ComicsDetail.model_validate(obj=comics, from_attributes=True)
+    return ComicsDetail.model_validate(obj=comics)
+
+
+@router.patch(
+    path="/{comics_id}/",
+    status_code=status.HTTP_200_OK,
+    response_model=ComicsDetail,
+    name="Частичное обновление конкретного комикса"
+)
+async def patch_comics(form: ComicsPatchForm, comics_id: PositiveInt = Path(default=..., ge=1),
+                       session: AsyncSession = get_db_session):
+    """
+    Частичное обновление конкретного комикса
+    :param form:
+    :param comics_id:
+    :param session:
+    :return:
+    """
+    # Обновляем только переданные поля, слаг пересчитывается, только если меняются его поля
+    comics = await patch_returning(session=session, model=Comics, detail=ComicsDetail, obj_id=comics_id, form=form)
+    # Если комикс не найден
+    if comics is None:
+        # Выдаём ошибку
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого комикса не существует")
+    # Сохраняем изменения в БД
+    await session.commit()
+    # Сбрасываем из кэша устаревшую запись
+    RESPONSE_CACHE.invalidate(model=Comics, obj_id=comics_id)
+    # Возвращаем изменённый комикс в виде основной схемы представления комикса
+    return ComicsDetail.model_validate(obj=comics)
 
 
 @router.delete(
@@ -128,23 +284,23 @@ async def update_comics(form: ComicsUpdateForm, comics_id: PositiveInt = Path(de
     status_code=status.HTTP_200_OK,
     name="Удаление конкретного комикса"
 )
-async def delete_comics(comics_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def delete_comics(comics_id: PositiveInt = Path(default=..., ge=1), session: AsyncSession = get_db_session):
     """
     Удаление конкретного комикса
     :param comics_id:
     :param session:
     :return:
     """
-    # Получение кокнретного комикса по его ID
-    comics = session.scalar(select(Comics).filter_by(id=comics_id))
+    # Удаляем выбранный комикс одним запросом, дочерние записи удаляет БД каскадно по внешним ключам
+    deleted_id = await session.scalar(delete(Comics).where(Comics.id == comics_id).returning(Comics.id))
     # Если комикс не найден
-    if comics is None:
+    if deleted_id is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого комикса не существует")
-    # Удаляем выбранный комикс
-    session.delete(comics)
     # Сохраняем изменения в БД
-    session.commit()
+    await session.commit()
+    # Сбрасываем из кэша удалённую запись
+    RESPONSE_CACHE.invalidate(model=Comics, obj_id=comics_id)
     # Возвращаем сообщение об успешном удалении конкретного комикса
     return {"msg": "Done"}
 
@@ -156,21 +312,24 @@ async def delete_comics(comics_id: PositiveInt = Path(default=..., ge=1), sessio
     name="Получение списка авторов конкретного автора"
 )
 async def get_list_authors_of_comics(comics_id: PositiveInt = Path(default=..., ge=1),
-                                     session: Session = get_db_session):
+                                     session: AsyncSession = get_read_session):
     """
     Получение списка авторов конкретного автора
     :param comics_id:
     :param session:
     :return:
     """
-    # Получение кокнретного комикса по его ID
-    comics = session.scalar(select(Comics).filter_by(id=comics_id))
-    # Если комикс не найден
-    if comics is None:
+    # Достаём авторов конкретного комикса одним запросом через таблицу связей
+    authors = (await session.execute(
+        select_fields(model=Author).join(ComicsAuthors, ComicsAuthors.author_id == Author.id)
+        .where(ComicsAuthors.comics_id == comics_id).order_by(Author.id)
+    )).mappings().all()
+    # Если авторы не найдены и самого комикса не существует
+    if not authors and await session.scalar(select(Comics.id).filter_by(id=comics_id)) is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого комикса не существует")
-    # Возвращаем список авторов конкретного комикса
-    return [AuthorDetail.model_validate(obj=author, from_attributes=True) for author in comics.authors]
+    # Возвращаем список авторов конкретного комикса, сериализованных без повторной валидации
+    return fields_list(detail=AuthorDetail, rows=authors)
 
 
 @router.get(
@@ -180,18 +339,44 @@ async def get_list_authors_of_comics(comics_id: PositiveInt = Path(default=...,
     name="Получение списка персонажей конкретного комикса"
 )
 async def get_list_characters_of_comics(comics_id: PositiveInt = Path(default=..., ge=1),
-                                        session: Session = get_db_session):
+                                        session: AsyncSession = get_read_session):
     """
     Получение списка персонажей конкретного комикса
     :param comics_id:
     :param session:
     :return:
     """
-    # Получение кокнретного комикса по его ID
-    comics = session.scalar(select(Comics).filter_by(id=comics_id))
+    # Достаём персонажей конкретного комикса одним запросом через таблицу связей
+    characters = (await session.execute(
+        select_fields(model=Character).join(ComicsCharacters, ComicsCharacters.character_id == Character.id)
+        .where(ComicsCharacters.comics_id == comics_id).order_by(Character.id)
+    )).mappings().all()
+    # Если персонажи не найдены и самого комикса не существует
+    if not characters and await session.scalar(select(Comics.id).filter_by(id=comics_id)) is None:
+        # Выдаём ошибку
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого комикса не существует")
+    # Возвращаем список персонажей конкретного комикса, сериализованных без повторной валидации
+    return fields_list(detail=CharacterDetail, rows=characters)
+
+
+@router.get(
+    path="/{comics_id}/full/",
+    status_code=status.HTTP_200_OK,
+    response_model=ComicsFull,
+    name="Получение комикса с авторами и персонажами"
+)
+async def get_full_comics(comics_id: PositiveInt = Path(default=..., ge=1), session: AsyncSession = get_read_session):
+    """
+    Получение страницы комикса одним запросом: комикс, его авторы и персонажи
+    :param comics_id:
+    :param session:
+    :return:
+    """
+    # Собираем весь документ одним запросом в PostgreSQL и отдаём готовый JSON без разбора в Python
+    document = await fetch_document(session=session, document=COMICS_DOCUMENT, model=Comics, obj_id=comics_id)
     # Если комикс не найден
-    if comics is None:
+    if document is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого комикса не существует")
-    # Возвращаем список персонажей конкретного комикса
-    return [CharacterDetail.model_validate(obj=character, from_attributes=True) for character in comics.characters]
+    # В другом случае возвращаем документ комикса как есть
+    return Response(content=document, media_type="application/json")
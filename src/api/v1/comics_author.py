@@ -1,14 +1,21 @@
-from typing import List
-
 from fastapi import APIRouter, status, Path, HTTPException
 from pydantic import PositiveInt
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import ORJSONResponse
 
+from src.api.fields import fields_batch, fields_page, fields_row
+from src.database.batch import fetch_batch
+from src.database.fields import select_fields
 from src.database.models import Comics, Author, ComicsAuthors
-from src.dependencies import get_db_session
-from src.types.comics_author import ComicsAuthorsDetail, ComicsAuthorsAddForm, ComicsAuthorsUpdateForm
+from src.database.pagination import paginate
+from src.database.update import update_returning, patch_returning
+from src.dependencies import get_batch_ids, get_db_session, get_read_session, get_pagination
+from src.types.comics_author import (
+    ComicsAuthorsDetail, ComicsAuthorsAddForm, ComicsAuthorsUpdateForm, ComicsAuthorsPatchForm
+)
+from src.types.batch import BatchKeys, BatchResult
+from src.types.pagination import Page, Pagination
 
 router = APIRouter(
     prefix="/comics_authors",
@@ -20,20 +27,21 @@ router = APIRouter(
 @router.get(
     path="/",
     status_code=status.HTTP_200_OK,
-    response_model=List[ComicsAuthorsDetail],
+    response_model=Page[ComicsAuthorsDetail],
     name="Получение списка связей между комиксами и авторами"
 )
-async def get_comics_authors(session: Session = get_db_session):
+async def get_comics_authors(pagination: Pagination = get_pagination, session: AsyncSession = get_read_session):
     """
     Получение списка связей между комиксами и авторами
+    :param pagination:
     :param session:
     :return:
     """
-    # Получение списка всех связей между комиксами и авторами
-    comics_authors = session.scalars(select(ComicsAuthors).order_by(ComicsAuthors.id))
-    # Возвращаем список всех связей между комиксами и авторами
-    return [ComicsAuthorsDetail.model_validate(obj=comic_author, from_attributes=True) for comic_author in
-            comics_authors]
+    # Достаём страницу связей между комиксами и авторами, начиная после курсора
+    comics_authors, next_cursor = await paginate(session=session, statement=select_fields(model=ComicsAuthors),
+                                                 column=ComicsAuthors.id, pagination=pagination)
+    # Возвращаем страницу связей между комиксами и авторами с курсором следующей страницы
+    return fields_page(detail=ComicsAuthorsDetail, rows=comics_authors, next_cursor=next_cursor)
 
 
 @router.post(
@@ -42,7 +50,7 @@ async def get_comics_authors(session: Session = get_db_session):
     status_code=status.HTTP_200_OK,
     name="Добавление связи между комиксами и авторами"
 )
-async def add_new_comics_authors(form: ComicsAuthorsAddForm, session: Session = get_db_session):
+async def add_new_comics_authors(form: ComicsAuthorsAddForm, session: AsyncSession = get_db_session):
     """
     Добавление связи между комиксами и авторами
     :param form:
@@ -51,16 +59,35 @@ async def add_new_comics_authors(form: ComicsAuthorsAddForm, session: Session =
     """
     # Создаём новую связь, валидировав через основную схему представления связи между комиксами и авторами
     form_comics_author = ComicsAuthorsDetail(**form.model_dump())
-    # Затем создаём новый экземпляр модели на основе провалидированых данных
-    comics_author = ComicsAuthors(**form_comics_author.model_dump())
+    # Затем создаём новый экземпляр модели на основе провалидированых данных, ID выдаст последовательность таблицы
+    comics_author = ComicsAuthors(**form_comics_author.model_dump(exclude={"id"}))
     # Добавляем новую вселеную в БД
     session.add(comics_author)
     # Сохраняем изменения
-    session.commit()
+    await session.commit()
     # Возвращаем новую связь в виде основной схемы представления связи между кимксами и авторами
     return ComicsAuthorsDetail.model_validate(obj=comics_author, from_attributes=True)
 
 
+@router.get(
+    path="/batch/",
+    status_code=status.HTTP_200_OK,
+    response_model=BatchResult[ComicsAuthorsDetail],
+    name="Получение нескольких связей между комиксами и авторами по ID"
+)
+async def get_batch_of_comics_authors(keys: BatchKeys = get_batch_ids, session: AsyncSession = get_read_session):
+    """
+    Получение нескольких связей между комиксами и авторами одним запросом по списку ID
+    :param keys:
+    :param session:
+    :return:
+    """
+    # Слагов у связей нет, поэтому достаём все запрошенные связи по ID одним запросом в порядке переданных ID
+    comics_authors, missing = await fetch_batch(session=session, model=ComicsAuthors, keys=keys)
+    # Возвращаем найденные связи и ID ненайденных
+    return fields_batch(detail=ComicsAuthorsDetail, rows=comics_authors, missing=missing)
+
+
 @router.get(
     path="/{comics_authors_id}/",
     status_code=status.HTTP_200_OK,
@@ -68,7 +95,7 @@ async def add_new_comics_authors(form: ComicsAuthorsAddForm, session: Session =
     name="Получение конкретной связи между комиксами и авторами"
 )
 async def get_comics_author(comics_authors_id: PositiveInt = Path(default=..., ge=1),
-                            session: Session = get_db_session):
+                            session: AsyncSession = get_read_session):
     """
     Получение конкретной связи между комиксами и авторами
     :param comics_authors_id:
@@ -76,13 +103,15 @@ async def get_comics_author(comics_authors_id: PositiveInt = Path(default=..., g
     :return:
     """
     # Достаём конкретную связь между комиксами и авторами по её ID
-    comics_authors = session.scalar(select(ComicsAuthors).filter_by(id=comics_authors_id))
+    comics_authors = (await session.execute(
+        select_fields(model=ComicsAuthors).where(ComicsAuthors.id == comics_authors_id)
+    )).mappings().first()
     # Если связь не найден
     if comics_authors is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой связи не существует")
-    # В другом случае возвращаем валидированные данные
-    return ComicsAuthorsDetail.model_validate(obj=comics_authors, from_attributes=True)
+    # В другом случае возвращаем строку, сериализованную без повторной валидации
+    return fields_row(detail=ComicsAuthorsDetail, row=comics_authors)
 
 
 @router.put(
@@ -92,7 +121,7 @@ async def get_comics_author(comics_authors_id: PositiveInt = Path(default=..., g
     name="Обновление конкретной связи между комиксами и авторами"
 )
 async def update_comics_author(form: ComicsAuthorsUpdateForm, comics_authors_id: PositiveInt = Path(default=..., ge=1),
-                               session: Session = get_db_session):
+                               session: AsyncSession = get_db_session):
     """
     Обновление конкретной связи между комиксами и авторами
     :param form:
@@ -100,24 +129,47 @@ async def update_comics_author(form: ComicsAuthorsUpdateForm, comics_authors_id:
     :param session:
     :return:
     """
-    # Достаём конкретную связь между комиксами и авторами по её ID
-    comics_authors = session.scalar(select(ComicsAuthors).filter_by(id=comics_authors_id))
+    # Валидируем полученные данные
+    form_comics_authors = ComicsAuthorsDetail(id=comics_authors_id, **form.model_dump())
+    # Обновляем запись одним запросом UPDATE ... RETURNING
+    comics_authors = await update_returning(session=session, model=ComicsAuthors, obj_id=comics_authors_id,
+                                            values=form_comics_authors.model_dump(exclude={"id"}))
+    # Если связь не найдена
+    if comics_authors is None:
+        # Выдаём ошибку
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой связи не существует")
+    # Сохраняем изменения в БД
+    await session.commit()
+    # Возвращаем изменённую связь в виде основной схемы представления связи между комиксоми и автороми
+    return ComicsAuthorsDetail.model_validate(obj=comics_authors)
+
+
+@router.patch(
+    path="/{comics_authors_id}/",
+    status_code=status.HTTP_200_OK,
+    response_model=ComicsAuthorsDetail,
+    name="Частичное обновление конкретной связи между комиксами и авторами"
+)
+async def patch_comics_author(form: ComicsAuthorsPatchForm, comics_authors_id: PositiveInt = Path(default=..., ge=1),
+                              session: AsyncSession = get_db_session):
+    """
+    Частичное обновление конкретной связи между комиксами и авторами
+    :param form:
+    :param comics_authors_id:
+    :param session:
+    :return:
+    """
+    # Обновляем только переданные поля
+    comics_authors = await patch_returning(session=session, model=ComicsAuthors, detail=ComicsAuthorsDetail,
+                                           obj_id=comics_authors_id, form=form)
     # Если связь не найдена
     if comics_authors is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой связи не существует")
-    # Валидируем полученные данные
-    form_comics_authors = ComicsAuthorsDetail(id=comics_authors_id, **form.model_dump())
-    # Достаём ключи и их значения в провалидированных данных
-    for name, value in form_comics_authors:
-        # Изменяем полученую по ID связь
-        setattr(comics_authors, name, value)
     # Сохраняем изменения в БД
-    session.commit()
-    # Дописываем ID, если это необходимо
-    session.refresh(comics_authors)
+    await session.commit()
     # Возвращаем изменённую связь в виде основной схемы представления связи между комиксоми и автороми
-    return ComicsAuthorsDetail.model_validate(obj=comics_authors, from_attributes=True)
+    return ComicsAuthorsDetail.model_validate(obj=comics_authors)
 
 
 @router.delete(
@@ -126,22 +178,22 @@ async def update_comics_author(form: ComicsAuthorsUpdateForm, comics_authors_id:
     name="Удаление конкретной связи между комиксами и авторами"
 )
 async def delete_comics_authors(comics_authors_id: PositiveInt = Path(default=..., ge=1),
-                                session: Session = get_db_session):
+                                session: AsyncSession = get_db_session):
     """
     Удаление конкретной связи между комиксами и авторами
     :param comics_authors_id:
     :param session:
     :return:
     """
-    # Достаём конкретную связь между комиксами и авторами по её ID
-    comics_authors = session.scalar(select(ComicsAuthors).filter_by(id=comics_authors_id))
+    # Удаляем выбранную связь между комиксами и авторами одним запросом
+    deleted_id = await session.scalar(
+        delete(ComicsAuthors).where(ComicsAuthors.id == comics_authors_id).returning(ComicsAuthors.id)
+    )
     # Если связь не найден
-    if comics_authors is None:
+    if deleted_id is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой связи не существует")
-    # Удаляем выбранную связь между комиксами и авторами
-    session.delete(comics_authors)
     # Сохраняем изменения в БД
-    session.commit()
+    await session.commit()
     # Возвращаем сообщение об успешном удалении конкретной связи сежду комиксами и авторами
     return {"msg": "Done"}
\ No newline at end of file
@@ -1,13 +1,20 @@
-from typing import List
-
 from fastapi import APIRouter, status, Path, HTTPException
 from fastapi.responses import ORJSONResponse
 from pydantic import PositiveInt
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.dependencies import get_db_session
-from src.types.comics_character import ComicsCharacterDetail, ComicsCharacterUpdateForm, ComicsCharacterAddForm
+from src.api.fields import fields_batch, fields_page, fields_row
+from src.database.batch import fetch_batch
+from src.database.fields import select_fields
+from src.database.pagination import paginate
+from src.database.update import update_returning, patch_returning
+from src.dependencies import get_batch_ids, get_db_session, get_read_session, get_pagination
+from src.types.comics_character import (
+    ComicsCharacterDetail, ComicsCharacterUpdateForm, ComicsCharacterPatchForm, ComicsCharacterAddForm
+)
+from src.types.batch import BatchKeys, BatchResult
+from src.types.pagination import Page, Pagination
 from src.database.models import ComicsCharacters
 
 router = APIRouter(
@@ -20,29 +27,30 @@ router = APIRouter(
 @router.get(
     path="/",
     status_code=status.HTTP_200_OK,
-    response_model=List[ComicsCharacterDetail],
+    response_model=Page[ComicsCharacterDetail],
     name="Получение списка между комиксами и персонаами"
 )
-async def get_comics_characters(session: Session = get_db_session):
+async def get_comics_characters(pagination: Pagination = get_pagination, session: AsyncSession = get_read_session):
     """
     Получение списка между комиксами и персонаами
+    :param pagination:
     :param session:
     :return:
     """
-    # Получение списка всех связей между комиксами и персонажами
-    comics_characters = session.scalars(select(ComicsCharacters).order_by(ComicsCharacters.id))
-    # Возвращаем список всех связей между комиксами и персонажами
-    return [ComicsCharacterDetail.model_validate(obj=comic_character, from_attributes=True) for comic_character in
-            comics_characters]
+    # Достаём страницу связей между комиксами и персонажами, начиная после курсора
+    comics_characters, next_cursor = await paginate(session=session, statement=select_fields(model=ComicsCharacters),
+                                                    column=ComicsCharacters.id, pagination=pagination)
+    # Возвращаем страницу связей между комиксами и персонажами с курсором следующей страницы
+    return fields_page(detail=ComicsCharacterDetail, rows=comics_characters, next_cursor=next_cursor)
 
 
 @router.post(
     path="/",
     status_code=status.HTTP_201_CREATED,
-    response_model=ComicsCharacters,
+    response_model=ComicsCharacterDetail,
     name="Добавление новой связи между комиксами и персонажами"
 )
-async def add_new_comics_characters(form: ComicsCharacterAddForm, session: Session = get_db_session):
+async def add_new_comics_characters(form: ComicsCharacterAddForm, session: AsyncSession = get_db_session):
     """
     Добавление новой связи между комиксами и персонажами
     :param form:
@@ -51,18 +59,35 @@ async def add_new_comics_characters(form: ComicsCharacterAddForm, session: Sessi
     """
     #
     form_comics_characters = ComicsCharacterDetail(**form.model_dump())
-    #
-    comics_characters = ComicsCharacters(**form_comics_characters.model_dump())
+    # ID новой связи выдаёт последовательность таблицы
+    comics_characters = ComicsCharacters(**form_comics_characters.model_dump(exclude={"id"}))
     #
     session.add(comics_characters)
     #
-    session.commit()
-    #
-    session.refresh(comics_characters)
+    await session.commit()
     #
     return ComicsCharacterDetail.model_validate(obj=comics_characters, from_attributes=True)
 
 
+@router.get(
+    path="/batch/",
+    status_code=status.HTTP_200_OK,
+    response_model=BatchResult[ComicsCharacterDetail],
+    name="Получение нескольких связей между комиксами и персонажами по ID"
+)
+async def get_batch_of_comics_characters(keys: BatchKeys = get_batch_ids, session: AsyncSession = get_read_session):
+    """
+    Получение нескольких связей между комиксами и персонажами одним запросом по списку ID
+    :param keys:
+    :param session:
+    :return:
+    """
+    # Слагов у связей нет, поэтому достаём все запрошенные связи по ID одним запросом в порядке переданных ID
+    comics_characters, missing = await fetch_batch(session=session, model=ComicsCharacters, keys=keys)
+    # Возвращаем найденные связи и ID ненайденных
+    return fields_batch(detail=ComicsCharacterDetail, rows=comics_characters, missing=missing)
+
+
 @router.get(
     path="/{comics_character_id}/",
     status_code=status.HTTP_200_OK,
@@ -70,7 +95,7 @@ async def add_new_comics_characters(form: ComicsCharacterAddForm, session: Sessi
     name="Получение конкретной связи между комиксами и персонажами"
 )
 async def get_comics_character(comics_character_id: PositiveInt = Path(default=..., ge=1),
-                               session: Session = get_db_session):
+                               session: AsyncSession = get_read_session):
     """
     Получение конкретной связи между комиксами и персонажами
     :param comics_character_id:
@@ -78,13 +103,15 @@ async def get_comics_character(comics_character_id: PositiveInt = Path(default=.
     :return:
     """
     # Достаём конкретную связь между комиксами и персонажами по её ID
-    comics_character = session.scalar(select(ComicsCharacters).filter_by(id=comics_character_id))
+    comics_character = (await session.execute(
+        select_fields(model=ComicsCharacters).where(ComicsCharacters.id == comics_character_id)
+    )).mappings().first()
     # Если связь не найдена
     if comics_character is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой связи не существует")
-    # В другом случае возвращаем валидированные данные
-    return ComicsCharacterDetail.model_validate(obj=comics_character, from_attributes=True)
+    # В другом случае возвращаем строку, сериализованную без повторной валидации
+    return fields_row(detail=ComicsCharacterDetail, row=comics_character)
 
 
 @router.put(
@@ -95,7 +122,7 @@ async def get_comics_character(comics_character_id: PositiveInt = Path(default=.
 )
 async def update_comics_character(form: ComicsCharacterUpdateForm,
                                   comics_character_id: PositiveInt = Path(default=..., ge=1),
-                                  session: Session = get_db_session):
+                                  session: AsyncSession = get_db_session):
     """
     Обновление конкретной связи между комиксами и персонажами
     :param form:
@@ -103,24 +130,48 @@ async def update_comics_character(form: ComicsCharacterUpdateForm,
     :param session:
     :return:
     """
-    # Достаём конкретную связь между комиксами и персонажами по её ID
-    comics_character = session.scalar(select(ComicsCharacters).filter_by(id=comics_character_id))
+    # Валидируем полученные данные
+    form_comics_character = ComicsCharacterDetail(id=comics_character_id, **form.model_dump())
+    # Обновляем запись одним запросом UPDATE ... RETURNING
+    comics_character = await update_returning(session=session, model=ComicsCharacters, obj_id=comics_character_id,
+                                              values=form_comics_character.model_dump(exclude={"id"}))
     # Если связь не найдена
     if comics_character is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой связи не существует")
-    # Валидируем полученные данные
-    form_comics_character = ComicsCharacterDetail(id=comics_character_id, **form.model_dump())
-    # Достаём ключи и их значения в провалидированных данных
-    for name, value in form_comics_character:
-        # Изменяем полученую по ID связь
-        setattr(comics_character, name, value)
     # Сохраняем изменения в БД
-    session.commit()
-    # Дописываем ID, если это необходимо
-    session.refresh(comics_character)
+    await session.commit()
     # Возвращаем изменённую связь в виде основной схемы представления связи между комиксоми и персонажами
-    return ComicsCharacterDetail.model_validate(obj=comics_character, from_attributes=True)
+    return ComicsCharacterDetail.model_validate(obj=comics_character)
+
+
+@router.patch(
+    path="/{comics_character_id}/",
+    status_code=status.HTTP_200_OK,
+    response_model=ComicsCharacterDetail,
+    name="Частичное обновление конкретной связи между комиксами и персонажами"
+)
+async def patch_comics_character(form: ComicsCharacterPatchForm,
+                                 comics_character_id: PositiveInt = Path(default=..., ge=1),
+                                 session: AsyncSession = get_db_session):
+    """
+    Частичное обновление конкретной связи между комиксами и персонажами
+    :param form:
+    :param comics_character_id:
+    :param session:
+    :return:
+    """
+    # Обновляем только переданные поля
+    comics_character = await patch_returning(session=session, model=ComicsCharacters, detail=ComicsCharacterDetail,
+                                             obj_id=comics_character_id, form=form)
+    # Если связь не найдена
+    if comics_character is None:
+        # Выдаём ошибку
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой связи не существует")
+    # Сохраняем изменения в БД
+    await session.commit()
+    # Возвращаем изменённую связь в виде основной схемы представления связи между комиксоми и персонажами
+    return ComicsCharacterDetail.model_validate(obj=comics_character)
 
 
 @router.delete(
@@ -129,23 +180,23 @@ async def update_comics_character(form: ComicsCharacterUpdateForm,
     name="Обновление конкретной связи между комиксами и персонажами"
 )
 async def delete_comics_character(comics_character_id: PositiveInt = Path(default=..., ge=1),
-                                  session: Session = get_db_session):
+                                  session: AsyncSession = get_db_session):
     """
     Обновление конкретной связи между комиксами и персонажами
     :param comics_character_id:
     :param session:
     :return:
     """
-    # Достаём конкретную связь между комиксами и персонажами по её ID
-    comics_character = session.scalar(select(ComicsCharacters).filter_by(id=comics_character_id))
+    # Удаляем выбранную связь между комиксами и персонажами одним запросом
+    deleted_id = await session.scalar(
+        delete(ComicsCharacters).where(ComicsCharacters.id == comics_character_id).returning(ComicsCharacters.id)
+    )
     # Если связь не найдена
-    if comics_character is None:
+    if deleted_id is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой связи не существует")
-    # Удаляем выбранную связь между комиксами и персонажами
-    session.delete(comics_character)
     # Сохраняем изменения в БД
-    session.commit()
+    await session.commit()
     # Возвращаем сообщение об успешном удалении конкретной связи сежду комиксами и персонажами
     return {"msg": "Done"}
 
@@ -1,15 +1,34 @@
-from typing import List
+from typing import Any, List, Optional, Tuple
 
-from fastapi import APIRouter, status, Path, HTTPException
-from fastapi.responses import ORJSONResponse
+from fastapi import APIRouter, status, Path, HTTPException, Body, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import PositiveInt
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.models import Device
-from src.dependencies import get_db_session
+from src.api.fields import fields_batch, fields_page, fields_row
+from src.api.export import stream_export
+from src.cache import RESPONSE_CACHE, cached_response
+from src.database.models import Device, Character, Universe
+from src.database.bulk import bulk_create, bulk_update, bulk_delete
+from src.database.filters import apply_filters
+from src.database.batch import fetch_batch
+from src.database.fields import select_fields
+from src.database.pagination import paginate
+from src.database.update import update_returning, patch_returning
+from src.dependencies import (
+    get_batch_keys, get_db_session, get_read_session, get_cached_read_session, get_pagination, get_device_filters,
+    get_device_fields
+)
 from src.types import UniverseDetail, CharacterDetail
-from src.types.device import DeviceDetail, DeviceAddFrom, DeviceUpdateForm
+from src.types.device import (
+    DeviceDetail, DeviceAddFrom, DeviceUpdateForm, DevicePatchForm, DeviceBulkUpdateForm, DeviceFilter
+)
+from src.types.batch import BatchKeys, BatchResult
+from src.types.fields import row_serializer
+from src.types.pagination import Page, Pagination
+from src.types.bulk import MAX_BULK_SIZE, BulkResult, BulkDeleteForm, BulkDeleteResult, validate_bulk
+from src.types.export import ExportFormat
 
 # Роутер девайсов
 router = APIRouter(
@@ -22,19 +41,28 @@ router = APIRouter(
 @router.get(
     path="/",
     status_code=status.HTTP_200_OK,
-    response_model=List[DeviceDetail],
+    response_model=Page[DeviceDetail],
     name="Получение списка девайсов"
 )
-async def get_list_of_devices(session: Session = get_db_session):
+async def get_list_of_devices(filters: DeviceFilter = get_device_filters,
+                              fields: Optional[Tuple[str, ...]] = get_device_fields,
+                              pagination: Pagination = get_pagination,
+                              session: AsyncSession = get_read_session):
     """
     Получение списка девайсов
+    :param filters:
+    :param fields:
+    :param pagination:
     :param session:
     :return:
     """
-    # Достаём все девайсы
-    devices = session.scalars(select(Device).order_by(Device.id))
-    # Возвращаем список всех девайсов
-    return [DeviceDetail.model_validate(obj=device, from_attributes=True) for device in devices]
+    # Отбираем девайсы по фильтрам и достаём страницу в порядке сортировки, начиная после курсора
+    statement = select_fields(model=Device, fields=fields, sort=filters.sort)
+    statement = apply_filters(statement=statement, model=Device, filters=filters)
+    devices, next_cursor = await paginate(session=session, statement=statement, column=Device.id,
+                                          pagination=pagination, sort=filters.sort)
+    # Возвращаем страницу девайсов с выбранными полями и курсором следующей страницы
+    return fields_page(detail=DeviceDetail, rows=devices, next_cursor=next_cursor, fields=fields)
 
 
 @router.post(
@@ -43,7 +71,7 @@ async def get_list_of_devices(session: Session = get_db_session):
     response_model=DeviceDetail,
     name="Добавление нового девайса"
 )
-async def add_new_device(form: DeviceAddFrom, session: Session = get_db_session):
+async def add_new_device(form: DeviceAddFrom, session: AsyncSession = get_db_session):
     """
     Добавление нового девайса
     :param form:
@@ -57,34 +85,153 @@ async def add_new_device(form: DeviceAddFrom, session: Session = get_db_session)
     # Добавляем новый девайс в БД
     session.add(device)
     # Сохраняем изменения в БД
-    session.commit()
-    # Дописываем ID, если это необходимо
-    session.refresh(device)
+    await session.commit()
+    # Сбрасываем из кэша возможную устаревшую запись с таким ID
+    RESPONSE_CACHE.invalidate(model=Device, obj_id=device.id)
     # Возвращаем новый девайс в виде основной схемы представления девайса
     return DeviceDetail.model_validate(obj=device, from_attributes=True)
 
 
+@router.get(
+    path="/export/",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    name="Выгрузка всех девайсов"
+)
+async def export_devices(export_format: ExportFormat = Query(default=ExportFormat.NDJSON, alias="format",
+                                                             title="Формат выгрузки")):
+    """
+    Потоковая выгрузка всех девайсов в NDJSON или CSV
+    :param export_format:
+    :return:
+    """
+    # Отдаём все девайсы пачками по мере чтения из БД
+    return stream_export(model=Device, detail=DeviceDetail, export_format=export_format)
+
+
+@router.post(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResult[DeviceDetail],
+    name="Массовое добавление девайсов"
+)
+async def bulk_add_devices(payload: List[Any] = Body(default=..., max_length=MAX_BULK_SIZE),
+                           session: AsyncSession = get_db_session):
+    """
+    Массовое добавление девайсов
+    :param payload:
+    :param session:
+    :return:
+    """
+    # Валидируем весь список одним адаптером, собирая ошибки по позициям записей
+    forms, errors = validate_bulk(form=DeviceAddFrom, payload=payload)
+    # Добавляем все валидные девайсы одним запросом и одним коммитом
+    result = await bulk_create(session=session, model=Device, detail=DeviceDetail, forms=forms, errors=errors)
+    # Сбрасываем из кэша возможные устаревшие записи с такими ID
+    for device in result.items:
+        RESPONSE_CACHE.invalidate(model=Device, obj_id=device.id)
+    # Возвращаем добавленные девайсы и ошибки остальных записей
+    return result
+
+
+@router.patch(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResult[DeviceDetail],
+    name="Массовое обновление девайсов"
+)
+async def bulk_update_devices(payload: List[Any] = Body(default=..., max_length=MAX_BULK_SIZE),
+                              session: AsyncSession = get_db_session):
+    """
+    Массовое обновление девайсов
+    :param payload:
+    :param session:
+    :return:
+    """
+    # Валидируем весь список одним адаптером, собирая ошибки по позициям записей
+    forms, errors = validate_bulk(form=DeviceBulkUpdateForm, payload=payload)
+    # Обновляем все валидные девайсы одним запросом и одним коммитом
+    result = await bulk_update(session=session, model=Device, detail=DeviceDetail, forms=forms, errors=errors)
+    # Сбрасываем из кэша устаревшие записи
+    for device in result.items:
+        RESPONSE_CACHE.invalidate(model=Device, obj_id=device.id)
+    # Возвращаем обновлённые девайсы и ошибки остальных записей
+    return result
+
+
+@router.delete(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkDeleteResult,
+    name="Массовое удаление девайсов"
+)
+async def bulk_delete_devices(form: BulkDeleteForm, session: AsyncSession = get_db_session):
+    """
+    Массовое удаление девайсов
+    :param form:
+    :param session:
+    :return:
+    """
+    # Удаляем все девайсы одним запросом и одним коммитом
+    result = await bulk_delete(session=session, model=Device, ids=form.ids)
+    # Сбрасываем из кэша удалённые записи
+    for device_id in result.deleted:
+        RESPONSE_CACHE.invalidate(model=Device, obj_id=device_id)
+    # Возвращаем ID удалённых и ненайденных девайсов
+    return result
+
+
+@router.get(
+    path="/batch/",
+    status_code=status.HTTP_200_OK,
+    response_model=BatchResult[DeviceDetail],
+    name="Получение нескольких девайсов по ID или слагам"
+)
+async def get_batch_of_devices(keys: BatchKeys = get_batch_keys,
+                               fields: Optional[Tuple[str, ...]] = get_device_fields,
+                               session: AsyncSession = get_read_session):
+    """
+    Получение нескольких девайсов одним запросом по списку ID или слагов
+    :param keys:
+    :param fields:
+    :param session:
+    :return:
+    """
+    # Достаём всех запрошенных девайсов одним запросом в порядке переданных ключей
+    devices, missing = await fetch_batch(session=session, model=Device, keys=keys, fields=fields)
+    # Возвращаем найденных девайсов с выбранными полями и ключи ненайденных
+    return fields_batch(detail=DeviceDetail, rows=devices, missing=missing, fields=fields)
+
+
 @router.get(
     path="/{device_id}/",
     status_code=status.HTTP_200_OK,
     response_model=DeviceDetail,
     name="Получение конкретного девайса"
 )
-async def get_device(device_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def get_device(device_id: PositiveInt = Path(default=..., ge=1), session: AsyncSession = get_cached_read_session):
     """
     Получение конкретного девайса
     :param device_id:
     :param session:
     :return:
     """
+    # Если ответ уже есть в кэше, отдаём его без обращения к БД
+    entry = RESPONSE_CACHE.get(model=Device, obj_id=device_id)
+    if entry is not None:
+        return cached_response(entry=entry)
+    # Запоминаем поколение кэша до запроса, чтобы не закэшировать строку, изменённую во время чтения
+    generation = RESPONSE_CACHE.generation()
     # Достаём кокнертный девайс по его ID
-    device = session.scalar(select(Device).filter_by(id=device_id))
+    device = (await session.execute(select_fields(model=Device).where(Device.id == device_id))).mappings().first()
     # Если девайс не найден
     if device is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого девайса не существует")
-    # В другом случае возвращаем валидированные данные
-    return DeviceDetail.model_validate(obj=device, from_attributes=True)
+    # В другом случае кэшируем и возвращаем строку, сериализованную без повторной валидации
+    content = row_serializer(detail=DeviceDetail)(device)
+    entry = RESPONSE_CACHE.set(model=Device, obj_id=device_id, content=content, generation=generation)
+    return cached_response(entry=entry)
 
 
 @router.put(
@@ -94,7 +241,7 @@ async def get_device(device_id: PositiveInt = Path(default=..., ge=1), session:
     name="Обновление конкретного девайса"
 )
 async def update_device(form: DeviceUpdateForm, device_id: PositiveInt = Path(default=..., ge=1),
-                        session: Session = get_db_session):
+                        session: AsyncSession = get_db_session):
     """
     Обновление конкретного девайса
     :param form:
@@ -102,24 +249,50 @@ async def update_device(form: DeviceUpdateForm, device_id: PositiveInt = Path(de
     :param session:
     :return:
     """
-    # Достаём кокнертный девайс по его ID
-    device = session.scalar(select(Device).filter_by(id=device_id))
+    # Валидируем полученные данные
+    form_device = DeviceDetail(id=device_id, **form.model_dump())
+    # Обновляем запись одним запросом UPDATE ... RETURNING
+    device = await update_returning(session=session, model=Device, obj_id=device_id,
+                                    values=form_device.model_dump(exclude={"id"}))
     # Если девайс не найден
     if device is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого девайса не существует")
-    # Валидируем полученные данные
-    form_device = DeviceDetail(id=device_id, **form.model_dump())
-    # Достаём ключи и их значения в провалидированных данных
-    for name, value in form_device:
-        # Изменяем полученный по ID девайс
-        setattr(device, name, value)
     # Сохраняем изменения в БД
-    session.commit()
-    # Дописываем ID, если это необходимо
-    session.refresh(device)
+    await session.commit()
+    # Сбрасываем из кэша устаревшую запись
+    RESPONSE_CACHE.invalidate(model=Device, obj_id=device_id)
     # Возвращаем изменённый девайс в виде основной схемы представления девайса
-    return DeviceDetail.model_validate(obj=device, from_attributes=True)
+    return DeviceDetail.model_validate(obj=device)
+
+
+@router.patch(
+    path="/{device_id}/",
+    status_code=status.HTTP_200_OK,
+    response_model=DeviceDetail,
+    name="Частичное обновление конкретного девайса"
+)
+async def patch_device(form: DevicePatchForm, device_id: PositiveInt = Path(default=..., ge=1),
+                       session: AsyncSession = get_db_session):
+    """
+    Частичное обновление конкретного девайса
+    :param form:
+    :param device_id:
+    :param session:
+    :return:
+    """
+    # Обновляем только переданные поля, слаг пересчитывается, только если меняются его поля
+    device = await patch_returning(session=session, model=Device, detail=DeviceDetail, obj_id=device_id, form=form)
+    # Если девайс не найден
+    if device is None:
+        # Выдаём ошибку
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого девайса не существует")
+    # Сохраняем изменения в БД
+    await session.commit()
+    # Сбрасываем из кэша устаревшую запись
+    RESPONSE_CACHE.invalidate(model=Device, obj_id=device_id)
+    # Возвращаем изменённый девайс в виде основной схемы представления девайса
+    return DeviceDetail.model_validate(obj=device)
 
 
 @router.delete(
@@ -127,23 +300,23 @@ async def update_device(form: DeviceUpdateForm, device_id: PositiveInt = Path(de
     status_code=status.HTTP_200_OK,
     name="Удаление конкретного девайса"
 )
-async def delete_device(device_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def delete_device(device_id: PositiveInt = Path(default=..., ge=1), session: AsyncSession = get_db_session):
     """
     Удаление конкретного девайса
     :param device_id:
     :param session:
     :return:
     """
-    # Достаём кокнертный девайс по его ID
-    device = session.scalar(select(Device).filter_by(id=device_id))
+    # Удаляем выбранный девайс одним запросом, дочерние записи удаляет БД каскадно по внешним ключам
+    deleted_id = await session.scalar(delete(Device).where(Device.id == device_id).returning(Device.id))
     # Если девайс не найден
-    if device is None:
+    if deleted_id is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого девайса не существует")
-    # Удаляем выбранный девайс
-    session.delete(device)
     # Сохраняем изменения в БД
-    session.commit()
+    await session.commit()
+    # Сбрасываем из кэша удалённую запись
+    RESPONSE_CACHE.invalidate(model=Device, obj_id=device_id)
     # Возвращаем сообщение об успешном удалении конкретного девайса
     return {"msg": "Done"}
 
@@ -154,21 +327,24 @@ async def delete_device(device_id: PositiveInt = Path(default=..., ge=1), sessio
     response_model=UniverseDetail,
     name="Получение вселенной конкретного девайса"
 )
-async def get_universe_of_device(device_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def get_universe_of_device(device_id: PositiveInt = Path(default=..., ge=1),
+                                 session: AsyncSession = get_read_session):
     """
     Получение вселенной конкретного девайса
     :param device_id:
     :param session:
     :return:
     """
-    # Достаём кокнертный девайс по его ID
-    device = session.scalar(select(Device).filter_by(id=device_id))
+    # Достаём вселенную конкретного девайса по скопированному в товар ID вселенной, без соединения с персонажем
+    universe = (await session.execute(
+        select_fields(model=Universe).join(Device, Device.universe_id == Universe.id).where(Device.id == device_id)
+    )).mappings().first()
     # Если девайс не найден
-    if device is None:
+    if universe is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого девайса не существует")
-    # Возвращаем конкретную вселенную, к которой относиться конкретный девайс
-    return UniverseDetail.model_validate(obj=device.character.universe, from_attributes=True)
+    # Возвращаем конкретную вселенную, к которой относится товар, сериализованную без повторной валидации
+    return fields_row(detail=UniverseDetail, row=universe)
 
 
 @router.get(
@@ -177,18 +353,21 @@ async def get_universe_of_device(device_id: PositiveInt = Path(default=..., ge=1
     response_model=CharacterDetail,
     name="Получение персонажа конкретного девайса"
 )
-async def get_character_of_device(device_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def get_character_of_device(device_id: PositiveInt = Path(default=..., ge=1),
+                                  session: AsyncSession = get_read_session):
     """
     Получение персонажа конкретного девайса
     :param device_id:
     :param session:
     :return:
     """
-    # Достаём кокнертный девайс по его ID
-    device = session.scalar(select(Device).filter_by(id=device_id))
+    # Достаём персонажа конкретного девайса одним запросом
+    character = (await session.execute(
+        select_fields(model=Character).join(Device, Device.character_id == Character.id).where(Device.id == device_id)
+    )).mappings().first()
     # Если девайс не найден
-    if device is None:
+    if character is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такого девайса не существует")
-    # Возвращаем конкретного персонажа, к которому относиться конкретный девайс
-    return CharacterDetail.model_validate(obj=device.character, from_attributes=True)
+    # Возвращаем конкретного персонажа, к которому относится товар, сериализованного без повторной валидации
+    return fields_row(detail=CharacterDetail, row=character)
@@ -4,10 +4,13 @@ from .universe import router as universe_router
 from .author import router as author_router
 from .comics import router as comics_router
 from .comics_author import router as comics_author_router
+from .comics_character import router as comics_character_router
 from .character import router as character_router
 from .device import router as device_router
 from .sweet import router as sweet_router
 from .toy import router as toy_router
+from .search import router as search_router
+from .stats import router as stats_router
 
 # Роутер, отвечающий за ветку API версии №1
 router = APIRouter(
@@ -23,6 +26,8 @@ router.include_router(router=author_router)
 router.include_router(router=comics_router)
 # Подключаем роутер связи моделей Комикса и Автора к роутеру V1
 router.include_router(router=comics_author_router)
+# Подключаем роутер связи моделей Комикса и Персонажа к роутеру V1
+router.include_router(router=comics_character_router)
 # Подключаем роутер персонажа к роутеру V1
 router.include_router(router=character_router)
 # Подключаем роутер девайса к роутеру V1
@@ -30,4 +35,8 @@ router.include_router(router=device_router)
 # Подклочаем роутер сладостей к роутеру V1
 router.include_router(router=sweet_router)
 # Подключаем роутер игрушек к роутеру V1
-router.include_router(router=toy_router)
\ No newline at end of file
+router.include_router(router=toy_router)
+# Подключаем роутер поиска по каталогу к роутеру V1
+router.include_router(router=search_router)
+# Подключаем роутер статистики каталога к роутеру V1
+router.include_router(router=stats_router)
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, status, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.search import search_catalog
+from src.dependencies import get_read_session, get_pagination
+from src.types.pagination import Page, Pagination
+from src.types.search import SearchHit, MIN_QUERY_LENGTH, MAX_QUERY_LENGTH
+
+# Роутер поиска по каталогу
+router = APIRouter(
+    prefix="/search",
+    tags=["Поиск по каталогу"],
+    default_response_class=ORJSONResponse
+)
+
+
+@router.get(
+    path="/",
+    status_code=status.HTTP_200_OK,
+    response_model=Page[SearchHit],
+    name="Поиск по каталогу"
+)
+async def search(q: str = Query(default=..., min_length=MIN_QUERY_LENGTH, max_length=MAX_QUERY_LENGTH,
+                                title="Поисковый запрос", description="Название или его часть, допускаются опечатки"),
+                 pagination: Pagination = get_pagination, session: AsyncSession = get_read_session):
+    """
+    Поиск персонажей, комиксов, девайсов, сладостей и игрушек по названию, от самых релевантных
+    :param q:
+    :param pagination:
+    :param session:
+    :return:
+    """
+    # Достаём страницу найденных записей, начиная после курсора
+    hits, next_cursor = await search_catalog(session=session, text=q, pagination=pagination)
+    # Возвращаем страницу найденных записей с курсором следующей страницы
+    return Page[SearchHit](
+        items=[SearchHit.model_validate(obj=hit) for hit in hits],
+        next_cursor=next_cursor
+    )
@@ -0,0 +1,127 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, status, Query
+from fastapi.responses import ORJSONResponse
+from pydantic import PositiveInt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.stats import stats_source, paginate_stats
+from src.dependencies import get_read_session, get_pagination
+from src.types.pagination import Page, Pagination
+from src.types.stats import UniverseStats, CharacterStats, ProductTypeStats, AuthorStats, ComicsStats
+
+# Роутер статистики каталога. Все агрегаты считаются в БД одним запросом
+router = APIRouter(
+    prefix="/stats",
+    tags=["Статистика каталога"],
+    default_response_class=ORJSONResponse
+)
+
+
+@router.get(
+    path="/universes/",
+    status_code=status.HTTP_200_OK,
+    response_model=List[UniverseStats],
+    name="Статистика товаров по вселенным"
+)
+async def get_universe_stats(session: AsyncSession = get_read_session):
+    """
+    Количество и цены товаров каждой вселенной, последней строкой - итог по всему каталогу
+    :param session:
+    :return:
+    """
+    source = stats_source(name="stats_universe")
+    # Итоговая строка с пустой вселенной оказывается в конце: NULL при сортировке по возрастанию идёт последним
+    rows = (await session.execute(select(source).order_by(source.c.universe_id))).mappings()
+    return [UniverseStats.model_validate(obj=row) for row in rows]
+
+
+@router.get(
+    path="/characters/",
+    status_code=status.HTTP_200_OK,
+    response_model=Page[CharacterStats],
+    name="Статистика товаров по персонажам"
+)
+async def get_character_stats(universe_id: Optional[PositiveInt] = Query(default=None, title="Вселенная",
+                                                                         description="Только персонажи вселенной"),
+                              pagination: Pagination = get_pagination, session: AsyncSession = get_read_session):
+    """
+    Количество и цены товаров каждого персонажа, у которого есть товары
+    :param universe_id:
+    :param pagination:
+    :param session:
+    :return:
+    """
+    source = stats_source(name="stats_character")
+    statement = select(source)
+    # Если нужны персонажи только одной вселенной
+    if universe_id is not None:
+        statement = statement.where(source.c.universe_id == universe_id)
+    # Достаём страницу статистики, начиная после курсора
+    rows, next_cursor = await paginate_stats(session=session, statement=statement, key=source.c.character_id,
+                                             pagination=pagination)
+    # Возвращаем страницу статистики с курсором следующей страницы
+    return Page[CharacterStats](
+        items=[CharacterStats.model_validate(obj=row) for row in rows],
+        next_cursor=next_cursor
+    )
+
+
+@router.get(
+    path="/product-types/",
+    status_code=status.HTTP_200_OK,
+    response_model=List[ProductTypeStats],
+    name="Статистика товаров по видам и типам"
+)
+async def get_product_type_stats(session: AsyncSession = get_read_session):
+    """
+    Количество и цены товаров каждого вида и типа с итогами по виду и по всему каталогу
+    :param session:
+    :return:
+    """
+    source = stats_source(name="stats_product_type")
+    # Итоги идут после строк, которые они суммируют
+    rows = (await session.execute(select(source).order_by(source.c.kind, source.c.type))).mappings()
+    return [ProductTypeStats.model_validate(obj=row) for row in rows]
+
+
+@router.get(
+    path="/authors/",
+    status_code=status.HTTP_200_OK,
+    response_model=Page[AuthorStats],
+    name="Статистика персонажей по авторам"
+)
+async def get_author_stats(pagination: Pagination = get_pagination, session: AsyncSession = get_read_session):
+    """
+    Количество персонажей каждого автора
+    :param pagination:
+    :param session:
+    :return:
+    """
+    source = stats_source(name="stats_author")
+    # Достаём страницу статистики, начиная после курсора
+    rows, next_cursor = await paginate_stats(session=session, statement=select(source), key=source.c.author_id,
+                                             pagination=pagination)
+    # Возвращаем страницу статистики с курсором следующей страницы
+    return Page[AuthorStats](
+        items=[AuthorStats.model_validate(obj=row) for row in rows],
+        next_cursor=next_cursor
+    )
+
+
+@router.get(
+    path="/comics/",
+    status_code=status.HTTP_200_OK,
+    response_model=List[ComicsStats],
+    name="Статистика комиксов по странам"
+)
+async def get_comics_stats(session: AsyncSession = get_read_session):
+    """
+    Количество и цены комиксов каждой страны выпуска, последней строкой - итог по всем странам
+    :param session:
+    :return:
+    """
+    source = stats_source(name="stats_comics")
+    rows = (await session.execute(select(source).order_by(source.c.country))).mappings()
+    return [ComicsStats.model_validate(obj=row) for row in rows]
@@ -1,16 +1,33 @@
-from typing import List
+from typing import Any, List, Optional, Tuple
 
-from fastapi import APIRouter, status, Path, HTTPException
-from fastapi.responses import ORJSONResponse
+from fastapi import APIRouter, status, Path, HTTPException, Body, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import PositiveInt
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.models import Sweet
-from src.dependencies import get_db_session
+from src.api.fields import fields_batch, fields_page, fields_row
+from src.api.export import stream_export
+from src.cache import RESPONSE_CACHE, cached_response
+from src.database.models import Sweet, Character, Universe
+from src.database.bulk import bulk_create, bulk_update, bulk_delete
+from src.database.filters import apply_filters
+from src.database.batch import fetch_batch
+from src.database.fields import select_fields
+from src.database.pagination import paginate
+from src.database.update import update_returning, patch_returning
+from src.dependencies import (
+    get_batch_keys, get_db_session, get_read_session, get_cached_read_session, get_pagination, get_sweet_filters,
+    get_sweet_fields
+)
 from src.types import UniverseDetail
-from src.types.sweet import SweetDetail, SweetAddForm, SweetUpdateForm
+from src.types.sweet import SweetDetail, SweetAddForm, SweetUpdateForm, SweetPatchForm, SweetBulkUpdateForm, SweetFilter
 from src.types.character import CharacterDetail
+from src.types.batch import BatchKeys, BatchResult
+from src.types.fields import row_serializer
+from src.types.pagination import Page, Pagination
+from src.types.bulk import MAX_BULK_SIZE, BulkResult, BulkDeleteForm, BulkDeleteResult, validate_bulk
+from src.types.export import ExportFormat
 
 # Роутер сладостей
 router = APIRouter(
@@ -23,19 +40,28 @@ router = APIRouter(
 @router.get(
     path="/",
     status_code=status.HTTP_200_OK,
-    response_model=List[SweetDetail],
+    response_model=Page[SweetDetail],
     name="Получение списка сладостей"
 )
-async def get_list_of_sweets(session: Session = get_db_session):
+async def get_list_of_sweets(filters: SweetFilter = get_sweet_filters,
+                             fields: Optional[Tuple[str, ...]] = get_sweet_fields,
+                             pagination: Pagination = get_pagination,
+                             session: AsyncSession = get_read_session):
     """
     Получение списка сладостей
+    :param filters:
+    :param fields:
+    :param pagination:
     :param session:
     :return:
     """
-    # Достаём все сладости
-    sweets = session.scalars(select(Sweet).order_by(Sweet.id))
-    # Возвращаем список всех сладостей
-    return [CharacterDetail.model_validate(obj=sweet, from_attributes=True) for sweet in sweets]
+    # Отбираем сладости по фильтрам и достаём страницу в порядке сортировки, начиная после курсора
+    statement = select_fields(model=Sweet, fields=fields, sort=filters.sort)
+    statement = apply_filters(statement=statement, model=Sweet, filters=filters)
+    sweets, next_cursor = await paginate(session=session, statement=statement, column=Sweet.id,
+                                         pagination=pagination, sort=filters.sort)
+    # Возвращаем страницу сладостей с выбранными полями и курсором следующей страницы
+    return fields_page(detail=SweetDetail, rows=sweets, next_cursor=next_cursor, fields=fields)
 
 
 @router.post(
@@ -44,7 +70,7 @@ async def get_list_of_sweets(session: Session = get_db_session):
     response_model=SweetDetail,
     name="Добавление новой сладости"
 )
-async def add_new_sweet(form: SweetAddForm, session: Session = get_db_session):
+async def add_new_sweet(form: SweetAddForm, session: AsyncSession = get_db_session):
     """
     Добавление новой сладости
     :param form:
@@ -58,34 +84,153 @@ async def add_new_sweet(form: SweetAddForm, session: Session = get_db_session):
     # Добавляем новой сладости в БД
     session.add(sweet)
     # Сохраняем изменения в БД
-    session.commit()
-    # Дописываем id, если это не обходимо
-    session.refresh(sweet)
+    await session.commit()
+    # Сбрасываем из кэша возможную устаревшую запись с таким ID
+    RESPONSE_CACHE.invalidate(model=Sweet, obj_id=sweet.id)
     # Возвращаем новую сладость в виде основной схемы представления сладости
     return SweetDetail.model_validate(obj=sweet, from_attributes=True)
 
 
+@router.get(
+    path="/export/",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    name="Выгрузка всех сладостей"
+)
+async def export_sweets(export_format: ExportFormat = Query(default=ExportFormat.NDJSON, alias="format",
+                                                            title="Формат выгрузки")):
+    """
+    Потоковая выгрузка всех сладостей в NDJSON или CSV
+    :param export_format:
+    :return:
+    """
+    # Отдаём все сладости пачками по мере чтения из БД
+    return stream_export(model=Sweet, detail=SweetDetail, export_format=export_format)
+
+
+@router.post(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResult[SweetDetail],
+    name="Массовое добавление сладостей"
+)
+async def bulk_add_sweets(payload: List[Any] = Body(default=..., max_length=MAX_BULK_SIZE),
+                          session: AsyncSession = get_db_session):
+    """
+    Массовое добавление сладостей
+    :param payload:
+    :param session:
+    :return:
+    """
+    # Валидируем весь список одним адаптером, собирая ошибки по позициям записей
+    forms, errors = validate_bulk(form=SweetAddForm, payload=payload)
+    # Добавляем все валидные сладости одним запросом и одним коммитом
+    result = await bulk_create(session=session, model=Sweet, detail=SweetDetail, forms=forms, errors=errors)
+    # Сбрасываем из кэша возможные устаревшие записи с такими ID
+    for sweet in result.items:
+        RESPONSE_CACHE.invalidate(model=Sweet, obj_id=sweet.id)
+    # Возвращаем добавленные сладости и ошибки остальных записей
+    return result
+
+
+@router.patch(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResult[SweetDetail],
+    name="Массовое обновление сладостей"
+)
+async def bulk_update_sweets(payload: List[Any] = Body(default=..., max_length=MAX_BULK_SIZE),
+                             session: AsyncSession = get_db_session):
+    """
+    Массовое обновление сладостей
+    :param payload:
+    :param session:
+    :return:
+    """
+    # Валидируем весь список одним адаптером, собирая ошибки по позициям записей
+    forms, errors = validate_bulk(form=SweetBulkUpdateForm, payload=payload)
+    # Обновляем все валидные сладости одним запросом и одним коммитом
+    result = await bulk_update(session=session, model=Sweet, detail=SweetDetail, forms=forms, errors=errors)
+    # Сбрасываем из кэша устаревшие записи
+    for sweet in result.items:
+        RESPONSE_CACHE.invalidate(model=Sweet, obj_id=sweet.id)
+    # Возвращаем обновлённые сладости и ошибки остальных записей
+    return result
+
+
+@router.delete(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkDeleteResult,
+    name="Массовое удаление сладостей"
+)
+async def bulk_delete_sweets(form: BulkDeleteForm, session: AsyncSession = get_db_session):
+    """
+    Массовое удаление сладостей
+    :param form:
+    :param session:
+    :return:
+    """
+    # Удаляем все сладости одним запросом и одним коммитом
+    result = await bulk_delete(session=session, model=Sweet, ids=form.ids)
+    # Сбрасываем из кэша удалённые записи
+    for sweet_id in result.deleted:
+        RESPONSE_CACHE.invalidate(model=Sweet, obj_id=sweet_id)
+    # Возвращаем ID удалённых и ненайденных сладостей
+    return result
+
+
+@router.get(
+    path="/batch/",
+    status_code=status.HTTP_200_OK,
+    response_model=BatchResult[SweetDetail],
+    name="Получение нескольких сладостей по ID или слагам"
+)
+async def get_batch_of_sweets(keys: BatchKeys = get_batch_keys,
+                              fields: Optional[Tuple[str, ...]] = get_sweet_fields,
+                              session: AsyncSession = get_read_session):
+    """
+    Получение нескольких сладостей одним запросом по списку ID или слагов
+    :param keys:
+    :param fields:
+    :param session:
+    :return:
+    """
+    # Достаём всех запрошенных сладостей одним запросом в порядке переданных ключей
+    sweets, missing = await fetch_batch(session=session, model=Sweet, keys=keys, fields=fields)
+    # Возвращаем найденных сладостей с выбранными полями и ключи ненайденных
+    return fields_batch(detail=SweetDetail, rows=sweets, missing=missing, fields=fields)
+
+
 @router.get(
     path="/{sweet_id}/",
     status_code=status.HTTP_200_OK,
     response_model=SweetDetail,
     name="Получение конкретной сладости"
 )
-async def get_sweet(sweet_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def get_sweet(sweet_id: PositiveInt = Path(default=..., ge=1), session: AsyncSession = get_cached_read_session):
     """
     Получение конкретной сладости
     :param sweet_id:
     :param session:
     :return:
     """
+    # Если ответ уже есть в кэше, отдаём его без обращения к БД
+    entry = RESPONSE_CACHE.get(model=Sweet, obj_id=sweet_id)
+    if entry is not None:
+        return cached_response(entry=entry)
+    # Запоминаем поколение кэша до запроса, чтобы не закэшировать строку, изменённую во время чтения
+    generation = RESPONSE_CACHE.generation()
     # Достаём конкретную сладость по его ID
-    sweet = session.scalar(select(Sweet).filter_by(id=sweet_id))
+    sweet = (await session.execute(select_fields(model=Sweet).where(Sweet.id == sweet_id))).mappings().first()
     # Если сладость не найдена
     if sweet is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой сладости не существует")
-    # В другом случае возвращаем валидированные данные
-    return SweetDetail.model_validate(obj=sweet, from_attributes=True)
+    # В другом случае кэшируем и возвращаем строку, сериализованную без повторной валидации
+    content = row_serializer(detail=SweetDetail)(sweet)
+    entry = RESPONSE_CACHE.set(model=Sweet, obj_id=sweet_id, content=content, generation=generation)
+    return cached_response(entry=entry)
 
 
 @router.put(
@@ -95,7 +240,7 @@ async def get_sweet(sweet_id: PositiveInt = Path(default=..., ge=1), session: Se
     name="Обновление конкретной сладости"
 )
 async def update_sweet(form: SweetUpdateForm, sweet_id: PositiveInt = Path(default=..., ge=1),
-                       session: Session = get_db_session):
+                       session: AsyncSession = get_db_session):
     """
     Обновление конкретной сладости
     :param form:
@@ -103,24 +248,50 @@ async def update_sweet(form: SweetUpdateForm, sweet_id: PositiveInt = Path(defau
     :param session:
     :return:
     """
-    # Достаём конкретную сладость
-    sweet = session.scalar(select(Sweet).filter_by(id=sweet_id))
+    # Валидируем полученные данные
+    form_sweet = SweetDetail(id=sweet_id, **form.model_dump())
+    # Обновляем запись одним запросом UPDATE ... RETURNING
+    sweet = await update_returning(session=session, model=Sweet, obj_id=sweet_id,
+                                   values=form_sweet.model_dump(exclude={"id"}))
     # Если сладость не найдена
     if sweet is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой сладости не существует")
-    # Валидируем полученные данные
-    form_sweet = SweetDetail(**form.model_dump())
-    # Достаём ключи и их значения в провалидированных данных
-    for name, value in form_sweet:
-        # Изменяем полученную по ID сладость
-        setattr(sweet, name, value)
     # Сохраняем изменения в БД
-    session.commit()
-    # Дописываем ID, если это необходимо
-    session.refresh(sweet)
+    await session.commit()
+    # Сбрасываем из кэша устаревшую запись
+    RESPONSE_CACHE.invalidate(model=Sweet, obj_id=sweet_id)
     # Возвращаем изменённую сладость в виде основной схемы представления сладости
-    return SweetDetail.model_validate(obj=sweet, from_attributes=True)
+    return SweetDetail.model_validate(obj=sweet)
+
+
+@router.patch(
+    path="/{sweet_id}/",
+    status_code=status.HTTP_200_OK,
+    response_model=SweetDetail,
+    name="Частичное обновление конкретной сладости"
+)
+async def patch_sweet(form: SweetPatchForm, sweet_id: PositiveInt = Path(default=..., ge=1),
+                      session: AsyncSession = get_db_session):
+    """
+    Частичное обновление конкретной сладости
+    :param form:
+    :param sweet_id:
+    :param session:
+    :return:
+    """
+    # Обновляем только переданные поля, слаг пересчитывается, только если меняются его поля
+    sweet = await patch_returning(session=session, model=Sweet, detail=SweetDetail, obj_id=sweet_id, form=form)
+    # Если сладость не найдена
+    if sweet is None:
+        # Выдаём ошибку
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой сладости не существует")
+    # Сохраняем изменения в БД
+    await session.commit()
+    # Сбрасываем из кэша устаревшую запись
+    RESPONSE_CACHE.invalidate(model=Sweet, obj_id=sweet_id)
+    # Возвращаем изменённую сладость в виде основной схемы представления сладости
+    return SweetDetail.model_validate(obj=sweet)
 
 
 @router.delete(
@@ -128,23 +299,23 @@ async def update_sweet(form: SweetUpdateForm, sweet_id: PositiveInt = Path(defau
     status_code=status.HTTP_200_OK,
     name="Удаление конкретной сладости"
 )
-async def delete_sweet(sweet_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def delete_sweet(sweet_id: PositiveInt = Path(default=..., ge=1), session: AsyncSession = get_db_session):
     """
     Удаление конкретной сладости
     :param sweet_id:
     :param session:
     :return:
     """
-    # Достаём конкретную сладость
-    sweet = session.scalar(select(Sweet).filter_by(id=sweet_id))
+    # Удаляем выбранную сладость одним запросом, дочерние записи удаляет БД каскадно по внешним ключам
+    deleted_id = await session.scalar(delete(Sweet).where(Sweet.id == sweet_id).returning(Sweet.id))
     # Если сладость не найдена
-    if sweet is None:
+    if deleted_id is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой сладости не существует")
-    # Удаляем выбранную сладость
-    session.delete(sweet)
     # Сохраняем изменения в БД
-    session.commit()
+    await session.commit()
+    # Сбрасываем из кэша удалённую запись
+    RESPONSE_CACHE.invalidate(model=Sweet, obj_id=sweet_id)
     # Возвращаем сообщение об успешном удалении конкретной сладости
     return {"msg": "Done"}
 
@@ -155,43 +326,47 @@ async def delete_sweet(sweet_id: PositiveInt = Path(default=..., ge=1), session:
     response_model=CharacterDetail,
     name="Получение персонажа конкретной сладости"
 )
-async def get_character_of_sweet(sweet_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def get_character_of_sweet(sweet_id: PositiveInt = Path(default=..., ge=1),
+                                 session: AsyncSession = get_read_session):
     """
     Получение персонажа конкретной сладости
     :param sweet_id:
     :param session:
     :return:
     """
-    # Достаём конкретную сладость
-    sweet = session.scalar(select(Sweet).filter_by(id=sweet_id))
+    # Достаём персонажа конкретной сладости одним запросом
+    character = (await session.execute(
+        select_fields(model=Character).join(Sweet, Sweet.character_id == Character.id).where(Sweet.id == sweet_id)
+    )).mappings().first()
     # Если сладость не найдена
-    if sweet is None:
+    if character is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой сладости не существует")
-    # Возвращаем конкретного персонажа, к которому относиться конкретная сладость
-    return CharacterDetail.model_validate(obj=sweet.character, from_attributes=True)
+    # Возвращаем конкретного персонажа, к которому относится товар, сериализованного без повторной валидации
+    return fields_row(detail=CharacterDetail, row=character)
 
 
 @router.get(
     path="/{sweet_id}/universe/",
     status_code=status.HTTP_200_OK,
-    response_model=CharacterDetail,
+    response_model=UniverseDetail,
     name="Получение вселенной конкретной сладости"
 )
-async def get_universe_of_sweet(sweet_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def get_universe_of_sweet(sweet_id: PositiveInt = Path(default=..., ge=1),
+                                session: AsyncSession = get_read_session):
     """
     Получение вселенной конкретной сладости
     :param sweet_id:
     :param session:
     :return:
     """
-    # Достаём конкретную сладость
-    sweet = session.scalar(select(Sweet).filter_by(id=sweet_id))
+    # Достаём вселенную конкретной сладости по скопированному в товар ID вселенной, без соединения с персонажем
+    universe = (await session.execute(
+        select_fields(model=Universe).join(Sweet, Sweet.universe_id == Universe.id).where(Sweet.id == sweet_id)
+    )).mappings().first()
     # Если сладость не найдена
-    if sweet is None:
+    if universe is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой сладости не существует")
-    # Возвращаем конкретную вселенную, к которой относиться конкретная сладость
-    return UniverseDetail.model_validate(obj=sweet.character.universe, from_attributes=True)
-
-
+    # Возвращаем конкретную вселенную, к которой относится товар, сериализованную без повторной валидации
+    return fields_row(detail=UniverseDetail, row=universe)
@@ -1,15 +1,32 @@
-from typing import List
+from typing import Any, List, Optional, Tuple
 
-from fastapi import APIRouter, status, Path, HTTPException
-from fastapi.responses import ORJSONResponse
+from fastapi import APIRouter, status, Path, HTTPException, Body, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import PositiveInt
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.dependencies import get_db_session
-from src.types.toy import ToyDetail, ToyAddForm, ToyUpdateForm
+from src.api.fields import fields_batch, fields_page, fields_row
+from src.database.filters import apply_filters
+from src.database.batch import fetch_batch
+from src.database.fields import select_fields
+from src.database.pagination import paginate
+from src.database.update import update_returning, patch_returning
+from src.dependencies import (
+    get_batch_keys, get_db_session, get_read_session, get_cached_read_session, get_pagination, get_toy_filters,
+    get_toy_fields
+)
+from src.types.toy import ToyDetail, ToyAddForm, ToyUpdateForm, ToyPatchForm, ToyBulkUpdateForm, ToyFilter
 from src.types import UniverseDetail, CharacterDetail
-from src.database.models import Toy
+from src.types.batch import BatchKeys, BatchResult
+from src.types.fields import row_serializer
+from src.types.pagination import Page, Pagination
+from src.types.bulk import MAX_BULK_SIZE, BulkResult, BulkDeleteForm, BulkDeleteResult, validate_bulk
+from src.types.export import ExportFormat
+from src.api.export import stream_export
+from src.cache import RESPONSE_CACHE, cached_response
+from src.database.models import Toy, Character, Universe
+from src.database.bulk import bulk_create, bulk_update, bulk_delete
 
 # Роутер игрушек
 router = APIRouter(
@@ -22,19 +39,28 @@ router = APIRouter(
 @router.get(
     path="/",
     status_code=status.HTTP_200_OK,
-    response_model=List[ToyDetail],
+    response_model=Page[ToyDetail],
     name="Получение списка игрушек"
 )
-async def get_list_of_toys(session: Session = get_db_session):
+async def get_list_of_toys(filters: ToyFilter = get_toy_filters,
+                           fields: Optional[Tuple[str, ...]] = get_toy_fields,
+                           pagination: Pagination = get_pagination,
+                           session: AsyncSession = get_read_session):
     """
     Получение списка игрушек
+    :param filters:
+    :param fields:
+    :param pagination:
     :param session:
     :return:
     """
-    # Достаём все игрушки
-    toys = session.scalars(select(Toy).order_by(Toy.id))
-    # Возвращаем список всех игрушек
-    return [ToyDetail.model_validate(obj=toy, from_attributes=True) for toy in toys]
+    # Отбираем игрушки по фильтрам и достаём страницу в порядке сортировки, начиная после курсора
+    statement = select_fields(model=Toy, fields=fields, sort=filters.sort)
+    statement = apply_filters(statement=statement, model=Toy, filters=filters)
+    toys, next_cursor = await paginate(session=session, statement=statement, column=Toy.id,
+                                       pagination=pagination, sort=filters.sort)
+    # Возвращаем страницу игрушек с выбранными полями и курсором следующей страницы
+    return fields_page(detail=ToyDetail, rows=toys, next_cursor=next_cursor, fields=fields)
 
 
 @router.post(
@@ -43,7 +69,7 @@ async def get_list_of_toys(session: Session = get_db_session):
     response_model=ToyDetail,
     name="Добавление новой игрушки"
 )
-async def add_new_toy(form: ToyAddForm, session: Session = get_db_session):
+async def add_new_toy(form: ToyAddForm, session: AsyncSession = get_db_session):
     """
     Добавление новой игрушки
     :param form:
@@ -57,34 +83,153 @@ async def add_new_toy(form: ToyAddForm, session: Session = get_db_session):
     # Добавляем новый девайс в БД
     session.add(toy)
     # Сохраняем изменения в БД
-    session.commit()
-    # Дописываем id, если это не обходимо
-    session.refresh(toy)
+    await session.commit()
+    # Сбрасываем из кэша возможную устаревшую запись с таким ID
+    RESPONSE_CACHE.invalidate(model=Toy, obj_id=toy.id)
     # Возвращаем новую игрушку в виде основной схемы представления игрушки
     return ToyDetail.model_validate(obj=toy, from_attributes=True)
 
 
+@router.get(
+    path="/export/",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    name="Выгрузка всех игрушек"
+)
+async def export_toys(export_format: ExportFormat = Query(default=ExportFormat.NDJSON, alias="format",
+                                                          title="Формат выгрузки")):
+    """
+    Потоковая выгрузка всех игрушек в NDJSON или CSV
+    :param export_format:
+    :return:
+    """
+    # Отдаём все игрушки пачками по мере чтения из БД
+    return stream_export(model=Toy, detail=ToyDetail, export_format=export_format)
+
+
+@router.post(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResult[ToyDetail],
+    name="Массовое добавление игрушек"
+)
+async def bulk_add_toys(payload: List[Any] = Body(default=..., max_length=MAX_BULK_SIZE),
+                        session: AsyncSession = get_db_session):
+    """
+    Массовое добавление игрушек
+    :param payload:
+    :param session:
+    :return:
+    """
+    # Валидируем весь список одним адаптером, собирая ошибки по позициям записей
+    forms, errors = validate_bulk(form=ToyAddForm, payload=payload)
+    # Добавляем все валидные игрушки одним запросом и одним коммитом
+    result = await bulk_create(session=session, model=Toy, detail=ToyDetail, forms=forms, errors=errors)
+    # Сбрасываем из кэша возможные устаревшие записи с такими ID
+    for toy in result.items:
+        RESPONSE_CACHE.invalidate(model=Toy, obj_id=toy.id)
+    # Возвращаем добавленные игрушки и ошибки остальных записей
+    return result
+
+
+@router.patch(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResult[ToyDetail],
+    name="Массовое обновление игрушек"
+)
+async def bulk_update_toys(payload: List[Any] = Body(default=..., max_length=MAX_BULK_SIZE),
+                           session: AsyncSession = get_db_session):
+    """
+    Массовое обновление игрушек
+    :param payload:
+    :param session:
+    :return:
+    """
+    # Валидируем весь список одним адаптером, собирая ошибки по позициям записей
+    forms, errors = validate_bulk(form=ToyBulkUpdateForm, payload=payload)
+    # Обновляем все валидные игрушки одним запросом и одним коммитом
+    result = await bulk_update(session=session, model=Toy, detail=ToyDetail, forms=forms, errors=errors)
+    # Сбрасываем из кэша устаревшие записи
+    for toy in result.items:
+        RESPONSE_CACHE.invalidate(model=Toy, obj_id=toy.id)
+    # Возвращаем обновлённые игрушки и ошибки остальных записей
+    return result
+
+
+@router.delete(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkDeleteResult,
+    name="Массовое удаление игрушек"
+)
+async def bulk_delete_toys(form: BulkDeleteForm, session: AsyncSession = get_db_session):
+    """
+    Массовое удаление игрушек
+    :param form:
+    :param session:
+    :return:
+    """
+    # Удаляем все игрушки одним запросом и одним коммитом
+    result = await bulk_delete(session=session, model=Toy, ids=form.ids)
+    # Сбрасываем из кэша удалённые записи
+    for toy_id in result.deleted:
+        RESPONSE_CACHE.invalidate(model=Toy, obj_id=toy_id)
+    # Возвращаем ID удалённых и ненайденных игрушек
+    return result
+
+
+@router.get(
+    path="/batch/",
+    status_code=status.HTTP_200_OK,
+    response_model=BatchResult[ToyDetail],
+    name="Получение нескольких игрушек по ID или слагам"
+)
+async def get_batch_of_toys(keys: BatchKeys = get_batch_keys,
+                            fields: Optional[Tuple[str, ...]] = get_toy_fields,
+                            session: AsyncSession = get_read_session):
+    """
+    Получение нескольких игрушек одним запросом по списку ID или слагов
+    :param keys:
+    :param fields:
+    :param session:
+    :return:
+    """
+    # Достаём всех запрошенных игрушек одним запросом в порядке переданных ключей
+    toys, missing = await fetch_batch(session=session, model=Toy, keys=keys, fields=fields)
+    # Возвращаем найденных игрушек с выбранными полями и ключи ненайденных
+    return fields_batch(detail=ToyDetail, rows=toys, missing=missing, fields=fields)
+
+
 @router.get(
     path="/{toy_id}/",
     status_code=status.HTTP_200_OK,
     response_model=ToyDetail,
     name="Получение конкретной игрушки"
 )
-async def get_toy(toy_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def get_toy(toy_id: PositiveInt = Path(default=..., ge=1), session: AsyncSession = get_cached_read_session):
     """
     Получение конкретной игрушки
     :param toy_id:
     :param session:
     :return:
     """
+    # Если ответ уже есть в кэше, отдаём его без обращения к БД
+    entry = RESPONSE_CACHE.get(model=Toy, obj_id=toy_id)
+    if entry is not None:
+        return cached_response(entry=entry)
+    # Запоминаем поколение кэша до запроса, чтобы не закэшировать строку, изменённую во время чтения
+    generation = RESPONSE_CACHE.generation()
     # Достаём конкретную игрушку по его ID
-    toy = session.scalar(select(Toy).filter_by(id=toy_id))
+    toy = (await session.execute(select_fields(model=Toy).where(Toy.id == toy_id))).mappings().first()
     # Если игрушка не найдена
     if toy is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой игрушки не сущетсвует")
-    # В другом случае возвращаем валидированные данные
-    return ToyDetail.model_validate(obj=toy, from_attributes=True)
+    # В другом случае кэшируем и возвращаем строку, сериализованную без повторной валидации
+    content = row_serializer(detail=ToyDetail)(toy)
+    entry = RESPONSE_CACHE.set(model=Toy, obj_id=toy_id, content=content, generation=generation)
+    return cached_response(entry=entry)
 
 
 @router.put(
@@ -94,7 +239,7 @@ async def get_toy(toy_id: PositiveInt = Path(default=..., ge=1), session: Sessio
     name="Обновление конкретной игрушки"
 )
 async def update_toy(form: ToyUpdateForm, toy_id: PositiveInt = Path(default=..., ge=1),
-                     session: Session = get_db_session):
+                     session: AsyncSession = get_db_session):
     """
     Обновление конкретной игрушки
     :param form:
@@ -102,24 +247,50 @@ async def update_toy(form: ToyUpdateForm, toy_id: PositiveInt = Path(default=...
     :param session:
     :return:
     """
-    # Достаём конкретную игрушку
-    toy = session.scalar(select(Toy).filter_by(id=toy_id))
+    # Валидируем полученные данные
+    form_toy = ToyDetail(id=toy_id, **form.model_dump())
+    # Обновляем запись одним запросом UPDATE ... RETURNING
+    toy = await update_returning(session=session, model=Toy, obj_id=toy_id,
+                                 values=form_toy.model_dump(exclude={"id"}))
     # Если игрушка не найдена
     if toy is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой игрушки не сущетсвует")
-    # Валидируем полученные данные
-    form_toy = ToyDetail(id=toy_id, **form.model_dump())
-    # Достаём ключи и их значения в провалидированных данных
-    for name, value in form_toy:
-        # Изменяем полученную по ID игрушку
-        setattr(toy, name, value)
     # Сохраняем изменения в БД
-    session.commit()
-    # Дописываем ID, если это необходимо
-    session.refresh(toy)
+    await session.commit()
+    # Сбрасываем из кэша устаревшую запись
+    RESPONSE_CACHE.invalidate(model=Toy, obj_id=toy_id)
     # Возвращаем изменённую игрушку в виде основной схемы представления игрушки
-    return ToyDetail.model_validate(obj=toy, from_attributes=True)
+    return ToyDetail.model_validate(obj=toy)
+
+
+@router.patch(
+    path="/{toy_id}/",
+    status_code=status.HTTP_200_OK,
+    response_model=ToyDetail,
+    name="Частичное обновление конкретной игрушки"
+)
+async def patch_toy(form: ToyPatchForm, toy_id: PositiveInt = Path(default=..., ge=1),
+                    session: AsyncSession = get_db_session):
+    """
+    Частичное обновление конкретной игрушки
+    :param form:
+    :param toy_id:
+    :param session:
+    :return:
+    """
+    # Обновляем только переданные поля, слаг пересчитывается, только если меняются его поля
+    toy = await patch_returning(session=session, model=Toy, detail=ToyDetail, obj_id=toy_id, form=form)
+    # Если игрушка не найдена
+    if toy is None:
+        # Выдаём ошибку
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой игрушки не сущетсвует")
+    # Сохраняем изменения в БД
+    await session.commit()
+    # Сбрасываем из кэша устаревшую запись
+    RESPONSE_CACHE.invalidate(model=Toy, obj_id=toy_id)
+    # Возвращаем изменённую игрушку в виде основной схемы представления игрушки
+    return ToyDetail.model_validate(obj=toy)
 
 
 @router.delete(
@@ -127,23 +298,23 @@ async def update_toy(form: ToyUpdateForm, toy_id: PositiveInt = Path(default=...
     status_code=status.HTTP_200_OK,
     name="Удаление конкретной игрушки"
 )
-async def delete_toy(toy_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def delete_toy(toy_id: PositiveInt = Path(default=..., ge=1), session: AsyncSession = get_db_session):
     """
     Удаление конкретной игрушки
     :param toy_id:
     :param session:
     :return:
     """
-    # Достаём конкретную игрушку
-    toy = session.scalar(select(Toy).filter_by(id=toy_id))
+    # Удаляем выбранную игрушку одним запросом, дочерние записи удаляет БД каскадно по внешним ключам
+    deleted_id = await session.scalar(delete(Toy).where(Toy.id == toy_id).returning(Toy.id))
     # Если игрушка не найдена
-    if toy is None:
+    if deleted_id is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой игрушки не сущетсвует")
-    # Удаляем выбранную игрушку
-    session.delete(toy)
     # Сохраняем изменения в БД
-    session.commit()
+    await session.commit()
+    # Сбрасываем из кэша удалённую запись
+    RESPONSE_CACHE.invalidate(model=Toy, obj_id=toy_id)
     # Возвращаем сообщение об успешном удалении конкретной игрушку
     return {"msg": "Done"}
 
@@ -154,21 +325,23 @@ async def delete_toy(toy_id: PositiveInt = Path(default=..., ge=1), session: Ses
     response_model=UniverseDetail,
     name="Получение вселенной игрушки"
 )
-async def get_universe_of_toy(toy_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def get_universe_of_toy(toy_id: PositiveInt = Path(default=..., ge=1), session: AsyncSession = get_read_session):
     """
     Получение вселенной игрушки
     :param toy_id:
     :param session:
     :return:
     """
-    # Достаём конкретную игрушку
-    toy = session.scalar(select(Toy).filter_by(id=toy_id))
+    # Достаём вселенную конкретной игрушки по скопированному в товар ID вселенной, без соединения с персонажем
+    universe = (await session.execute(
+        select_fields(model=Universe).join(Toy, Toy.universe_id == Universe.id).where(Toy.id == toy_id)
+    )).mappings().first()
     # Если игрушка не найдена
-    if toy is None:
+    if universe is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой игрушки не сущетсвует")
-    # Возвращаем конкретную вселенную, к которой относиться конкретная игрушка
-    return UniverseDetail.model_validate(obj=toy.character.universe, from_attributes=True)
+    # Возвращаем конкретную вселенную, к которой относится товар, сериализованную без повторной валидации
+    return fields_row(detail=UniverseDetail, row=universe)
 
 
 @router.get(
@@ -177,18 +350,20 @@ async def get_universe_of_toy(toy_id: PositiveInt = Path(default=..., ge=1), ses
     response_model=CharacterDetail,
     name="Получение персонажа игрушки"
 )
-async def get_character_of_toy(toy_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def get_character_of_toy(toy_id: PositiveInt = Path(default=..., ge=1), session: AsyncSession = get_read_session):
     """
     Получение персонажа игрушки
     :param toy_id:
     :param session:
     :return:
     """
-    # Достаём конкретную игрушку
-    toy = session.scalar(select(Toy).filter_by(id=toy_id))
+    # Достаём персонажа конкретной игрушки одним запросом
+    character = (await session.execute(
+        select_fields(model=Character).join(Toy, Toy.character_id == Character.id).where(Toy.id == toy_id)
+    )).mappings().first()
     # Если игрушка не найдена
-    if toy is None:
+    if character is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой игрушки не сущетсвует")
-    # Возвращаем конкретного персонажа, к которому относиться конкретный девайс
-    return UniverseDetail.model_validate(obj=toy.character, from_attributes=True)
\ No newline at end of file
+    # Возвращаем конкретного персонажа, к которому относится товар, сериализованного без повторной валидации
+    return fields_row(detail=CharacterDetail, row=character)
@@ -1,15 +1,31 @@
-from typing import List
+from typing import Any, List, Optional, Tuple
 
 from pydantic import PositiveInt
-from sqlalchemy import select, update
-from sqlalchemy.orm import Session
-from src.database.models import Universe
-from src.dependencies import get_db_session
-from fastapi import APIRouter, status, Path, HTTPException
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.api.fields import fields_batch, fields_page
+from src.cache import RESPONSE_CACHE, cached_response
+from src.database.models import Universe, Character, Device, Sweet, Toy
+from src.database.bulk import bulk_create, bulk_update, bulk_delete
+from src.database.batch import fetch_batch
+from src.database.fields import select_fields
+from src.database.pagination import paginate
+from src.database.update import update_returning, patch_returning
+from src.dependencies import (
+    get_batch_keys, get_db_session, get_read_session, get_cached_read_session, get_pagination, get_character_fields,
+    get_device_fields, get_sweet_fields, get_toy_fields, get_universe_fields
+)
+from fastapi import APIRouter, status, Path, HTTPException, Body
 from fastapi.responses import ORJSONResponse
 
-from src.types import CharacterDetail, DeviceDetail, ToyDetail
-from src.types.universe import UniverseDetail, UniverseAddForm, UniverseUpdateForm
+from src.types import CharacterDetail, DeviceDetail, SweetDetail, ToyDetail
+from src.types.universe import (
+    UniverseDetail, UniverseAddForm, UniverseUpdateForm, UniversePatchForm, UniverseBulkUpdateForm
+)
+from src.types.batch import BatchKeys, BatchResult
+from src.types.fields import row_serializer
+from src.types.pagination import Page, Pagination
+from src.types.bulk import MAX_BULK_SIZE, BulkResult, BulkDeleteForm, BulkDeleteResult, validate_bulk
 
 # Роутер вселенной
 router = APIRouter(
@@ -22,19 +38,25 @@ router = APIRouter(
 @router.get(
     path="/",
     status_code=status.HTTP_200_OK,
-    response_model=List[UniverseDetail],
+    response_model=Page[UniverseDetail],
     name="Получение списка всех вселенных"
 )
-async def get_list_universes(session: Session = get_db_session):
+async def get_list_universes(fields: Optional[Tuple[str, ...]] = get_universe_fields,
+                             pagination: Pagination = get_pagination,
+                             session: AsyncSession = get_read_session):
     """
     Получение списка всех вселенных комиксов и их персонажей
+    :param fields:
+    :param pagination:
     :param session:
     :return:
     """
-    # Достаём все вселенные
-    universes = session.scalars(select(Universe).order_by(Universe.id))
-    # Возвращаем список всех вселенных
-    return [UniverseDetail.model_validate(obj=universe, from_attributes=True) for universe in universes]
+    # Достаём страницу вселенных только с выбранными полями, начиная после курсора
+    statement = select_fields(model=Universe, fields=fields)
+    universes, next_cursor = await paginate(session=session, statement=statement, column=Universe.id,
+                                            pagination=pagination)
+    # Возвращаем страницу вселенных с выбранными полями и курсором следующей страницы
+    return fields_page(detail=UniverseDetail, rows=universes, next_cursor=next_cursor, fields=fields)
 
 
 @router.post(
@@ -43,7 +65,7 @@ async def get_list_universes(session: Session = get_db_session):
     response_model=UniverseDetail,
     name="Добавление новой вселеннной"
 )
-async def add_new_universe(form: UniverseAddForm, session: Session = get_db_session):
+async def add_new_universe(form: UniverseAddForm, session: AsyncSession = get_db_session):
     """
     Добавление новой вселенной
     :param session:
@@ -57,34 +79,140 @@ async def add_new_universe(form: UniverseAddForm, session: Session = get_db_sess
     # Добавляем новую вселеную в БД
     session.add(universe)
     # Сохраняем изменения в БД
-    session.commit()
-    # Дописываем id, если это необходимо
-    session.refresh(universe)
+    await session.commit()
+    # Сбрасываем из кэша возможную устаревшую запись с таким ID
+    RESPONSE_CACHE.invalidate(model=Universe, obj_id=universe.id)
     # Возвращаем новую вселенную в виде основной схемы представления вселенной
     return UniverseDetail.model_validate(obj=universe, from_attributes=True)
 
 
+@router.post(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResult[UniverseDetail],
+    name="Массовое добавление вселенных"
+)
+async def bulk_add_universes(payload: List[Any] = Body(default=..., max_length=MAX_BULK_SIZE),
+                             session: AsyncSession = get_db_session):
+    """
+    Массовое добавление вселенных
+    :param payload:
+    :param session:
+    :return:
+    """
+    # Валидируем весь список одним адаптером, собирая ошибки по позициям записей
+    forms, errors = validate_bulk(form=UniverseAddForm, payload=payload)
+    # Добавляем все валидные вселенные одним запросом и одним коммитом
+    result = await bulk_create(session=session, model=Universe, detail=UniverseDetail, forms=forms, errors=errors)
+    # Сбрасываем из кэша возможные устаревшие записи с такими ID
+    for universe in result.items:
+        RESPONSE_CACHE.invalidate(model=Universe, obj_id=universe.id)
+    # Возвращаем добавленные вселенные и ошибки остальных записей
+    return result
+
+
+@router.patch(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkResult[UniverseDetail],
+    name="Массовое обновление вселенных"
+)
+async def bulk_update_universes(payload: List[Any] = Body(default=..., max_length=MAX_BULK_SIZE),
+                                session: AsyncSession = get_db_session):
+    """
+    Массовое обновление вселенных
+    :param payload:
+    :param session:
+    :return:
+    """
+    # Валидируем весь список одним адаптером, собирая ошибки по позициям записей
+    forms, errors = validate_bulk(form=UniverseBulkUpdateForm, payload=payload)
+    # Обновляем все валидные вселенные одним запросом и одним коммитом
+    result = await bulk_update(session=session, model=Universe, detail=UniverseDetail, forms=forms, errors=errors)
+    # Сбрасываем из кэша устаревшие записи
+    for universe in result.items:
+        RESPONSE_CACHE.invalidate(model=Universe, obj_id=universe.id)
+    # Возвращаем обновлённые вселенные и ошибки остальных записей
+    return result
+
+
+@router.delete(
+    path="/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkDeleteResult,
+    name="Массовое удаление вселенных"
+)
+async def bulk_delete_universes(form: BulkDeleteForm, session: AsyncSession = get_db_session):
+    """
+    Массовое удаление вселенных
+    :param form:
+    :param session:
+    :return:
+    """
+    # Удаляем все вселенные одним запросом и одним коммитом
+    result = await bulk_delete(session=session, model=Universe, ids=form.ids)
+    # Сбрасываем из кэша удалённые записи
+    for universe_id in result.deleted:
+        RESPONSE_CACHE.invalidate(model=Universe, obj_id=universe_id)
+    # Сбрасываем из кэша записи, каскадно удалённые БД
+    RESPONSE_CACHE.invalidate_models(Character, Device, Sweet, Toy)
+    # Возвращаем ID удалённых и ненайденных вселенных
+    return result
+
+
+@router.get(
+    path="/batch/",
+    status_code=status.HTTP_200_OK,
+    response_model=BatchResult[UniverseDetail],
+    name="Получение нескольких вселенных по ID или слагам"
+)
+async def get_batch_of_universes(keys: BatchKeys = get_batch_keys,
+                                 fields: Optional[Tuple[str, ...]] = get_universe_fields,
+                                 session: AsyncSession = get_read_session):
+    """
+    Получение нескольких вселенных одним запросом по списку ID или слагов
+    :param keys:
+    :param fields:
+    :param session:
+    :return:
+    """
+    # Достаём всех запрошенных вселенных одним запросом в порядке переданных ключей
+    universes, missing = await fetch_batch(session=session, model=Universe, keys=keys, fields=fields)
+    # Возвращаем найденных вселенных с выбранными полями и ключи ненайденных
+    return fields_batch(detail=UniverseDetail, rows=universes, missing=missing, fields=fields)
+
+
 @router.get(
     path="/{universe_id}/",
     status_code=status.HTTP_200_OK,
     response_model=UniverseDetail,
     name="Получение конкретной вселенной"
 )
-async def get_universe(universe_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def get_universe(universe_id: PositiveInt = Path(default=..., ge=1),
+                       session: AsyncSession = get_cached_read_session):
     """
     Получение конкретной вселенной
     :param universe_id:
     :param session:
     :return:
     """
+    # Если ответ уже есть в кэше, отдаём его без обращения к БД
+    entry = RESPONSE_CACHE.get(model=Universe, obj_id=universe_id)
+    if entry is not None:
+        return cached_response(entry=entry)
+    # Запоминаем поколение кэша до запроса, чтобы не закэшировать строку, изменённую во время чтения
+    generation = RESPONSE_CACHE.generation()
     # Получение конкретной вселенной по её ID
-    universe = session.scalar(select(Universe).filter_by(id=universe_id))
+    statement = select_fields(model=Universe).where(Universe.id == universe_id)
+    universe = (await session.execute(statement)).mappings().first()
     # Если вселенной не существует
     if universe is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой вселенной не существует")
-    # В другом случае возвращаем валидированные данные
-    return UniverseDetail.model_validate(obj=universe, from_attributes=True)
+    # В другом случае кэшируем и возвращаем строку, сериализованную без повторной валидации
+    content = row_serializer(detail=UniverseDetail)(universe)
+    entry = RESPONSE_CACHE.set(model=Universe, obj_id=universe_id, content=content, generation=generation)
+    return cached_response(entry=entry)
 
 
 @router.put(
@@ -94,7 +222,7 @@ async def get_universe(universe_id: PositiveInt = Path(default=..., ge=1), sessi
     name="Обновление конкретной вселенной"
 )
 async def update_universe(form: UniverseUpdateForm, universe_id: PositiveInt = Path(default=..., ge=1),
-                          session: Session = get_db_session):
+                          session: AsyncSession = get_db_session):
     """
     Изменение конкретной вселенной
     :param form:
@@ -102,24 +230,51 @@ async def update_universe(form: UniverseUpdateForm, universe_id: PositiveInt = P
     :param session:
     :return:
     """
-    # Достаём вселенную по её ID
-    universe = session.scalar(select(Universe).filter_by(id=universe_id))
+    # Валидируем полученные данные
+    form_universe = UniverseDetail(id=universe_id, **form.model_dump())
+    # Обновляем запись одним запросом UPDATE ... RETURNING
+    universe = await update_returning(session=session, model=Universe, obj_id=universe_id,
+                                      values=form_universe.model_dump(exclude={"id"}))
     # Если вселенная не найдена
     if universe is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой вселенной не существует")
-    # Валидируем полученные данные
-    form_universe = UniverseDetail(id=universe_id, **form.model_dump())
-    # Достаём ключи и их значения в провалидированных данных
-    for name, value in form_universe:
-        # Изменяем полученую по ID вселенную
-        setattr(universe, name, value)
     # Сохраняем изменения в БД
-    session.commit()
-    # Дописываем ID, если это необходимо
-    session.refresh(universe)
+    await session.commit()
+    # Сбрасываем из кэша устаревшую запись
+    RESPONSE_CACHE.invalidate(model=Universe, obj_id=universe_id)
     # Возвращаем изменённую вселенную в виде основной схемы представления вселенной
-    return UniverseDetail.model_validate(obj=universe, from_attributes=True)
+    return UniverseDetail.model_validate(obj=universe)
+
+
+@router.patch(
+    path="/{universe_id}/",
+    status_code=status.HTTP_200_OK,
+    response_model=UniverseDetail,
+    name="Частичное обновление конкретной вселенной"
+)
+async def patch_universe(form: UniversePatchForm, universe_id: PositiveInt = Path(default=..., ge=1),
+                         session: AsyncSession = get_db_session):
+    """
+    Частичное обновление конкретной вселенной
+    :param form:
+    :param universe_id:
+    :param session:
+    :return:
+    """
+    # Обновляем только переданные поля, слаг пересчитывается, только если меняются его поля
+    universe = await patch_returning(session=session, model=Universe, detail=UniverseDetail, obj_id=universe_id,
+                                     form=form)
+    # Если вселенная не найдена
+    if universe is None:
+        # Выдаём ошибку
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой вселенной не существует")
+    # Сохраняем изменения в БД
+    await session.commit()
+    # Сбрасываем из кэша устаревшую запись
+    RESPONSE_CACHE.invalidate(model=Universe, obj_id=universe_id)
+    # Возвращаем изменённую вселенную в виде основной схемы представления вселенной
+    return UniverseDetail.model_validate(obj=universe)
 
 
 @router.delete(
@@ -127,23 +282,25 @@ async def update_universe(form: UniverseUpdateForm, universe_id: PositiveInt = P
     status_code=status.HTTP_200_OK,
     name="Удаление конкретной категории"
 )
-async def delete_universe(universe_id: PositiveInt = Path(default=..., ge=1), session: Session = get_db_session):
+async def delete_universe(universe_id: PositiveInt = Path(default=..., ge=1), session: AsyncSession = get_db_session):
     """
     Удаление конкретной вселенной
     :param universe_id:
     :param session:
     :return:
     """
-    # Достаём вселенную по ID
-    universe = session.scalar(select(Universe).filter_by(id=universe_id))
+    # Удаляем выбранную вселенную одним запросом, дочерние записи удаляет БД каскадно по внешним ключам
+    deleted_id = await session.scalar(delete(Universe).where(Universe.id == universe_id).returning(Universe.id))
     # Если вселенная не найдена
-    if universe is None:
+    if deleted_id is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой вселенной не существует")
-    # Удаляем выбранную вселенную
-    session.delete(universe)
     # Сохраняем изменения в БД
-    session.commit()
+    await session.commit()
+    # Сбрасываем из кэша удалённую запись
+    RESPONSE_CACHE.invalidate(model=Universe, obj_id=universe_id)
+    # Сбрасываем из кэша записи, каскадно удалённые БД
+    RESPONSE_CACHE.invalidate_models(Character, Device, Sweet, Toy)
     # Возвращаем сообщение об успешном удалении конкретной вселенной
     return {"msg": "Done"}
 
@@ -151,70 +308,118 @@ async def delete_universe(universe_id: PositiveInt = Path(default=..., ge=1), se
 @router.get(
     path="/{universe_id}/characters/",
     status_code=status.HTTP_200_OK,
-    response_model=List[CharacterDetail],
+    response_model=Page[CharacterDetail],
     name="Получение всех персонажей конкретной вселенной"
 )
 async def get_list_character_of_universe(universe_id: PositiveInt = Path(default=..., ge=1),
-                                         session: Session = get_db_session):
+                                         fields: Optional[Tuple[str, ...]] = get_character_fields,
+                                         pagination: Pagination = get_pagination,
+                                         session: AsyncSession = get_read_session):
     """
     Получение списка персонажей конкретной вселенной
     :param universe_id:
+    :param fields:
+    :param pagination:
     :param session:
     :return:
     """
-    # Получение конкретной вселенной по её ID
-    universe = session.scalar(select(Universe).filter_by(id=universe_id))
-    # Если вселенная не найдена
-    if universe is None:
+    # Достаём страницу персонажей вселенной по индексу universe_id, начиная после курсора
+    statement = select_fields(model=Character, fields=fields).where(Character.universe_id == universe_id)
+    characters, next_cursor = await paginate(session=session, statement=statement, column=Character.id,
+                                             pagination=pagination)
+    # Если персонажи не найдены и самой вселенной не существует
+    if not characters and await session.scalar(select(Universe.id).filter_by(id=universe_id)) is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой вселенной не существует")
-    # Возвращаем список персонажей конкретной вселенной
-    return [CharacterDetail.model_validate(character, from_attributes=True) for character in universe.characters]
+    # Возвращаем страницу персонажей вселенной с выбранными полями и курсором следующей страницы
+    return fields_page(detail=CharacterDetail, rows=characters, next_cursor=next_cursor, fields=fields)
 
 
 @router.get(
     path="/{universe_id}/devices/",
     status_code=status.HTTP_200_OK,
-    response_model=List[DeviceDetail],
+    response_model=Page[DeviceDetail],
     name="Получение всех девайсов конкретной вселенной"
 )
 async def get_list_devices_of_universe(universe_id: PositiveInt = Path(default=..., ge=1),
-                                       session: Session = get_db_session):
+                                       fields: Optional[Tuple[str, ...]] = get_device_fields,
+                                       pagination: Pagination = get_pagination,
+                                       session: AsyncSession = get_read_session):
     """
     Получение всех девайсов конкретной вселенной
     :param universe_id:
+    :param fields:
+    :param pagination:
     :param session:
     :return:
     """
-    # Получение конкретной вселенной по её ID
-    universe = session.scalar(select(Universe).filter_by(id=universe_id))
-    # Если вселенная не найдена
-    if universe is None:
+    # Достаём страницу девайсов вселенной одним сканированием индекса (universe_id, id), начиная после курсора
+    statement = select_fields(model=Device, fields=fields).where(Device.universe_id == universe_id)
+    devices, next_cursor = await paginate(session=session, statement=statement, column=Device.id,
+                                          pagination=pagination)
+    # Если девайсы не найдены и самой вселенной не существует
+    if not devices and await session.scalar(select(Universe.id).filter_by(id=universe_id)) is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой вселенной не существует")
-    # Возвращаем список девайсов конкретной вселенной
-    return [DeviceDetail.model_validate(device, from_attributes=True) for device in universe.devices]
+    # Возвращаем страницу девайсов вселенной с выбранными полями и курсором следующей страницы
+    return fields_page(detail=DeviceDetail, rows=devices, next_cursor=next_cursor, fields=fields)
+
+
+@router.get(
+    path="/{universe_id}/sweets/",
+    status_code=status.HTTP_200_OK,
+    response_model=Page[SweetDetail],
+    name="Получение всех сладостей конкретной вселенной"
+)
+async def get_list_sweets_of_universe(universe_id: PositiveInt = Path(default=..., ge=1),
+                                      fields: Optional[Tuple[str, ...]] = get_sweet_fields,
+                                      pagination: Pagination = get_pagination,
+                                      session: AsyncSession = get_read_session):
+    """
+    Получение всех сладостей конкретной вселенной
+    :param universe_id:
+    :param fields:
+    :param pagination:
+    :param session:
+    :return:
+    """
+    # Достаём страницу сладостей вселенной одним сканированием индекса (universe_id, id), начиная после курсора
+    statement = select_fields(model=Sweet, fields=fields).where(Sweet.universe_id == universe_id)
+    sweets, next_cursor = await paginate(session=session, statement=statement, column=Sweet.id,
+                                         pagination=pagination)
+    # Если сладости не найдены и самой вселенной не существует
+    if not sweets and await session.scalar(select(Universe.id).filter_by(id=universe_id)) is None:
+        # Выдаём ошибку
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой вселенной не существует")
+    # Возвращаем страницу сладостей вселенной с выбранными полями и курсором следующей страницы
+    return fields_page(detail=SweetDetail, rows=sweets, next_cursor=next_cursor, fields=fields)
 
 
 @router.get(
     path="/{universe_id}/toys/",
     status_code=status.HTTP_200_OK,
-    response_model=List[ToyDetail],
+    response_model=Page[ToyDetail],
     name="Получение всех игрушек конкретной вселенной"
 )
 async def get_list_toys_of_universe(universe_id: PositiveInt = Path(default=..., ge=1),
-                                    session: Session = get_db_session):
+                                    fields: Optional[Tuple[str, ...]] = get_toy_fields,
+                                    pagination: Pagination = get_pagination,
+                                    session: AsyncSession = get_read_session):
     """
-    Получение списка игрущек конкретной вселенной
+    Получение всех игрушек конкретной вселенной
     :param universe_id:
+    :param fields:
+    :param pagination:
     :param session:
     :return:
     """
-    # Получение конкретной вселенной по её ID
-    universe = session.scalar(select(Universe).filter_by(id=universe_id))
-    # Если вселенная не найдена
-    if universe is None:
+    # Достаём страницу игрушек вселенной одним сканированием индекса (universe_id, id), начиная после курсора
+    statement = select_fields(model=Toy, fields=fields).where(Toy.universe_id == universe_id)
+    toys, next_cursor = await paginate(session=session, statement=statement, column=Toy.id,
+                                       pagination=pagination)
+    # Если игрушки не найдены и самой вселенной не существует
+    if not toys and await session.scalar(select(Universe.id).filter_by(id=universe_id)) is None:
         # Выдаём ошибку
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Такой вселенной не существует")
-    # Возвращаем список игрушек конкретной категории
-    return [ToyDetail.model_validate(toy, from_attributes=True) for toy in universe.toys]
+    # Возвращаем страницу игрушек вселенной с выбранными полями и курсором следующей страницы
+    return fields_page(detail=ToyDetail, rows=toys, next_cursor=next_cursor, fields=fields)
@@ -0,0 +1,205 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Type
+
+from fastapi import Response
+from orjson import dumps
+
+from src.database.base import Base
+from src.middleware.etag import make_etag
+from src.settings import SETTINGS
+from src.types.service import CacheStats
+
+# Ключ записи кэша: имя таблицы модели и ID записи
+CacheKey = Tuple[str, int]
+
+
+class CacheEntry(NamedTuple):
+    """
+    Запись кэша ответов
+    """
+    # Момент устаревания записи по monotonic()
+    expires_at: float
+    # Сериализованное тело ответа
+    body: bytes
+    # ETag тела, чтобы не хэшировать его на каждое попадание
+    etag: str
+
+
+class ResponseCache:
+    """
+    Кэш сериализованных ответов детальных эндпоинтов, ограниченный по размеру (LRU) и времени жизни записей (TTL).
+    Кэш живёт в памяти процесса, поэтому у каждого воркера он свой, и устаревание между воркерами ограничено TTL.
+    Каждый сброс записи получает номер поколения. Чтение запоминает текущее поколение до запроса в БД, и если запись
+    сбросили, пока чтение ждало БД, прочитанная до изменения строка в кэш не попадает
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        # Записи в порядке последнего обращения
+        self._entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        # Номер последнего сброса
+        self._generation = 0
+        # Поколения последних сбросов записей и таблиц целиком, не больше max_size сброшенных записей
+        self._invalidated: OrderedDict[CacheKey, int] = OrderedDict()
+        self._invalidated_models: Dict[str, int] = {}
+        # Поколение самого старого забытого сброса: записи, которых нет в _invalidated, могли сбросить не раньше него
+        self._forgotten = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Кэш включён: CACHE_MAX_SIZE больше нуля
+        :return:
+        """
+        return self.max_size > 0
+
+    @staticmethod
+    def _key(model: Type[Base], obj_id: int) -> CacheKey:
+        """
+        Ключ записи кэша конкретной записи модели
+        :param model:
+        :param obj_id:
+        :return:
+        """
+        return model.__tablename__, obj_id
+
+    def generation(self) -> int:
+        """
+        Текущее поколение кэша. Его нужно получить до запроса записи в БД и передать в set()
+        :return:
+        """
+        return self._generation
+
+    def _invalidated_after(self, key: CacheKey, generation: int) -> bool:
+        """
+        Запись или вся её таблица сброшена после переданного поколения
+        :param key:
+        :param generation:
+        :return:
+        """
+        invalidated = max(self._invalidated.get(key, self._forgotten), self._invalidated_models.get(key[0], 0))
+        return invalidated > generation
+
+    def _bump(self, key: CacheKey) -> None:
+        """
+        Новое поколение сброса записи
+        :param key:
+        :return:
+        """
+        self._generation += 1
+        self._invalidated[key] = self._generation
+        self._invalidated.move_to_end(key)
+        # Забываем самые старые сбросы, запоминая поколение последнего из забытых
+        while len(self._invalidated) > self.max_size:
+            _, self._forgotten = self._invalidated.popitem(last=False)
+
+    def get(self, model: Type[Base], obj_id: int) -> Optional[CacheEntry]:
+        """
+        Получение записи из кэша
+        :param model:
+        :param obj_id:
+        :return:
+        """
+        # Если кэш отключён, искать в нём нечего
+        if not self.enabled:
+            return None
+        key = self._key(model=model, obj_id=obj_id)
+        entry = self._entries.get(key)
+        # Если записи нет
+        if entry is None:
+            self.misses += 1
+            return None
+        # Если запись устарела, выкидываем её
+        if entry.expires_at <= monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        # Помечаем запись как последнюю использованную
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set(self, model: Type[Base], obj_id: int, content: Dict[str, Any],
+            generation: Optional[int] = None) -> CacheEntry:
+        """
+        Сериализация записи и сохранение её в кэш
+        :param model:
+        :param obj_id:
+        :param content: запись в виде model_dump(mode="json") схемы представления
+        :param generation: поколение кэша до запроса записи в БД. Если запись сбросили после него, она не сохраняется
+        :return:
+        """
+        # Сериализуем так же, как это делает ORJSONResponse
+        body = dumps(content)
+        entry = CacheEntry(expires_at=monotonic() + self.ttl, body=body, etag=make_etag(body))
+        # Если кэш отключён, только отдаём запись для ответа, не сохраняя и не вытесняя её сразу же
+        if not self.enabled:
+            return entry
+        key = self._key(model=model, obj_id=obj_id)
+        # Если запись изменили, пока её читали из БД, прочитанная строка уже устарела
+        if generation is not None and self._invalidated_after(key=key, generation=generation):
+            return entry
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        # Вытесняем давно не использованные записи, пока кэш не влезет в лимит
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def invalidate(self, model: Type[Base], obj_id: int) -> None:
+        """
+        Сброс записи кэша конкретной записи модели
+        :param model:
+        :param obj_id:
+        :return:
+        """
+        key = self._key(model=model, obj_id=obj_id)
+        self._entries.pop(key, None)
+        # Если кэш отключён, в нём нечего защищать от устаревших записей
+        if self.enabled:
+            self._bump(key=key)
+
+    def invalidate_models(self, *models: Type[Base]) -> None:
+        """
+        Сброс всех записей кэша переданных моделей.
+        Нужен при удалении родительской записи, когда БД каскадно удаляет дочерние
+        :param models:
+        :return:
+        """
+        tablenames = {model.__tablename__ for model in models}
+        for key in [key for key in self._entries if key[0] in tablenames]:
+            del self._entries[key]
+        self._generation += 1
+        self._invalidated_models.update(dict.fromkeys(tablenames, self._generation))
+
+    def stats(self) -> CacheStats:
+        """
+        Счётчики кэша
+        :return:
+        """
+        return CacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            size=len(self._entries),
+            max_size=self.max_size
+        )
+
+
+def cached_response(entry: CacheEntry) -> Response:
+    """
+    Ответ из уже сериализованного тела, без повторной валидации через response_model
+    :param entry:
+    :return:
+    """
+    return Response(content=entry.body, media_type="application/json", headers={"ETag": entry.etag})
+
+
+# Кэш ответов детальных эндпоинтов
+RESPONSE_CACHE = ResponseCache(max_size=SETTINGS.CACHE_MAX_SIZE, ttl=SETTINGS.CACHE_TTL)
@@ -1,18 +1,61 @@
-from sqlalchemy import Column, INT, create_engine
+from typing import List
+
+from sqlalchemy import Column, INT, create_engine, make_url
+from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncEngine, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, declared_attr, sessionmaker
 from src.settings import SETTINGS
+from .monitoring import instrument_engine
+from .pool import InstrumentedQueuePool
+
+
+def create_pooled_engine(url: str) -> AsyncEngine:
+    """
+    Асинхронный движок на asyncpg, через который работают обработчики API.
+    Пул настраивается через Settings и замеряет время ожидания соединения
+    :param url:
+    :return:
+    """
+    return create_async_engine(
+        url=make_url(url).set(drivername="postgresql+asyncpg"),
+        poolclass=InstrumentedQueuePool,
+        pool_size=SETTINGS.DB_POOL_SIZE,
+        max_overflow=SETTINGS.DB_MAX_OVERFLOW,
+        pool_timeout=SETTINGS.DB_POOL_TIMEOUT,
+        pool_recycle=SETTINGS.DB_POOL_RECYCLE,
+        pool_pre_ping=SETTINGS.DB_POOL_PRE_PING,
+        pool_use_lifo=SETTINGS.DB_POOL_USE_LIFO
+    )
 
 
-class Base(DeclarativeBase):
+class Base(AsyncAttrs, DeclarativeBase):
     """
     Базовая модель для всех других моделей БД
     """
     # ID таблицы
     id = Column(INT, primary_key=True)
 
+    # Синхронный движок, используется только миграциями Alembic
     engine = create_engine(url=SETTINGS.DATABASE_URL.unicode_string())
     session = sessionmaker(bind=engine)
 
+    # Асинхронный движок основной БД, через который идут все записи и чтения без реплик
+    async_engine = create_pooled_engine(url=SETTINGS.DATABASE_URL.unicode_string())
+    # Объекты не сбрасываются после коммита, чтобы их можно было вернуть без повторного SELECT
+    async_session = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+    @classmethod
+    def public_columns(cls) -> List[Column]:
+        """
+        Колонки таблицы, которые отдаёт API, без служебных, например поисковых векторов
+        :return:
+        """
+        return [column for column in cls.__table__.columns if not column.info.get("internal")]
+
     @declared_attr
     def __tablename__(cls) -> str:
         return ''.join(f'_{i.lower()}' if i.isupper() else i for i in cls.__name__).strip('_')
+
+
+# Счётчики запросов на HTTP-запрос, лог медленных запросов и бюджет запросов для обоих движков
+instrument_engine(engine=Base.engine)
+instrument_engine(engine=Base.async_engine.sync_engine)
@@ -0,0 +1,30 @@
+from typing import List, Optional, Tuple, Type
+
+from sqlalchemy import RowMapping, any_, literal
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.base import Base
+from src.database.fields import select_fields
+from src.types.batch import BatchKey, BatchKeys
+
+
+async def fetch_batch(session: AsyncSession, model: Type[Base], keys: BatchKeys,
+                      fields: Optional[Tuple[str, ...]] = None) -> Tuple[List[RowMapping], List[BatchKey]]:
+    """
+    Получение записей по списку ID или слагов одним запросом WHERE key = ANY(:keys).
+    Записи возвращаются в порядке переданных ключей вместе с ключами ненайденных записей
+    :param session:
+    :param model:
+    :param keys:
+    :param fields:
+    :return:
+    """
+    name = "id" if keys.ids is not None else "slug"
+    column = getattr(model, name)
+    # Ключ нужен, чтобы разложить строки в порядке запроса, поэтому достаём его, даже если он не выбран в fields
+    statement = select_fields(model=model, fields=None if fields is None else (*fields, name))
+    # Массив передаётся одним параметром, поэтому запрос одинаков при любом количестве ключей
+    statement = statement.where(column == any_(literal(keys.keys, type_=ARRAY(column.type))))
+    rows = {row[name]: row for row in (await session.execute(statement)).mappings()}
+    return [rows[key] for key in keys.keys if key in rows], [key for key in keys.keys if key not in rows]
@@ -0,0 +1,152 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple, Type
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.types.base import DTO
+from src.types.bulk import BulkItemError, BulkResult, BulkDeleteResult
+from .base import Base
+
+# Строка на запись: позиция записи в присланном списке и значения колонок
+Row = Tuple[int, Dict[str, Any]]
+
+
+def _collect_errors(messages: Dict[int, List[str]]) -> List[BulkItemError]:
+    """
+    Преобразование сообщений об ошибках в схемы ошибок записей
+    :param messages:
+    :return:
+    """
+    return [BulkItemError(index=index, errors=errors) for index, errors in sorted(messages.items())]
+
+
+async def _check_references(session: AsyncSession, model: Type[Base], rows: List[Row],
+                            messages: Dict[int, List[str]]) -> List[Row]:
+    """
+    Отбрасывание записей со ссылками на несуществующие связанные записи.
+    Одна проверка на каждый внешний ключ модели вместо нарушения ограничения, откатывающего всю пачку
+    :param session:
+    :param model:
+    :param rows:
+    :param messages:
+    :return:
+    """
+    for foreign_key in model.__table__.foreign_keys:
+        column, referenced = foreign_key.parent, foreign_key.column
+        ids = {values[column.key] for _, values in rows}
+        # Если проверять нечего
+        if not ids:
+            continue
+        # Достаём существующие связанные записи одним запросом
+        existing = set(await session.scalars(select(referenced).where(referenced.in_(ids))))
+        for index, values in rows:
+            if values[column.key] not in existing:
+                messages[index].append(f"{column.key}: Связанная запись не найдена")
+    return [(index, values) for index, values in rows if index not in messages]
+
+
+def _collect_messages(errors: List[BulkItemError]) -> Dict[int, List[str]]:
+    """
+    Сообщения об ошибках записей по их позициям
+    :param errors:
+    :return:
+    """
+    return defaultdict(list, {error.index: list(error.errors) for error in errors})
+
+
+async def bulk_create(session: AsyncSession, model: Type[Base], detail: Type[DTO], forms: List[Tuple[int, DTO]],
+                      errors: List[BulkItemError]) -> BulkResult:
+    """
+    Массовое добавление записей одним многострочным INSERT ... ON CONFLICT DO NOTHING RETURNING и одним коммитом
+    :param session:
+    :param model:
+    :param detail:
+    :param forms:
+    :param errors:
+    :return:
+    """
+    # Продолжаем копить ошибки после валидации
+    messages = _collect_messages(errors=errors)
+    # Валидируем через основную схему представления, чтобы сгенерировать слаги
+    rows = [(index, detail(**form.model_dump()).model_dump(exclude={"id"})) for index, form in forms]
+    rows = await _check_references(session=session, model=model, rows=rows, messages=messages)
+    # Записи сопоставляются с результатом INSERT по слагу, поэтому повторы внутри списка отбрасываем заранее
+    slugs = set()
+    for index, values in rows:
+        if values["slug"] in slugs:
+            messages[index].append("Запись с такими данными уже есть в списке")
+        slugs.add(values["slug"])
+    rows = [(index, values) for index, values in rows if index not in messages]
+    # Если добавлять нечего
+    if not rows:
+        return BulkResult[detail](items=[], errors=_collect_errors(messages=messages))
+    # Записи, нарушающие уникальность, пропускаются базой, а не откатывают всю пачку
+    result = await session.execute(
+        insert(model).on_conflict_do_nothing().returning(model.id, model.slug),
+        [values for _, values in rows]
+    )
+    ids = {slug: obj_id for obj_id, slug in result}
+    # Сохраняем изменения в БД
+    await session.commit()
+    items = []
+    for index, values in rows:
+        # Если запись не вернулась из INSERT, она нарушила уникальность
+        if values["slug"] not in ids:
+            messages[index].append("Запись с такими данными уже существует")
+            continue
+        items.append(detail(id=ids[values["slug"]], **values))
+    return BulkResult[detail](items=items, errors=_collect_errors(messages=messages))
+
+
+async def bulk_update(session: AsyncSession, model: Type[Base], detail: Type[DTO], forms: List[Tuple[int, DTO]],
+                      errors: List[BulkItemError]) -> BulkResult:
+    """
+    Массовое обновление записей одним UPDATE по первичному ключу (executemany) и одним коммитом.
+    Нарушение уникальности откатывает всю пачку и отдаётся общим обработчиком как 409
+    :param session:
+    :param model:
+    :param detail:
+    :param forms:
+    :param errors:
+    :return:
+    """
+    # Продолжаем копить ошибки после валидации
+    messages = _collect_messages(errors=errors)
+    # Валидируем через основную схему представления, чтобы пересчитать слаги
+    rows = [(index, detail(**form.model_dump()).model_dump()) for index, form in forms]
+    # Достаём существующие записи одним запросом
+    existing = set(await session.scalars(select(model.id).where(model.id.in_({values["id"] for _, values in rows}))))
+    ids = set()
+    for index, values in rows:
+        if values["id"] not in existing:
+            messages[index].append("id: Запись не найдена")
+        elif values["id"] in ids:
+            messages[index].append("id: Запись уже есть в списке")
+        ids.add(values["id"])
+    rows = [(index, values) for index, values in rows if index not in messages]
+    rows = await _check_references(session=session, model=model, rows=rows, messages=messages)
+    # Если обновлять нечего
+    if not rows:
+        return BulkResult[detail](items=[], errors=_collect_errors(messages=messages))
+    # Обновляем все записи по первичному ключу
+    await session.execute(update(model), [values for _, values in rows])
+    # Сохраняем изменения в БД
+    await session.commit()
+    return BulkResult[detail](items=[detail(**values) for _, values in rows], errors=_collect_errors(messages=messages))
+
+
+async def bulk_delete(session: AsyncSession, model: Type[Base], ids: List[int]) -> BulkDeleteResult:
+    """
+    Массовое удаление записей одним DELETE ... RETURNING и одним коммитом
+    :param session:
+    :param model:
+    :param ids:
+    :return:
+    """
+    # Удаляем все записи и получаем ID действительно удалённых
+    deleted = set(await session.scalars(delete(model).where(model.id.in_(ids)).returning(model.id)))
+    # Сохраняем изменения в БД
+    await session.commit()
+    return BulkDeleteResult(deleted=sorted(deleted), not_found=sorted(set(ids) - deleted))
@@ -0,0 +1,104 @@
+from datetime import date
+from decimal import Decimal
+from itertools import chain
+from typing import Any, Dict, Optional, Type
+
+from sqlalchemy import DATE, TEXT, ColumnElement, ScalarSelect, and_, cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.base import Base
+from src.database.models import Author, Character, Comics, ComicsAuthors, ComicsCharacters, Device, Sweet, Toy, Universe
+from src.types import AuthorDetail, CharacterDetail, ComicsDetail, DeviceDetail, SweetDetail, ToyDetail, UniverseDetail
+from src.types.base import DTO
+from src.types.fields import json_type
+
+# Приведения колонок, после которых PostgreSQL отдаёт значение в JSON так же, как схема представления:
+# Decimal строкой, а дату без времени
+JSON_CASTS: Dict[Any, Any] = {Decimal: TEXT, date: DATE}
+
+
+def json_object(detail: Type[DTO], model: Type[Base], **nested: ColumnElement) -> ColumnElement:
+    """
+    Выражение json_build_object с полями схемы представления из колонок модели в порядке схемы
+    и вложенными документами после них
+    :param detail:
+    :param model:
+    :param nested:
+    :return:
+    """
+    values: Dict[str, ColumnElement] = {}
+    for name, field in detail.model_fields.items():
+        column = getattr(model, name)
+        sql_type = JSON_CASTS.get(json_type(annotation=field.annotation))
+        values[name] = column if sql_type is None else cast(column, sql_type)
+    values.update(nested)
+    # Имена полей берутся из схемы, а не из запроса клиента, поэтому подставляются в SQL как есть
+    return func.json_build_object(*chain.from_iterable(
+        (literal_column(f"'{name}'"), value) for name, value in values.items()
+    ))
+
+
+def json_related(detail: Type[DTO], model: Type[Base], where: ColumnElement) -> ScalarSelect:
+    """
+    Подзапрос документа одной связанной записи
+    :param detail:
+    :param model:
+    :param where:
+    :return:
+    """
+    return select(json_object(detail=detail, model=model)).where(where).scalar_subquery()
+
+
+def json_array(detail: Type[DTO], model: Type[Base], where: ColumnElement) -> ScalarSelect:
+    """
+    Подзапрос массива документов связанных записей в порядке ID. Без записей - пустой массив, а не NULL
+    :param detail:
+    :param model:
+    :param where:
+    :return:
+    """
+    documents = func.json_agg(aggregate_order_by(json_object(detail=detail, model=model), model.id))
+    return select(func.coalesce(documents, literal_column("'[]'::json"))).where(where).scalar_subquery()
+
+
+# Документ страницы персонажа: персонаж, его вселенная, автор и товары
+CHARACTER_DOCUMENT = json_object(
+    detail=CharacterDetail,
+    model=Character,
+    universe=json_related(detail=UniverseDetail, model=Universe, where=Universe.id == Character.universe_id),
+    author=json_related(detail=AuthorDetail, model=Author, where=Author.id == Character.author_id),
+    devices=json_array(detail=DeviceDetail, model=Device, where=Device.character_id == Character.id),
+    sweets=json_array(detail=SweetDetail, model=Sweet, where=Sweet.character_id == Character.id),
+    toys=json_array(detail=ToyDetail, model=Toy, where=Toy.character_id == Character.id),
+)
+
+# Документ страницы комикса: комикс, его авторы и персонажи
+COMICS_DOCUMENT = json_object(
+    detail=ComicsDetail,
+    model=Comics,
+    authors=json_array(
+        detail=AuthorDetail,
+        model=Author,
+        where=and_(Author.id == ComicsAuthors.author_id, ComicsAuthors.comics_id == Comics.id)
+    ),
+    characters=json_array(
+        detail=CharacterDetail,
+        model=Character,
+        where=and_(Character.id == ComicsCharacters.character_id, ComicsCharacters.comics_id == Comics.id)
+    ),
+)
+
+
+async def fetch_document(session: AsyncSession, document: ColumnElement, model: Type[Base],
+                         obj_id: int) -> Optional[str]:
+    """
+    Документ записи, собранный PostgreSQL одним запросом. Документ приходит готовым текстом JSON,
+    поэтому отдаётся клиенту без разбора, ORM-объектов и валидации
+    :param session:
+    :param document:
+    :param model:
+    :param obj_id:
+    :return:
+    """
+    return await session.scalar(select(cast(document, TEXT)).where(model.id == obj_id))
@@ -0,0 +1,23 @@
+from enum import Enum
+from typing import Optional, Tuple, Type
+
+from sqlalchemy import Select, select
+
+from src.database.base import Base
+from src.types.filters import sort_key
+
+
+def select_fields(model: Type[Base], fields: Optional[Tuple[str, ...]] = None, sort: Optional[Enum] = None) -> Select:
+    """
+    Запрос строк таблицы без ORM-объектов: только выбранных полей и ключей курсора страницы - ID и поля сортировки.
+    Без выбора полей запрашиваются все колонки, которые отдаёт API
+    :param model:
+    :param fields:
+    :param sort:
+    :return:
+    """
+    # Если поля не выбраны, запрашиваем запись целиком
+    if fields is None:
+        return select(*model.public_columns())
+    keys = ("id",) if sort is None else ("id", sort_key(sort=sort)[0])
+    return select(*(getattr(model, name) for name in dict.fromkeys((*fields, *keys))))
@@ -0,0 +1,53 @@
+from functools import lru_cache
+from operator import eq, ge, le
+from typing import Any, Type
+
+from pydantic import TypeAdapter
+from sqlalchemy import Column, Select
+
+from src.database.models import Base
+from src.types.filters import ListFilter
+
+# Сравнения по суффиксу имени фильтра, фильтры без суффикса сравниваются на равенство
+RANGE_SUFFIXES = (("_min", ge), ("_max", le), ("_from", ge), ("_to", le))
+
+
+@lru_cache
+def _adapter(python_type: type) -> TypeAdapter:
+    """
+    Адаптер приведения значения к типу Python колонки, один на тип
+    :param python_type:
+    :return:
+    """
+    return TypeAdapter(python_type)
+
+
+def coerce_to_column(column: Column, value: Any) -> Any:
+    """
+    Приведение значения к типу колонки. asyncpg не приводит типы параметров сам: дату для TIMESTAMP нужно
+    передать как datetime, а строку из курсора - как дату или число
+    :param column:
+    :param value:
+    :return:
+    """
+    return _adapter(python_type=column.type.python_type).validate_python(value)
+
+
+def apply_filters(statement: Select, model: Type[Base], filters: ListFilter) -> Select:
+    """
+    Добавление условий переданных фильтров к запросу списка записей
+    :param statement:
+    :param model:
+    :param filters:
+    :return:
+    """
+    for name, value in filters.model_dump(exclude_none=True, exclude={"sort"}).items():
+        # Определяем колонку и сравнение по суффиксу имени фильтра
+        compare = eq
+        for suffix, range_compare in RANGE_SUFFIXES:
+            if name.endswith(suffix):
+                name, compare = name.removesuffix(suffix), range_compare
+                break
+        column = getattr(model, filters.FILTER_COLUMNS.get(name, name))
+        statement = statement.where(compare(column, coerce_to_column(column=column, value=value)))
+    return statement
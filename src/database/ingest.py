@@ -0,0 +1,269 @@
+"""
+Потоковая загрузка CSV/NDJSON файлов в таблицы БД через COPY FROM STDIN.
+
+Пример:
+    python -m src.database.ingest character characters.csv
+    python -m src.database.ingest toy toys.ndjson --keep-ids
+"""
+from argparse import ArgumentParser
+from csv import DictReader, writer
+from io import StringIO
+from itertools import islice
+from pathlib import Path
+from sys import stdin
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple, Type
+
+from orjson import loads
+from psycopg2.errors import QueryCanceled
+from pydantic import ValidationError
+from sqlalchemy import Connection, Table, select
+
+from src.types.base import DTO
+from src.types.character import CharacterDetail
+from src.types.comics import ComicsDetail
+from src.types.comics_author import ComicsAuthorsDetail
+from src.types.comics_character import ComicsCharacterDetail
+from src.types.device import DeviceDetail
+from src.types.export import ExportFormat
+from src.types.sweet import SweetDetail
+from src.types.toy import ToyDetail
+from src.types.universe import UniverseDetail
+from src.types.аuthor import AuthorDetail
+from .base import Base
+from .models import Universe, Author, Character, Comics, Device, Toy, Sweet, ComicsAuthors, ComicsCharacters
+
+# Таблицы, доступные для загрузки, в порядке зависимостей, и схемы, которыми валидируются их строки
+INGEST_TABLES: Dict[str, Tuple[Type[Base], Type[DTO]]] = {
+    model.__tablename__: (model, detail) for model, detail in (
+        (Universe, UniverseDetail),
+        (Author, AuthorDetail),
+        (Character, CharacterDetail),
+        (Comics, ComicsDetail),
+        (Device, DeviceDetail),
+        (Toy, ToyDetail),
+        (Sweet, SweetDetail),
+        (ComicsAuthors, ComicsAuthorsDetail),
+        (ComicsCharacters, ComicsCharacterDetail),
+    )
+}
+# Количество строк, для которых внешние ключи разрешаются одним запросом
+INGEST_CHUNK_SIZE = 10000
+# Размер куска, который psycopg2 запрашивает у потока при COPY
+COPY_BUFFER_SIZE = 1 << 16
+
+
+class IngestError(Exception):
+    """
+    Ошибка загрузки конкретной строки входного файла
+    """
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f"Строка {line}: {message}")
+
+
+class CopyStream:
+    """
+    Файлоподобный объект для COPY FROM STDIN, отдающий строки CSV по мере чтения входного файла
+    """
+
+    def __init__(self, lines: Iterator[str]):
+        self._lines = lines
+        # Ошибка входного файла, из-за которой psycopg2 прервал COPY
+        self.error: Optional[IngestError] = None
+
+    def read(self, size: int = -1) -> str:
+        """
+        Чтение очередного куска данных COPY. Кусок может быть больше size: psycopg2 отправляет его целиком
+        :param size:
+        :return:
+        """
+        chunk, length = [], 0
+        try:
+            for line in self._lines:
+                chunk.append(line)
+                length += len(line)
+                if 0 <= size <= length:
+                    break
+        except IngestError as exc:
+            # psycopg2 превращает любое исключение из read() в отмену COPY, поэтому запоминаем исходную ошибку
+            self.error = exc
+            raise
+        return "".join(chunk)
+
+
+def _read_rows(file: TextIO, input_format: ExportFormat) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Чтение строк входного файла с номерами строк
+    :param file:
+    :param input_format:
+    :return:
+    """
+    # Если файл в CSV
+    if input_format is ExportFormat.CSV:
+        reader = DictReader(file)
+        for row in reader:
+            # Пустые ячейки CSV считаем отсутствующими значениями
+            yield reader.line_num, {key: value for key, value in row.items() if value != ""}
+    # В другом случае файл в NDJSON
+    else:
+        for line_num, line in enumerate(file, start=1):
+            # Пропускаем пустые строки
+            if line.strip():
+                yield line_num, loads(line)
+
+
+def _resolve_slugs(lookup: Connection, table: Table, chunk: List[Tuple[int, Dict[str, Any]]],
+                   resolved: Dict[Tuple[str, str], int]) -> None:
+    """
+    Замена слагов связанных записей (поле <связь>_slug) на их ID одним запросом на внешний ключ
+    :param lookup:
+    :param table:
+    :param chunk:
+    :param resolved:
+    :return:
+    """
+    for foreign_key in table.foreign_keys:
+        column, referenced = foreign_key.parent, foreign_key.column
+        # Разрешать по слагу можно только связи с таблицами, у которых есть слаг
+        if "slug" not in referenced.table.c:
+            continue
+        slug_key = column.key.removesuffix("_id") + "_slug"
+        # Достаём слаги, которые ещё не встречались в предыдущих пачках
+        missing = {
+            row[slug_key] for _, row in chunk
+            if column.key not in row and slug_key in row and (referenced.table.name, row[slug_key]) not in resolved
+        }
+        if missing:
+            statement = select(referenced.table.c.slug, referenced).where(referenced.table.c.slug.in_(missing))
+            for slug, obj_id in lookup.execute(statement):
+                resolved[(referenced.table.name, slug)] = obj_id
+        for line_num, row in chunk:
+            if column.key in row or slug_key not in row:
+                continue
+            obj_id = resolved.get((referenced.table.name, row.pop(slug_key)))
+            # Если связанная запись не найдена
+            if obj_id is None:
+                raise IngestError(line=line_num, message=f"{slug_key}: Связанная запись не найдена")
+            row[column.key] = obj_id
+
+
+def _csv_lines(rows: Iterator[Tuple[int, Dict[str, Any]]], lookup: Connection, model: Type[Base], detail: Type[DTO],
+               columns: List[str], keep_ids: bool) -> Iterator[str]:
+    """
+    Генератор строк CSV для COPY: разрешение связей, валидация и генерация слагов пачками
+    :param rows:
+    :param lookup:
+    :param model:
+    :param detail:
+    :param columns:
+    :param keep_ids:
+    :return:
+    """
+    resolved: Dict[Tuple[str, str], int] = {}
+    buffer = StringIO()
+    csv_writer = writer(buffer)
+    while chunk := list(islice(rows, INGEST_CHUNK_SIZE)):
+        _resolve_slugs(lookup=lookup, table=model.__table__, chunk=chunk, resolved=resolved)
+        for line_num, row in chunk:
+            # Если ID не сохраняются, их выдаёт последовательность таблицы
+            if not keep_ids:
+                row.pop("id", None)
+            try:
+                # Валидируем строку основной схемой представления, она же генерирует слаг
+                values = detail.model_validate(obj=row).model_dump(mode="json")
+            except ValidationError as exc:
+                messages = [f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors()]
+                raise IngestError(line=line_num, message="; ".join(messages))
+            csv_writer.writerow([values[column] for column in columns])
+        yield buffer.getvalue()
+        # Очищаем буфер для следующей пачки
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def ingest(table_name: str, file: TextIO, input_format: ExportFormat, keep_ids: bool = False) -> int:
+    """
+    Загрузка файла в таблицу одной командой COPY в одной транзакции
+    :param table_name:
+    :param file:
+    :param input_format:
+    :param keep_ids:
+    :return:
+    """
+    model, detail = INGEST_TABLES[table_name]
+    table = model.__table__
+    # Колонку ID не передаём, если ID не нужно сохранять: их выдаёт последовательность таблицы.
+    # Колонку ищем по имени, так как у таблиц связей она только часть составного первичного ключа
+    id_column = table.c.id
+    columns = [
+        column.key for column in table.columns
+        if column.key in detail.model_fields and (keep_ids or column is not id_column)
+    ]
+    # Связи разрешаются отдельным соединением, так как основное занято COPY
+    with Base.engine.connect() as lookup:
+        connection = Base.engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                stream = CopyStream(lines=_csv_lines(
+                    rows=_read_rows(file=file, input_format=input_format), lookup=lookup, model=model, detail=detail,
+                    columns=columns, keep_ids=keep_ids
+                ))
+                try:
+                    cursor.copy_expert(
+                        sql=f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                        file=stream,
+                        size=COPY_BUFFER_SIZE
+                    )
+                except QueryCanceled:
+                    # Если COPY прервала ошибка во входном файле, выдаём её вместо отмены запроса
+                    if stream.error is not None:
+                        raise stream.error from None
+                    raise
+                count = cursor.rowcount
+                # Если ID загружены из файла, сдвигаем последовательность за максимальный из них
+                if keep_ids:
+                    cursor.execute(
+                        f"SELECT setval(pg_get_serial_sequence('{table.name}', '{id_column.name}'), "
+                        f"(SELECT coalesce(max({id_column.name}), 1) FROM {table.name}))"
+                    )
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Точка входа командной строки
+    :param argv:
+    :return:
+    """
+    parser = ArgumentParser(description="Загрузка CSV/NDJSON файла в таблицу через COPY FROM STDIN")
+    parser.add_argument("table", choices=list(INGEST_TABLES), help="Таблица для загрузки")
+    parser.add_argument("file", help="Путь до файла или - для чтения из stdin")
+    parser.add_argument(
+        "--format", dest="input_format", choices=[export_format.value for export_format in ExportFormat],
+        help="Формат файла, по умолчанию определяется по расширению"
+    )
+    parser.add_argument("--keep-ids", action="store_true", help="Сохранить ID из файла, например при восстановлении")
+    args = parser.parse_args(argv)
+    # Определяем формат по расширению файла, если он не передан явно
+    input_format = ExportFormat(args.input_format or ("csv" if args.file.endswith(".csv") else "ndjson"))
+    try:
+        # Если файл читается из stdin
+        if args.file == "-":
+            count = ingest(table_name=args.table, file=stdin, input_format=input_format, keep_ids=args.keep_ids)
+        # В другом случае открываем файл
+        else:
+            with Path(args.file).open(encoding="utf-8", newline="") as file:
+                count = ingest(table_name=args.table, file=file, input_format=input_format, keep_ids=args.keep_ids)
+    except IngestError as exc:
+        parser.exit(status=1, message=f"{exc}\n")
+    print(f"Загружено записей в таблицу {args.table}: {count}")
+
+
+if __name__ == "__main__":
+    main()
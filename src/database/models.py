@@ -1,8 +1,53 @@
+from typing import Tuple
+
 from .base import Base
-from sqlalchemy import Column, CHAR, VARCHAR, CheckConstraint, SMALLINT, ForeignKey, INT, TIMESTAMP
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column, CHAR, VARCHAR, CheckConstraint, SMALLINT, ForeignKey, INT, TIMESTAMP, Index, Computed, FetchedValue
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from ulid import new
 
+# Конфигурации полнотекстового поиска: названия в каталоге бывают и на русском, и на английском
+SEARCH_CONFIGS = ("russian", "english")
+
+
+def search_vector_column(column: str) -> Column:
+    """
+    Генерируемая колонка поискового вектора по названию. Вектор хранится в таблице и пересчитывается самой БД,
+    поэтому ранжирование не разбирает текст заново. ORM не загружает колонку, а API её не отдаёт
+    :param column:
+    :return:
+    """
+    expression = " || ".join(f"to_tsvector('{config}', {column})" for config in SEARCH_CONFIGS)
+    return deferred(Column(TSVECTOR, Computed(sqltext=expression, persisted=True), nullable=False,
+                           info={"internal": True}))
+
+
+def search_indexes(table: str, column: str) -> Tuple[Index, ...]:
+    """
+    Индексы поиска: GIN по поисковому вектору и триграммные GIN по названию и слагу для неточных совпадений
+    :param table:
+    :param column:
+    :return:
+    """
+    return (
+        Index(f"ix_{table}_search_vector", "search_vector", postgresql_using="gin"),
+        Index(f"ix_{table}_{column}_trgm", column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"}),
+        Index(f"ix_{table}_slug_trgm", "slug", postgresql_using="gin", postgresql_ops={"slug": "gin_trgm_ops"}),
+    )
+
+
+def product_universe_id_column() -> Column:
+    """
+    Вселенная товара, скопированная из его персонажа. Колонку заполняет и поддерживает триггер БД при изменении
+    персонажа товара или вселенной персонажа, поэтому товары вселенной отбираются одним сканированием индекса без
+    соединения с персонажами. API колонку не принимает и не отдаёт
+    :return:
+    """
+    return Column(SMALLINT, nullable=False, server_default=FetchedValue(), server_onupdate=FetchedValue(),
+                  info={"internal": True})
+
 
 class User(Base):
     """
@@ -34,7 +79,7 @@ class Universe(Base):
     slug = Column(VARCHAR(length=128), nullable=False, unique=True)
     title = Column(VARCHAR(length=64), nullable=False, unique=True)
     date_created = Column(TIMESTAMP, nullable=False, unique=True)
-    characters = relationship(argument="Character", back_populates="universe")
+    characters = relationship(argument="Character", back_populates="universe", passive_deletes=True)
 
     def __repr__(self):
         return f"{self.title}"
@@ -44,10 +89,11 @@ class ComicsAuthors(Base):
     """
     Промежуточная таблица между моделями комикса и автора
     """
-    id = Column(SMALLINT, primary_key=True, nullable=False)
-    comics_id = Column(SMALLINT, ForeignKey("comics.id", ondelete="NO ACTION"), primary_key=True, nullable=False,
+    # ID выдаёт последовательность, хотя он только часть составного первичного ключа
+    id = Column(SMALLINT, primary_key=True, autoincrement=True, nullable=False)
+    comics_id = Column(SMALLINT, ForeignKey("comics.id", ondelete="CASCADE"), primary_key=True, nullable=False,
                        index=True)
-    author_id = Column(SMALLINT, ForeignKey("author.id", ondelete="NO ACTION"), primary_key=True, nullable=False,
+    author_id = Column(SMALLINT, ForeignKey("author.id", ondelete="CASCADE"), primary_key=True, nullable=False,
                        index=True)
 
 
@@ -55,10 +101,11 @@ class ComicsCharacters(Base):
     """
     Промежуточная таблица между моделями комикса и персонажа
     """
-    id = Column(SMALLINT, primary_key=True, nullable=False)
-    comics_id = Column(SMALLINT, ForeignKey("comics.id", ondelete="NO ACTION"), primary_key=True, nullable=False,
+    # ID выдаёт последовательность, хотя он только часть составного первичного ключа
+    id = Column(SMALLINT, primary_key=True, autoincrement=True, nullable=False)
+    comics_id = Column(SMALLINT, ForeignKey("comics.id", ondelete="CASCADE"), primary_key=True, nullable=False,
                        index=True)
-    character_id = Column(SMALLINT, ForeignKey("character.id", ondelete="NO ACTION"), primary_key=True, nullable=False,
+    character_id = Column(SMALLINT, ForeignKey("character.id", ondelete="CASCADE"), primary_key=True, nullable=False,
                           index=True)
 
 
@@ -77,8 +124,8 @@ class Author(Base):
     name = Column(VARCHAR(length=64), nullable=False, unique=True)
     surname = Column(VARCHAR(length=64), nullable=False, unique=True)
     birthday = Column(TIMESTAMP, nullable=False)
-    characters = relationship(argument="Character", back_populates="author")
-    comics = relationship("Comics", secondary=ComicsAuthors.__table__, back_populates="authors")
+    characters = relationship(argument="Character", back_populates="author", passive_deletes=True)
+    comics = relationship("Comics", secondary=ComicsAuthors.__table__, back_populates="authors", passive_deletes=True)
 
     def __repr__(self):
         return f"{self.name}"
@@ -92,12 +139,14 @@ class Character(Base):
         CheckConstraint('char_length(name) >= 2'),
         CheckConstraint('char_length(role) >= 4'),
         CheckConstraint('char_length(power) >= 4'),
-        CheckConstraint('char_length(slug) >= 4')
+        CheckConstraint('char_length(slug) >= 4'),
+        *search_indexes(table="character", column="name"),
     )
 
     id = Column(SMALLINT, primary_key=True, nullable=False)
     slug = Column(VARCHAR(length=128), nullable=False, unique=True)
-    name = Column(VARCHAR(length=64), nullable=False)
+    name = Column(VARCHAR(length=64), nullable=False, unique=True)
+    search_vector = search_vector_column(column="name")
     date_created = Column(TIMESTAMP, nullable=False)
     role = Column(VARCHAR(length=64), nullable=False)
     power = Column(VARCHAR(length=128), nullable=False)
@@ -105,10 +154,11 @@ class Character(Base):
     universe = relationship(argument="Universe", back_populates="characters")
     author_id = Column(SMALLINT, ForeignKey(column="author.id", ondelete="CASCADE"), nullable=False, index=True)
     author = relationship(argument="Author", back_populates="characters")
-    devices = relationship(argument="Device", back_populates="character")
-    sweets = relationship(argument="Sweet", back_populates="character")
-    toys = relationship(argument="Toy", back_populates="character")
-    comics = relationship(argument="Comics", secondary=ComicsCharacters.__table__, back_populates="characters")
+    devices = relationship(argument="Device", back_populates="character", passive_deletes=True)
+    sweets = relationship(argument="Sweet", back_populates="character", passive_deletes=True)
+    toys = relationship(argument="Toy", back_populates="character", passive_deletes=True)
+    comics = relationship(argument="Comics", secondary=ComicsCharacters.__table__, back_populates="characters",
+                          passive_deletes=True)
 
     def __repr__(self):
         return f"{self.name}"
@@ -121,18 +171,25 @@ class Comics(Base):
     __table_args__ = (
         CheckConstraint('char_length(title) >= 4'),
         CheckConstraint('char_length(country) >= 4'),
-        CheckConstraint('char_length(slug) >= 4')
+        CheckConstraint('char_length(slug) >= 4'),
+        # Составные индексы под фильтры и сортировки списка: ID в конце индекса - ключ курсора страницы
+        Index("ix_comics_price_id", "price", "id"),
+        Index("ix_comics_date_created_id", "date_created", "id"),
+        Index("ix_comics_country_date_created_id", "country", "date_created", "id"),
+        *search_indexes(table="comics", column="title"),
     )
 
     id = Column(SMALLINT, primary_key=True)
     slug = Column(VARCHAR(length=128), nullable=False, unique=True)
     title = Column(VARCHAR(length=128), nullable=False, unique=True)
+    search_vector = search_vector_column(column="title")
     volume = Column(INT, nullable=False)
     date_created = Column(TIMESTAMP, nullable=False)
     price = Column(INT, nullable=False)
     country = Column(VARCHAR(length=64), nullable=False)
-    authors = relationship("Author", secondary=ComicsAuthors.__table__, back_populates="comics")
-    characters = relationship(argument="Character", secondary=ComicsCharacters.__table__, back_populates="comics")
+    authors = relationship("Author", secondary=ComicsAuthors.__table__, back_populates="comics", passive_deletes=True)
+    characters = relationship(argument="Character", secondary=ComicsCharacters.__table__, back_populates="comics",
+                              passive_deletes=True)
 
     def __repr__(self):
         return f"{self.title}"
@@ -146,14 +203,23 @@ class Device(Base):
         CheckConstraint('char_length(slug) >= 4'),
         CheckConstraint('char_length(title) >= 4'),
         CheckConstraint('char_length(type_of_device) >= 4'),
+        # Составные индексы под фильтры и сортировки списка: ID в конце индекса - ключ курсора страницы
+        Index("ix_device_price_id", "price", "id"),
+        Index("ix_device_character_id_price_id", "character_id", "price", "id"),
+        Index("ix_device_universe_id_id", "universe_id", "id"),
+        Index("ix_device_universe_id_price_id", "universe_id", "price", "id"),
+        Index("ix_device_type_of_device_price_id", "type_of_device", "price", "id"),
+        *search_indexes(table="device", column="title"),
     )
 
-    id = Column(SMALLINT, primary_key=True)
+    id = Column(INT, primary_key=True)
     slug = Column(VARCHAR(length=128), nullable=False, unique=True)
     title = Column(VARCHAR(length=128), nullable=False, unique=True)
+    search_vector = search_vector_column(column="title")
     type_of_device = Column(VARCHAR(length=64), nullable=False)
     price = Column(INT, nullable=False)
     character_id = Column(SMALLINT, ForeignKey(column="character.id", ondelete="CASCADE"), nullable=False, index=True)
+    universe_id = product_universe_id_column()
     character = relationship(argument="Character", back_populates="devices")
 
     def __repr__(self):
@@ -166,15 +232,23 @@ class Sweet(Base):
     """
     __table_args__ = (
         CheckConstraint('char_length(slug) >= 4'),
-        CheckConstraint('char_length(title) >= 4')
+        CheckConstraint('char_length(title) >= 4'),
+        # Составные индексы под фильтры и сортировки списка: ID в конце индекса - ключ курсора страницы
+        Index("ix_sweet_price_id", "price", "id"),
+        Index("ix_sweet_character_id_price_id", "character_id", "price", "id"),
+        Index("ix_sweet_universe_id_id", "universe_id", "id"),
+        Index("ix_sweet_universe_id_price_id", "universe_id", "price", "id"),
+        *search_indexes(table="sweet", column="title"),
     )
 
-    id = Column(SMALLINT, primary_key=True)
+    id = Column(INT, primary_key=True)
     slug = Column(VARCHAR(length=128), nullable=False, unique=True)
     title = Column(VARCHAR(length=128), nullable=False, unique=True)
+    search_vector = search_vector_column(column="title")
     price = Column(INT, nullable=False)
     weight = Column(INT, nullable=False)
     character_id = Column(SMALLINT, ForeignKey(column="character.id", ondelete="CASCADE"), nullable=False, index=True)
+    universe_id = product_universe_id_column()
     character = relationship(argument="Character", back_populates="sweets")
 
     def __repr__(self):
@@ -188,14 +262,24 @@ class Toy(Base):
     __table_args__ = (
         CheckConstraint('char_length(slug) >= 4'),
         CheckConstraint('char_length(title) >= 4'),
-        CheckConstraint('char_length(type_of_toy) >= 4')
+        CheckConstraint('char_length(type_of_toy) >= 4'),
+        # Составные индексы под фильтры и сортировки списка: ID в конце индекса - ключ курсора страницы
+        Index("ix_toy_price_id", "price", "id"),
+        Index("ix_toy_age_id", "age", "id"),
+        Index("ix_toy_character_id_price_id", "character_id", "price", "id"),
+        Index("ix_toy_universe_id_id", "universe_id", "id"),
+        Index("ix_toy_universe_id_price_id", "universe_id", "price", "id"),
+        Index("ix_toy_type_of_toy_price_id", "type_of_toy", "price", "id"),
+        *search_indexes(table="toy", column="title"),
     )
 
-    id = Column(SMALLINT, primary_key=True)
+    id = Column(INT, primary_key=True)
     slug = Column(VARCHAR(length=128), nullable=False, unique=True)
     title = Column(VARCHAR(length=128), nullable=False, unique=True)
+    search_vector = search_vector_column(column="title")
     age = Column(INT, nullable=False)
     type_of_toy = Column(VARCHAR(length=64), nullable=False)
     price = Column(INT, nullable=False)
     character_id = Column(SMALLINT, ForeignKey(column="character.id", ondelete="CASCADE"), nullable=False, index=True)
+    universe_id = product_universe_id_column()
     character = relationship(argument="Character", back_populates="toys")
@@ -0,0 +1,127 @@
+from contextvars import ContextVar
+from logging import getLogger
+from time import perf_counter
+from typing import Any, Optional
+
+from sqlalchemy import Connection, Engine, event
+
+from src.metrics import Scope, route_template
+from src.settings import SETTINGS
+
+# Сколько символов параметров запроса попадает в лог, чтобы массовые запросы не раздували его
+LOGGED_PARAMETERS_LENGTH = 1000
+
+logger = getLogger(__name__)
+
+
+class StatementBudgetExceeded(RuntimeError):
+    """
+    Превышение количества запросов к БД на один HTTP-запрос при STATEMENT_BUDGET_RAISE
+    """
+
+
+class DatabaseUsage:
+    """
+    Счётчики запросов к БД в рамках одного HTTP-запроса
+    """
+    __slots__ = ("scope", "statements", "time")
+
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self.statements = 0
+        self.time = 0.0
+
+
+# Счётчики запросов к БД текущего HTTP-запроса, обработчики событий движка достают их из контекста
+DATABASE_USAGE: ContextVar[Optional[DatabaseUsage]] = ContextVar("DATABASE_USAGE", default=None)
+
+
+def _explain(conn: Connection, statement: str, parameters: Any) -> str:
+    """
+    План выполнения запроса с фактическим временем и буферами. Запрос выполняется ещё раз
+    :param conn:
+    :param statement:
+    :param parameters:
+    :return:
+    """
+    # Курсор драйвера напрямую, чтобы EXPLAIN не попал в события движка и сам не считался запросом
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+        return "\n".join(row[0] for row in cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def _log_slow_statement(conn: Connection, statement: str, parameters: Any, duration: float, route: str,
+                        executemany: bool) -> None:
+    """
+    Запись медленного запроса в лог, при SLOW_QUERY_EXPLAIN - вместе с его планом
+    :param conn:
+    :param statement:
+    :param parameters:
+    :param duration:
+    :param route:
+    :param executemany:
+    :return:
+    """
+    logger.warning(
+        "Медленный запрос к БД (%.3f с) в %s: %s; параметры: %s",
+        duration, route, statement, repr(parameters)[:LOGGED_PARAMETERS_LENGTH]
+    )
+    # Повторно выполнять можно только чтение: EXPLAIN ANALYZE изменяющего запроса применил бы изменения ещё раз
+    if not SETTINGS.SLOW_QUERY_EXPLAIN or executemany or not statement.lstrip().upper().startswith("SELECT"):
+        return
+    plan = _explain(conn=conn, statement=statement, parameters=parameters)
+    logger.warning("План медленного запроса в %s:\n%s", route, plan)
+
+
+def _before_cursor_execute(conn: Connection, *args: Any) -> None:
+    """
+    Запоминание момента начала запроса к БД. Запросы на одном соединении идут строго по очереди
+    :param conn:
+    :param args:
+    :return:
+    """
+    conn.info["statement_started"] = perf_counter()
+
+
+def _after_cursor_execute(conn: Connection, cursor: Any, statement: str, parameters: Any, context: Any,
+                          executemany: bool) -> None:
+    """
+    Учёт завершённого запроса к БД: счётчики текущего HTTP-запроса, лог медленных запросов и бюджет запросов
+    :param conn:
+    :param cursor:
+    :param statement:
+    :param parameters:
+    :param context:
+    :param executemany:
+    :return:
+    """
+    duration = perf_counter() - conn.info.pop("statement_started", perf_counter())
+    usage = DATABASE_USAGE.get()
+    # Запросы вне HTTP-запроса, например загрузка файлов или миграции, относим к процессу целиком
+    route = "-" if usage is None else route_template(scope=usage.scope)
+    if 0 <= SETTINGS.SLOW_QUERY_THRESHOLD <= duration:
+        _log_slow_statement(conn=conn, statement=statement, parameters=parameters, duration=duration, route=route,
+                            executemany=executemany)
+    if usage is None:
+        return
+    usage.statements += 1
+    usage.time += duration
+    # Сообщаем о превышении бюджета один раз на HTTP-запрос, на первом лишнем запросе
+    if usage.statements == SETTINGS.STATEMENT_BUDGET + 1 and SETTINGS.STATEMENT_BUDGET > 0:
+        message = f"{usage.scope['method']} {route} выполнил больше {SETTINGS.STATEMENT_BUDGET} запросов к БД"
+        if SETTINGS.STATEMENT_BUDGET_RAISE:
+            raise StatementBudgetExceeded(message)
+        logger.warning("%s, последний: %s", message, statement)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Подписка на выполнение запросов движком. Для асинхронного движка передаётся его sync_engine
+    :param engine:
+    :return:
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,56 @@
+from enum import Enum
+from typing import List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import Select, Column, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.filters import coerce_to_column
+from src.types.filters import sort_key
+from src.types.pagination import InvalidCursor, Pagination, encode_cursor
+
+
+async def paginate(session: AsyncSession, statement: Select, column: Column, pagination: Pagination,
+                   sort: Optional[Enum] = None) -> Tuple[List, Optional[str]]:
+    """
+    Получение одной страницы строк с помощью курсорной пагинации по ID или по полю сортировки и ID.
+    Для сортировки по полю у модели должен быть составной индекс (поле, id), тогда страница - это отрезок индекса.
+    Запрос должен выбирать колонки, а не ORM-объекты, и среди них - ключи курсора
+    :param session:
+    :param statement:
+    :param column:
+    :param pagination:
+    :param sort:
+    :return:
+    """
+    # Ключи сортировки: ID всегда последний, чтобы порядок был однозначным при одинаковых значениях поля
+    keys, descending = [column], False
+    if sort is not None:
+        name, descending = sort_key(sort=sort)
+        if name != column.key:
+            keys.insert(0, getattr(column.class_, name))
+    # Если передан курсор, продолжаем со следующей после него записи
+    if pagination.after is not None:
+        # Курсор от списка с другой сортировкой не подходит
+        if len(pagination.after) != len(keys):
+            raise InvalidCursor("Курсор получен при другой сортировке списка")
+        try:
+            values = [coerce_to_column(column=key, value=value) for key, value in zip(keys, pagination.after)]
+        except ValidationError:
+            raise InvalidCursor("Невалидный курсор")
+        # Сравнение строк (поле, id) > (значение, id) PostgreSQL выполняет как одно условие по составному индексу
+        if len(keys) == 1:
+            after = keys[0] < values[0] if descending else keys[0] > values[0]
+        else:
+            after = tuple_(*keys) < tuple_(*values) if descending else tuple_(*keys) > tuple_(*values)
+        statement = statement.where(after)
+    # Достаём на одну запись больше размера страницы, чтобы узнать, есть ли следующая страница
+    order_by = [key.desc() for key in keys] if descending else keys
+    rows = (await session.execute(statement.order_by(*order_by).limit(pagination.limit + 1))).all()
+    # Если следующей страницы нет
+    if len(rows) <= pagination.limit:
+        # Возвращаем записи без курсора
+        return list(rows), None
+    # В другом случае отбрасываем лишнюю запись и возвращаем курсор на ключи последней записи страницы
+    rows = rows[:pagination.limit]
+    return list(rows), encode_cursor(*(getattr(rows[-1], key.key) for key in keys))
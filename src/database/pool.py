@@ -0,0 +1,51 @@
+from time import perf_counter
+from typing import Any
+
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+from src.metrics import POOL_WAIT_BUCKETS, Histogram
+from src.types.service import PoolStats
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений асинхронного движка, замеряющий время ожидания соединения.
+    Счётчики у каждого пула свои, чтобы по ним было видно, какому движку не хватает соединений
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # Количество запросов соединения, не дождавшихся его за pool_timeout
+        self.timeouts = 0
+        # Время ожидания соединения из пула
+        self.wait_time = Histogram(buckets=POOL_WAIT_BUCKETS)
+
+    def connect(self) -> PoolProxiedConnection:
+        """
+        Выдача соединения из пула с замером времени ожидания, включая pre-ping и создание нового соединения
+        :return:
+        """
+        started = perf_counter()
+        try:
+            return super().connect()
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.wait_time.observe(perf_counter() - started)
+
+    def stats(self) -> PoolStats:
+        """
+        Текущее состояние пула
+        :return:
+        """
+        return PoolStats(
+            size=self.size(),
+            checked_in=self.checkedin(),
+            checked_out=self.checkedout(),
+            overflow=self.overflow(),
+            max_overflow=self._max_overflow,
+            timeouts=self.timeouts,
+            wait_time=self.wait_time.stats()
+        )
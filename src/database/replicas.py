@@ -0,0 +1,149 @@
+from asyncio import gather, sleep, wait_for
+from itertools import count
+from logging import getLogger
+from math import inf
+from typing import Dict, List, Optional
+
+from sqlalchemy import make_url, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.pool import Pool
+
+from src.database.base import Base, create_pooled_engine
+from src.database.monitoring import instrument_engine
+from src.settings import SETTINGS
+from src.types.service import ReplicaStats
+
+logger = getLogger(__name__)
+
+# Отставание реплики в секундах. Если реплика применила всё, что получила от основной БД, она не отстаёт, даже если
+# записей давно не было. Для основной БД, указанной как реплика, отставание тоже нулевое
+REPLICATION_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class Replica:
+    """
+    Реплика только для чтения: свой движок с пулом и последнее измеренное отставание
+    """
+
+    def __init__(self, url: str):
+        self.engine = create_pooled_engine(url=url)
+        self.session = async_sessionmaker(bind=self.engine, expire_on_commit=False)
+        # Адрес без пароля для логов и служебных эндпоинтов
+        self.name = make_url(url).render_as_string(hide_password=True)
+        # До первой проверки отставание неизвестно, и с реплики не читают
+        self.lag = inf
+        instrument_engine(engine=self.engine.sync_engine)
+
+    @property
+    def available(self) -> bool:
+        """
+        С реплики можно читать: она отвечает и отстаёт не больше REPLICA_MAX_LAG
+        :return:
+        """
+        return self.lag <= SETTINGS.REPLICA_MAX_LAG
+
+    def checked_out(self) -> int:
+        """
+        Количество соединений реплики, выданных запросам этого процесса
+        :return:
+        """
+        return self.engine.pool.checkedout()
+
+    async def _measure_lag(self) -> float:
+        """
+        Запрос отставания через соединение из пула реплики
+        :return:
+        """
+        async with self.engine.connect() as connection:
+            return float(await connection.scalar(REPLICATION_LAG_QUERY))
+
+    async def check_lag(self) -> None:
+        """
+        Обновление отставания реплики. Недоступная реплика считается бесконечно отстающей
+        :return:
+        """
+        try:
+            self.lag = await wait_for(self._measure_lag(), timeout=SETTINGS.HEALTH_CHECK_TIMEOUT)
+        except (SQLAlchemyError, OSError, TimeoutError):
+            # Если реплика упала, чтения уходят на остальные реплики или основную БД, пока она не поднимется
+            if self.lag != inf:
+                logger.warning("Реплика %s недоступна, чтения с неё остановлены", self.name, exc_info=True)
+            self.lag = inf
+
+    def stats(self) -> ReplicaStats:
+        """
+        Текущее состояние реплики
+        :return:
+        """
+        return ReplicaStats(name=self.name, available=self.available, lag=None if self.lag == inf else self.lag,
+                            pool=self.engine.pool.stats())
+
+
+# Реплики из настроек, у каждого процесса свои пулы соединений
+REPLICAS: List[Replica] = [Replica(url=url.unicode_string()) for url in SETTINGS.DATABASE_REPLICA_URLS]
+# Счётчик выборов реплики, по которому реплики с одинаковой загрузкой чередуются по кругу
+_turns = count()
+
+
+def choose_replica() -> Optional[Replica]:
+    """
+    Доступная реплика с наименьшим количеством занятых соединений. Реплики с одинаковой загрузкой чередуются по кругу
+    :return:
+    """
+    available = [replica for replica in REPLICAS if replica.available]
+    # Если доступных реплик нет, читать придётся с основной БД
+    if not available:
+        return None
+    # Сдвигаем начало списка, тогда min при равной загрузке выбирает реплики по очереди
+    shift = next(_turns) % len(available)
+    return min(available[shift:] + available[:shift], key=Replica.checked_out)
+
+
+def read_sessionmaker(primary: bool = False) -> async_sessionmaker:
+    """
+    Фабрика сессий для чтения: с реплики, если есть доступная, в другом случае или по требованию - с основной БД
+    :param primary:
+    :return:
+    """
+    replica = None if primary else choose_replica()
+    return Base.async_session if replica is None else replica.session
+
+
+def engine_pools() -> Dict[str, Pool]:
+    """
+    Пулы соединений основной БД и всех реплик этого процесса по меткам: primary и адрес реплики без пароля
+    :return:
+    """
+    return {"primary": Base.async_engine.pool, **{replica.name: replica.engine.pool for replica in REPLICAS}}
+
+
+async def check_replication_lag() -> None:
+    """
+    Проверка отставания всех реплик одновременно
+    :return:
+    """
+    await gather(*(replica.check_lag() for replica in REPLICAS))
+
+
+async def check_replication_lag_periodically() -> None:
+    """
+    Фоновая проверка отставания реплик раз в REPLICA_LAG_CHECK_INTERVAL секунд
+    :return:
+    """
+    while True:
+        await check_replication_lag()
+        await sleep(SETTINGS.REPLICA_LAG_CHECK_INTERVAL)
+
+
+async def dispose_replicas() -> None:
+    """
+    Закрытие соединений пулов всех реплик
+    :return:
+    """
+    await gather(*(replica.engine.dispose() for replica in REPLICAS))
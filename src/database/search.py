@@ -0,0 +1,104 @@
+from functools import reduce
+from re import findall
+from typing import List, Optional, Tuple
+
+from slugify import slugify
+from sqlalchemy import RowMapping, cast, desc, func, literal, select, union, union_all
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import SEARCH_CONFIGS, Character, Comics, Device, Sweet, Toy
+from src.settings import SETTINGS
+from src.types.pagination import InvalidCursor, Pagination, encode_cursor
+from src.types.search import SearchKind
+
+# Таблицы поиска и колонки с названием записи
+SEARCH_TABLES = (
+    (SearchKind.CHARACTER, Character, Character.name),
+    (SearchKind.COMICS, Comics, Comics.title),
+    (SearchKind.DEVICE, Device, Device.title),
+    (SearchKind.SWEET, Sweet, Sweet.title),
+    (SearchKind.TOY, Toy, Toy.title),
+)
+
+
+def prefix_query(text: str) -> Optional[str]:
+    """
+    Текст запроса to_tsquery, в котором каждое слово может быть началом слова: "Челов пау" найдёт "Человек-Паук".
+    В запрос попадают только буквы и цифры, поэтому синтаксис tsquery из пользовательского ввода не собрать
+    :param text:
+    :return:
+    """
+    return " & ".join(f"{word}:*" for word in findall(r"\w+", text)) or None
+
+
+async def search_catalog(session: AsyncSession, text: str,
+                         pagination: Pagination) -> Tuple[List[RowMapping], Optional[str]]:
+    """
+    Поиск по названиям персонажей, комиксов и товаров, отсортированный по релевантности.
+    Запись находится, если слова запроса похожи на слова названия по триграммам, что прощает опечатки и находит
+    запрос по началу слова, либо если название или слаг совпадают с запросом точно. Из каждой таблицы берутся
+    не больше SEARCH_CANDIDATES первых похожих записей и точные совпадения, которые достаются по уникальному индексу
+    всегда. Ранг по словам на русском или английском и похожести названия или слага считается только для этих
+    кандидатов, поэтому частое слово не заставляет ранжировать всю таблицу.
+    Выдача листается только в пределах первых SEARCH_CANDIDATES записей
+    :param session:
+    :param text:
+    :param pagination:
+    :return:
+    """
+    words = prefix_query(text=text)
+    # Если в запросе нет ни одного слова, искать нечего
+    if words is None:
+        return [], None
+    # Ранжированную выдачу листаем смещением: ранг не уникален и не хранится в индексе
+    offset = 0
+    if pagination.after is not None:
+        if len(pagination.after) != 1 or not 0 <= pagination.after[0] < SETTINGS.SEARCH_CANDIDATES:
+            raise InvalidCursor("Курсор получен не из поиска")
+        offset = pagination.after[0]
+    # Последняя страница обрезается по SEARCH_CANDIDATES: дальше кандидатов из какой-то таблицы может не хватить
+    limit = min(pagination.limit, SETTINGS.SEARCH_CANDIDATES - offset)
+    # Слово может быть и русским, и английским, поэтому объединяем запросы обеих конфигураций
+    query = reduce(lambda left, right: left.op("||")(right), (
+        func.to_tsquery(cast(config, REGCONFIG), words) for config in SEARCH_CONFIGS
+    ))
+    # Слаги транслитерированы, поэтому с ними сравниваем слаг запроса: "человек паук" -> "chelovek-pauk"
+    slug_text = slugify(text)
+    tables = []
+    for kind, model, title in SEARCH_TABLES:
+        columns = (model.id, title.label("title"), model.slug, model.search_vector)
+        # Кандидаты таблицы: точное совпадение названия и слага по уникальным индексам и первые SEARCH_CANDIDATES
+        # похожих по триграммам названий. Похожесть слова по триграммам покрывает и начало слова, и опечатки, а LIMIT
+        # останавливает сканирование на первых совпадениях. Совпадение по tsvector и похожесть слага только
+        # ранжируют кандидатов: отдельные условия по ним читали бы весь индекс для частого слова или длинного слага.
+        # Колонки берутся сразу, чтобы не соединять кандидатов с таблицей повторно
+        candidates = union(
+            select(*columns).where(title == text),
+            select(*columns).where(model.slug == slug_text),
+            select(*columns).where(literal(text).op("<%")(title)).limit(SETTINGS.SEARCH_CANDIDATES),
+        ).subquery()
+        # Нормализация 1 делит полнотекстовый ранг на логарифм длины названия: при одинаковых совпавших словах
+        # точное название выше более длинных, например "Toy" выше "Toy 76"
+        rank = func.ts_rank(candidates.c.search_vector, query, 1) + func.greatest(
+            func.word_similarity(text, candidates.c.title), func.word_similarity(slug_text, candidates.c.slug)
+        )
+        tables.append(
+            select(literal(kind.value).label("kind"), candidates.c.id, candidates.c.title, candidates.c.slug,
+                   rank.label("rank"))
+            .order_by(desc(rank), candidates.c.id)
+            .limit(SETTINGS.SEARCH_CANDIDATES)
+        )
+    hits = union_all(*tables).subquery()
+    # Достаём на одну запись больше размера страницы, чтобы узнать, есть ли следующая страница
+    statement = (
+        select(hits).order_by(desc(hits.c.rank), hits.c.kind, hits.c.id)
+        .offset(offset).limit(limit + 1)
+    )
+    rows = (await session.execute(statement)).mappings().all()
+    # Если следующей страницы нет или выдача дошла до SEARCH_CANDIDATES записей
+    if len(rows) <= limit or offset + limit >= SETTINGS.SEARCH_CANDIDATES:
+        # Возвращаем записи без курсора
+        return list(rows[:limit]), None
+    # В другом случае отбрасываем лишнюю запись и возвращаем курсор со смещением следующей страницы
+    return list(rows[:limit]), encode_cursor(offset + limit)
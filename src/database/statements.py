@@ -0,0 +1,84 @@
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Type, Union
+
+from sqlalchemy import event, Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+# Источник запросов для подсчёта: движок или сессия, привязанная к движку
+Bind = Union[AsyncEngine, Engine, AsyncSession, Session]
+
+
+class StatementCounter:
+    """
+    Счётчик SQL-запросов, отправленных в БД через движок
+    """
+
+    def __init__(self):
+        # Тексты выполненных запросов в порядке выполнения
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        """
+        Количество выполненных запросов
+        :return:
+        """
+        return len(self.statements)
+
+
+def _listen_target(bind: Optional[Bind]) -> Union[Engine, Type[Engine]]:
+    """
+    Синхронный движок, на который вешаются слушатели событий, в том числе у асинхронных движка и сессии.
+    Без движка слушаются все движки процесса: основной БД и реплик, на которые уходят GET-запросы
+    :param bind:
+    :return:
+    """
+    if bind is None:
+        return Engine
+    # У сессии берём движок, к которому она привязана
+    if isinstance(bind, (AsyncSession, Session)):
+        bind = bind.get_bind()
+    return bind.sync_engine if isinstance(bind, AsyncEngine) else bind
+
+
+@contextmanager
+def count_statements(bind: Optional[Bind] = None) -> Iterator[StatementCounter]:
+    """
+    Подсчёт SQL-запросов, выполненных внутри блока with движком или сессией, а без них - всеми движками процесса
+    :param bind:
+    :return:
+    """
+    sync_engine = _listen_target(bind=bind)
+    counter = StatementCounter()
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Запоминаем каждый запрос, отправленный курсором
+        counter.statements.append(statement)
+
+    # Начинаем слушать запросы движка
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        # Перестаём слушать запросы движка
+        event.remove(sync_engine, "before_cursor_execute", _before_cursor_execute)
+
+
+@contextmanager
+def assert_statements(expected: int, bind: Optional[Bind] = None) -> Iterator[StatementCounter]:
+    """
+    Проверка того, что внутри блока with выполнено ровно expected SQL-запросов.
+    Используется в тестах эндпоинтов, чтобы ловить возвращение N+1 запросов
+    :param expected:
+    :param bind:
+    :return:
+    """
+    with count_statements(bind=bind) as counter:
+        yield counter
+    # Если количество запросов не совпало с ожидаемым
+    if counter.count != expected:
+        # Выдаём ошибку со списком всех выполненных запросов
+        raise AssertionError(
+            f"Ожидалось SQL-запросов: {expected}, выполнено: {counter.count}\n" + "\n".join(counter.statements)
+        )
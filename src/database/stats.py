@@ -0,0 +1,157 @@
+from asyncio import sleep
+from logging import getLogger
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    ColumnElement, FromClause, RowMapping, Select, VARCHAR, and_, cast, column, func, literal_column, not_, null,
+    select, table, text, union_all
+)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.base import Base
+from src.database.models import Author, Character, Comics, Device, Sweet, Toy
+from src.settings import SETTINGS
+from src.types.pagination import InvalidCursor, Pagination, encode_cursor
+
+# Ключ advisory-блокировки обновления статистики: представления обновляет только один воркер из всех
+STATS_REFRESH_LOCK = 0x5354415453
+
+logger = getLogger(__name__)
+
+# Товары всех видов одной выборкой: вид, подтип, цена и персонаж
+PRODUCTS = union_all(
+    select(literal_column("'device'").label("kind"), Device.type_of_device.label("type"), Device.price,
+           Device.character_id),
+    select(literal_column("'sweet'"), cast(null(), VARCHAR), Sweet.price, Sweet.character_id),
+    select(literal_column("'toy'"), Toy.type_of_toy, Toy.price, Toy.character_id),
+).subquery("products")
+
+# Количество товаров каждого вида
+PRODUCT_COUNTS = (
+    func.count().filter(PRODUCTS.c.kind == "device").label("devices"),
+    func.count().filter(PRODUCTS.c.kind == "sweet").label("sweets"),
+    func.count().filter(PRODUCTS.c.kind == "toy").label("toys"),
+)
+
+
+def price_stats(price: ColumnElement, count_label: str) -> Tuple[ColumnElement, ...]:
+    """
+    Количество записей и минимальная, средняя и максимальная цена группы
+    :param price:
+    :param count_label:
+    :return:
+    """
+    return (
+        func.count().label(count_label),
+        func.min(price).label("price_min"),
+        func.round(func.avg(price), 2).label("price_avg"),
+        func.max(price).label("price_max"),
+    )
+
+
+# Запросы статистики по имени материализованного представления, которое хранит их результат.
+# ROLLUP добавляет строку итога, в которой ключ группировки равен NULL
+STATS_QUERIES: Dict[str, Select] = {
+    # Товары по вселенным и итог по всему каталогу
+    "stats_universe": (
+        select(Character.universe_id, *PRODUCT_COUNTS, *price_stats(price=PRODUCTS.c.price, count_label="products"))
+        .select_from(PRODUCTS.join(Character, Character.id == PRODUCTS.c.character_id))
+        .group_by(func.rollup(Character.universe_id))
+    ),
+    # Товары по персонажам
+    "stats_character": (
+        select(Character.id.label("character_id"), Character.universe_id, *PRODUCT_COUNTS,
+               *price_stats(price=PRODUCTS.c.price, count_label="products"))
+        .select_from(PRODUCTS.join(Character, Character.id == PRODUCTS.c.character_id))
+        .group_by(Character.id)
+    ),
+    # Товары по видам и типам, итоги по виду и по всему каталогу. У сладостей нет типа, поэтому их строка
+    # по типу совпадает с итогом по виду и отбрасывается
+    "stats_product_type": (
+        select(PRODUCTS.c.kind, PRODUCTS.c.type, *price_stats(price=PRODUCTS.c.price, count_label="products"))
+        .group_by(func.rollup(PRODUCTS.c.kind, PRODUCTS.c.type))
+        .having(not_(and_(PRODUCTS.c.kind == "sweet", func.grouping(PRODUCTS.c.type) == 0)))
+    ),
+    # Персонажи по авторам, включая авторов без персонажей
+    "stats_author": (
+        select(Author.id.label("author_id"), func.count(Character.id).label("characters"))
+        .select_from(Author.__table__.outerjoin(Character.__table__))
+        .group_by(Author.id)
+    ),
+    # Комиксы по странам выпуска и итог по всем странам
+    "stats_comics": (
+        select(Comics.country, *price_stats(price=Comics.price, count_label="comics"))
+        .group_by(func.rollup(Comics.country))
+    ),
+}
+
+
+def stats_source(name: str) -> FromClause:
+    """
+    Источник статистики: при STATS_MATERIALIZED - материализованное представление, в другом случае - запрос
+    по таблицам каталога. Колонки у обоих одинаковые
+    :param name:
+    :return:
+    """
+    statement = STATS_QUERIES[name]
+    # Если статистика берётся из материализованного представления
+    if SETTINGS.STATS_MATERIALIZED:
+        return table(name, *(column(selected.key) for selected in statement.selected_columns))
+    # В другом случае считаем статистику по актуальным данным
+    return statement.subquery(name)
+
+
+async def paginate_stats(session: AsyncSession, statement: Select, key: ColumnElement,
+                         pagination: Pagination) -> Tuple[List[RowMapping], Optional[str]]:
+    """
+    Страница строк статистики с курсорной пагинацией по ID группы
+    :param session:
+    :param statement:
+    :param key:
+    :param pagination:
+    :return:
+    """
+    # Если передан курсор, продолжаем со следующей после него группы
+    if pagination.after is not None:
+        if len(pagination.after) != 1 or not isinstance(pagination.after[0], int):
+            raise InvalidCursor("Курсор получен не из этого списка")
+        statement = statement.where(key > pagination.after[0])
+    # Достаём на одну строку больше размера страницы, чтобы узнать, есть ли следующая страница
+    rows = (await session.execute(statement.order_by(key).limit(pagination.limit + 1))).mappings().all()
+    # Если следующей страницы нет
+    if len(rows) <= pagination.limit:
+        # Возвращаем строки без курсора
+        return list(rows), None
+    # В другом случае отбрасываем лишнюю строку и возвращаем курсор на последнюю строку страницы
+    rows = rows[:pagination.limit]
+    return list(rows), encode_cursor(rows[-1][key.key])
+
+
+async def refresh_stats() -> bool:
+    """
+    Обновление материализованных представлений статистики без блокировки чтения.
+    Если обновление уже идёт в другом воркере, ничего не делаем
+    :return:
+    """
+    async with Base.async_engine.begin() as connection:
+        # Блокировка уровня транзакции снимается при её завершении, даже если воркер упадёт
+        if not await connection.scalar(select(func.pg_try_advisory_xact_lock(STATS_REFRESH_LOCK))):
+            return False
+        for name in STATS_QUERIES:
+            await connection.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {name}"))
+    return True
+
+
+async def refresh_stats_periodically() -> None:
+    """
+    Фоновое обновление статистики раз в STATS_REFRESH_INTERVAL секунд
+    :return:
+    """
+    while True:
+        await sleep(SETTINGS.STATS_REFRESH_INTERVAL)
+        try:
+            await refresh_stats()
+        except SQLAlchemyError:
+            # Ошибка обновления не должна останавливать воркер: дашборды покажут прошлый срез
+            logger.exception("Не удалось обновить статистику")
@@ -0,0 +1,54 @@
+from typing import Any, Dict, Optional, Type
+
+from sqlalchemy import select, update, RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.types.base import DTO
+from .base import Base
+
+
+async def update_returning(session: AsyncSession, model: Type[Base], obj_id: int,
+                           values: Dict[str, Any]) -> Optional[RowMapping]:
+    """
+    Обновление записи одним запросом UPDATE ... WHERE id = :id RETURNING *
+    :param session:
+    :param model:
+    :param obj_id:
+    :param values:
+    :return:
+    """
+    columns = model.public_columns()
+    # Если обновлять нечего, просто достаём текущее состояние записи
+    if not values:
+        return (await session.execute(select(*columns).where(model.id == obj_id))).mappings().one_or_none()
+    # Обновляем запись и сразу получаем её новое состояние, без ORM-объектов и повторного SELECT
+    statement = update(model).where(model.id == obj_id).values(**values).returning(*columns)
+    return (await session.execute(statement)).mappings().one_or_none()
+
+
+async def patch_returning(session: AsyncSession, model: Type[Base], detail: Type[DTO], obj_id: int,
+                          form: DTO) -> Optional[RowMapping]:
+    """
+    Частичное обновление записи только переданными полями.
+    Текущая запись читается только тогда, когда меняются поля, из которых строится слаг
+    :param session:
+    :param model:
+    :param detail:
+    :param obj_id:
+    :param form:
+    :return:
+    """
+    # Берём только поля, которые клиент действительно передал
+    values = form.model_dump(exclude_unset=True)
+    # Если меняются поля слага
+    if values.keys() & set(detail.SLUG_FIELDS):
+        # Блокируем запись до конца транзакции, чтобы слаг строился по актуальным данным
+        statement = select(*model.public_columns()).where(model.id == obj_id).with_for_update()
+        current = (await session.execute(statement)).mappings().one_or_none()
+        # Если запись не найдена
+        if current is None:
+            return None
+        # Пересчитываем слаг основной схемой представления по итоговым значениям полей: без слага схема строит его сама
+        fields = {name: value for name, value in current.items() if name != "slug"}
+        values["slug"] = detail.model_validate(obj={**fields, **values}).slug
+    return await update_returning(session=session, model=model, obj_id=obj_id, values=values)
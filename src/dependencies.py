@@ -1,19 +1,213 @@
-from sqlalchemy.orm import Session
-from fastapi import Depends
+from inspect import Parameter, Signature
+from typing import Any, AsyncIterator, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, Query, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from src.cache import RESPONSE_CACHE
 from src.database.models import Base
+from src.database.replicas import read_sessionmaker
+from src.middleware import PRIMARY_READS_COOKIE
+from src.types import (
+    AuthorDetail, CharacterDetail, ComicsDetail, DeviceDetail, SweetDetail, ToyDetail, UniverseDetail
+)
+from src.types.base import DTO
+from src.types.batch import BATCH_SEPARATOR, MAX_BATCH_SIZE, BatchKeys
+from src.types.comics import ComicsFilter
+from src.types.device import DeviceFilter
+from src.types.fields import FIELDS_SEPARATOR, parse_fields
+from src.types.filters import ListFilter
+from src.types.sweet import SweetFilter
+from src.types.toy import ToyFilter
+from src.types.pagination import Pagination, decode_cursor, DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
 
 
-def _get_db_session() -> Session:
+async def _get_db_session() -> AsyncIterator[AsyncSession]:
     """
-    Зависимость получения сессии
+    Зависимость получения асинхронной сессии
     :return:
     """
     # Открываем сессию
-    with Base.session() as session:
+    async with Base.async_session() as session:
         # Возращаем ёе при обращении к ней с помощью генератора для запоминания конечного состояния записанных данных
         # в БД
         yield session
 
 
+async def _get_read_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Зависимость получения асинхронной сессии для чтения: с наименее загруженной реплики, а если доступных реплик
+    нет или клиент только что сам что-то записал - с основной БД
+    :param request:
+    :return:
+    """
+    async with read_sessionmaker(primary=PRIMARY_READS_COOKIE in request.cookies)() as session:
+        yield session
+
+
+async def _get_cached_read_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Зависимость получения асинхронной сессии для чтения записи, ответ с которой попадает в кэш. Пока кэш включён,
+    промахи читаются с основной БД: устаревшая строка с отстающей реплики иначе отдавалась бы из кэша до конца TTL,
+    даже после того, как реплика догнала основную БД
+    :param request:
+    :return:
+    """
+    primary = RESPONSE_CACHE.enabled or PRIMARY_READS_COOKIE in request.cookies
+    async with read_sessionmaker(primary=primary)() as session:
+        yield session
+
+
+def _get_pagination(
+        limit: int = Query(
+            default=DEFAULT_PAGE_LIMIT,
+            ge=1,
+            le=MAX_PAGE_LIMIT,
+            title="Размер страницы",
+            description="Максимальное количество записей на странице"
+        ),
+        after: Optional[str] = Query(
+            default=None,
+            title="Курсор",
+            description="Курсор next_cursor из предыдущей страницы"
+        )
+) -> Pagination:
+    """
+    Зависимость получения параметров курсорной пагинации
+    :param limit:
+    :param after:
+    :return:
+    """
+    # Если курсор не передан
+    if after is None:
+        # Возвращаем параметры первой страницы
+        return Pagination(limit=limit)
+    try:
+        # Достаём ID последней записи предыдущей страницы
+        return Pagination(limit=limit, after=decode_cursor(after))
+    except ValueError as error:
+        # Выдаём ошибку, если курсор повреждён
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(error))
+
+
+def _get_batch_keys(
+        ids: Optional[str] = Query(
+            default=None,
+            title="ID записей",
+            description=f"ID записей через запятую, например 1,2,3, не больше {MAX_BATCH_SIZE}"
+        ),
+        slugs: Optional[str] = Query(
+            default=None,
+            title="Слаги записей",
+            description=f"Слаги записей через запятую, не больше {MAX_BATCH_SIZE}. Передаются вместо ids"
+        )
+) -> BatchKeys:
+    """
+    Зависимость получения ключей пакетного запроса
+    :param ids:
+    :param slugs:
+    :return:
+    """
+    def _split(value: Optional[str]) -> Optional[List[str]]:
+        return None if value is None else [key.strip() for key in value.split(BATCH_SEPARATOR) if key.strip()]
+
+    try:
+        return BatchKeys(ids=_split(ids), slugs=_split(slugs))
+    except ValidationError as error:
+        # Выдаём ошибку в том же формате, что и для остальных query-параметров
+        raise RequestValidationError(errors=[
+            {**err, "loc": ("query", *err["loc"])} for err in error.errors(include_url=False, include_context=False)
+        ])
+
+
+def _get_batch_ids(
+        ids: str = Query(
+            default=...,
+            title="ID записей",
+            description=f"ID записей через запятую, например 1,2,3, не больше {MAX_BATCH_SIZE}"
+        )
+) -> BatchKeys:
+    """
+    Зависимость получения ключей пакетного запроса записей без слагов, например связей, только по ID
+    :param ids:
+    :return:
+    """
+    return _get_batch_keys(ids=ids, slugs=None)
+
+
+# Тип схемы фильтров
+FilterT = TypeVar("FilterT", bound=ListFilter)
+
+
+def filters_dependency(schema: Type[FilterT]) -> Any:
+    """
+    Зависимость получения фильтров списка из query-параметров, по одному параметру на поле схемы
+    :param schema:
+    :return:
+    """
+    def _get_filters(**params: Any) -> FilterT:
+        try:
+            # Ограничения полей и диапазонов проверяет сама схема
+            return schema(**params)
+        except ValidationError as error:
+            # Выдаём ошибку в том же формате, что и для остальных query-параметров
+            raise RequestValidationError(errors=[
+                {**err, "loc": ("query", *err["loc"])} for err in error.errors(include_url=False, include_context=False)
+            ])
+
+    # FastAPI строит query-параметры по сигнатуре зависимости, поэтому собираем её из полей схемы
+    _get_filters.__signature__ = Signature(parameters=[
+        Parameter(name=name, kind=Parameter.KEYWORD_ONLY, annotation=field.annotation,
+                  default=Query(default=field.default, title=field.title, description=field.description))
+        for name, field in schema.model_fields.items()
+    ])
+    return Depends(_get_filters)
+
+
+def fields_dependency(detail: Type[DTO]) -> Any:
+    """
+    Зависимость получения полей записей, которые нужно отдать, из параметра fields
+    :param detail:
+    :return:
+    """
+    def _get_fields(fields: Optional[str] = Query(
+        default=None,
+        title="Поля",
+        description=f"Поля записей через запятую, например id,slug,title. Допустимые поля: "
+                    f"{FIELDS_SEPARATOR.join(detail.model_fields)}. По умолчанию - все"
+    )) -> Optional[Tuple[str, ...]]:
+        try:
+            return parse_fields(detail=detail, fields=fields)
+        except ValueError as error:
+            # Выдаём ошибку, если среди полей есть неизвестные
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(error))
+
+    return Depends(_get_fields)
+
+
 # Создаём зависимость
 get_db_session = Depends(_get_db_session)
+# Создаём зависимость сессии для чтения, с реплики, если они настроены
+get_read_session = Depends(_get_read_session)
+# Создаём зависимость сессии для чтения записи, которая кэшируется, с основной БД, пока кэш включён
+get_cached_read_session = Depends(_get_cached_read_session)
+# Создаём зависимость пагинации
+get_pagination = Depends(_get_pagination)
+# Создаём зависимость ключей пакетного запроса
+get_batch_keys = Depends(_get_batch_keys)
+# Создаём зависимость ключей пакетного запроса записей без слагов
+get_batch_ids = Depends(_get_batch_ids)
+# Создаём зависимости фильтров списков
+get_comics_filters = filters_dependency(schema=ComicsFilter)
+get_device_filters = filters_dependency(schema=DeviceFilter)
+get_sweet_filters = filters_dependency(schema=SweetFilter)
+get_toy_filters = filters_dependency(schema=ToyFilter)
+# Создаём зависимости выбора полей записей списков
+get_author_fields = fields_dependency(detail=AuthorDetail)
+get_character_fields = fields_dependency(detail=CharacterDetail)
+get_comics_fields = fields_dependency(detail=ComicsDetail)
+get_device_fields = fields_dependency(detail=DeviceDetail)
+get_sweet_fields = fields_dependency(detail=SweetDetail)
+get_toy_fields = fields_dependency(detail=ToyDetail)
+get_universe_fields = fields_dependency(detail=UniverseDetail)
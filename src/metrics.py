@@ -0,0 +1,183 @@
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Iterator, List, MutableMapping, Sequence, Tuple
+
+from src.types.service import HistogramStats
+
+# Границы корзин гистограммы ожидания соединения из пула в секундах
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Границы корзин гистограмм времени обработки запроса и времени запросов к БД в секундах
+REQUEST_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Границы корзин гистограммы количества запросов к БД на один HTTP-запрос
+DB_STATEMENTS_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+# Метка маршрута для запросов, не попавших ни в один маршрут, чтобы случайные пути не плодили метки
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Метки метрик запроса: метод, шаблон маршрута и код ответа
+RequestLabels = Tuple[str, str, str]
+# ASGI scope запроса
+Scope = MutableMapping[str, Any]
+
+
+def format_labels(**labels: str) -> str:
+    """
+    Метки в текстовом формате Prometheus
+    :param labels:
+    :return:
+    """
+    if not labels:
+        return ""
+    # Обратный слэш, кавычки и переводы строк в значениях меток экранируются
+    escaped = (
+        name + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Шаблон маршрута запроса, например /api/v1/characters/{character_id}/toys/.
+    FastAPI кладёт найденный маршрут в scope при маршрутизации, поэтому повторно сопоставлять путь не нужно
+    :param scope:
+    :return:
+    """
+    route = scope.get("route")
+    return UNMATCHED_ROUTE if route is None else route.path
+
+
+class Histogram:
+    """
+    Гистограмма наблюдений с фиксированными границами корзин, как у Prometheus
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        # Количество наблюдений в каждой корзине, последняя корзина - всё, что больше верхней границы
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Добавление наблюдения
+        :param value:
+        :return:
+        """
+        self._counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def _cumulative(self) -> Iterator[Tuple[str, int]]:
+        """
+        Накопительные значения корзин по их границам
+        :return:
+        """
+        total = 0
+        for bound, count in zip((*map(str, self.buckets), "+Inf"), self._counts):
+            total += count
+            yield bound, total
+
+    def stats(self) -> HistogramStats:
+        """
+        Накопительные значения корзин: количество наблюдений не больше каждой границы
+        :return:
+        """
+        return HistogramStats(buckets=dict(self._cumulative()), sum=self.sum, count=self.count)
+
+    def exposition(self, name: str, **labels: str) -> List[str]:
+        """
+        Строки гистограммы в текстовом формате Prometheus
+        :param name:
+        :param labels:
+        :return:
+        """
+        lines = [f"{name}_bucket{format_labels(**labels, le=bound)} {count}" for bound, count in self._cumulative()]
+        lines.append(f"{name}_sum{format_labels(**labels)} {self.sum}")
+        lines.append(f"{name}_count{format_labels(**labels)} {self.count}")
+        return lines
+
+
+class RouteStats:
+    """
+    Гистограммы запросов одного сочетания метода, маршрута и кода ответа
+    """
+    __slots__ = ("latency", "db_statements", "db_time")
+
+    def __init__(self):
+        self.latency = Histogram(buckets=REQUEST_LATENCY_BUCKETS)
+        self.db_statements = Histogram(buckets=DB_STATEMENTS_BUCKETS)
+        self.db_time = Histogram(buckets=REQUEST_LATENCY_BUCKETS)
+
+
+class RequestMetrics:
+    """
+    Метрики HTTP-запросов процесса по шаблонам маршрутов.
+    Каждый воркер считает свои метрики, поэтому Prometheus различает их по instance
+    """
+
+    def __init__(self):
+        self._routes: Dict[RequestLabels, RouteStats] = {}
+        # Запросы в обработке. Маршрут известен только после маршрутизации, поэтому он определяется при выгрузке
+        self._in_flight: Dict[int, Scope] = {}
+
+    def started(self, scope: Scope) -> None:
+        """
+        Учёт начала обработки запроса
+        :param scope:
+        :return:
+        """
+        self._in_flight[id(scope)] = scope
+
+    def finished(self, scope: Scope, status: int, duration: float, db_statements: int, db_time: float) -> None:
+        """
+        Учёт завершения обработки запроса
+        :param scope:
+        :param status:
+        :param duration:
+        :param db_statements:
+        :param db_time:
+        :return:
+        """
+        self._in_flight.pop(id(scope), None)
+        key = (scope["method"], route_template(scope=scope), str(status))
+        stats = self._routes.get(key)
+        if stats is None:
+            stats = self._routes[key] = RouteStats()
+        stats.latency.observe(duration)
+        stats.db_statements.observe(db_statements)
+        stats.db_time.observe(db_time)
+
+    def exposition(self) -> List[str]:
+        """
+        Строки всех метрик запросов в текстовом формате Prometheus
+        :return:
+        """
+        lines = [
+            "# HELP http_requests_in_flight Количество запросов в обработке",
+            "# TYPE http_requests_in_flight gauge",
+        ]
+        in_flight = Counter((scope["method"], route_template(scope=scope)) for scope in self._in_flight.values())
+        for (method, route), value in in_flight.items():
+            lines.append(f"http_requests_in_flight{format_labels(method=method, route=route)} {value}")
+        lines += [
+            "# HELP http_requests_total Количество обработанных запросов",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), stats in self._routes.items():
+            labels = format_labels(method=method, route=route, status=status)
+            lines.append(f"http_requests_total{labels} {stats.latency.count}")
+        for name, attribute, description in (
+                ("http_request_duration_seconds", "latency", "Время обработки запроса"),
+                ("http_request_db_statements", "db_statements", "Количество запросов к БД на один HTTP-запрос"),
+                ("http_request_db_seconds", "db_time", "Время выполнения запросов к БД на один HTTP-запрос"),
+        ):
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+            for (method, route, status), stats in self._routes.items():
+                lines += getattr(stats, attribute).exposition(name, method=method, route=route, status=status)
+        return lines
+
+
+# Метрики HTTP-запросов
+REQUEST_METRICS = RequestMetrics()
@@ -0,0 +1,10 @@
+from .etag import ETagMiddleware
+from .metrics import MetricsMiddleware
+from .replicas import PRIMARY_READS_COOKIE, ReadYourWritesMiddleware
+
+__all__ = [
+    "ETagMiddleware",
+    "MetricsMiddleware",
+    "PRIMARY_READS_COOKIE",
+    "ReadYourWritesMiddleware"
+]
@@ -0,0 +1,88 @@
+from hashlib import blake2b
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Заголовки, которые по RFC 9110 нужно сохранить в ответе 304
+NOT_MODIFIED_HEADERS = ("cache-control", "content-location", "expires", "vary")
+
+
+def make_etag(body: bytes) -> str:
+    """
+    Сильный ETag по хэшу тела ответа
+    :param body:
+    :return:
+    """
+    return f'"{blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """
+    Проверка совпадения ETag со значением заголовка If-None-Match (слабое сравнение, как требует RFC 9110)
+    :param etag:
+    :param if_none_match:
+    :return:
+    """
+    # Клиент может прислать звёздочку или список тегов через запятую
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+class ETagMiddleware:
+    """
+    Условные GET-запросы: проставляет ETag успешным ответам и отдаёт 304 без тела при совпадении If-None-Match.
+    Буферизуются только ответы, отправленные одним куском, потоковые выгрузки пропускаются как есть
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Условные запросы имеют смысл только для GET
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        # Отложенное начало ответа, пока не станет известно тело
+        start_message: Optional[Message] = None
+
+        async def send_with_etag(message: Message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Ответы с ошибками отдаём без изменений
+                if message["status"] != 200:
+                    await send(message)
+                    return
+                start_message = message
+                return
+            # Если начало ответа уже отправлено, просто пробрасываем тело дальше
+            if start_message is None:
+                await send(message)
+                return
+            # Если тело идёт несколькими кусками, это потоковый ответ, и хэшировать его целиком нельзя
+            if message.get("more_body", False):
+                await send(start_message)
+                start_message = None
+                await send(message)
+                return
+            headers = MutableHeaders(scope=start_message)
+            # ETag мог уже проставить кэш ответов
+            etag = headers.get("etag") or make_etag(message.get("body", b""))
+            # Если у клиента актуальная версия, отдаём 304 без тела
+            if if_none_match is not None and etag_matches(etag=etag, if_none_match=if_none_match):
+                not_modified = MutableHeaders()
+                not_modified["etag"] = etag
+                for name in NOT_MODIFIED_HEADERS:
+                    if name in headers:
+                        not_modified[name] = headers[name]
+                await send({"type": "http.response.start", "status": 304, "headers": not_modified.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            headers["etag"] = etag
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
@@ -0,0 +1,45 @@
+from time import perf_counter
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.database.monitoring import DATABASE_USAGE, DatabaseUsage
+from src.metrics import REQUEST_METRICS
+
+
+class MetricsMiddleware:
+    """
+    Сбор метрик HTTP-запросов по шаблонам маршрутов: количество, время обработки, запросы в обработке,
+    а также количество и время запросов к БД на каждый HTTP-запрос, которые считают события движков
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        usage = DatabaseUsage(scope=scope)
+        token = DATABASE_USAGE.set(usage)
+        # Если ответ так и не начался, значит обработчик упал с необработанной ошибкой
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUEST_METRICS.started(scope=scope)
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_METRICS.finished(
+                scope=scope,
+                status=status_code,
+                duration=perf_counter() - started,
+                db_statements=usage.statements,
+                db_time=usage.time
+            )
+            DATABASE_USAGE.reset(token)
@@ -0,0 +1,37 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.settings import SETTINGS
+
+# Кука, с которой чтения клиента идут на основную БД: её выдаёт успешная запись, и живёт она READ_YOUR_WRITES_WINDOW
+PRIMARY_READS_COOKIE = "read_primary"
+# Методы, которые ничего не меняют в БД
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReadYourWritesMiddleware:
+    """
+    Чтение своих записей при репликах: после успешного изменяющего запроса клиент получает короткоживущую куку,
+    и, пока она есть, его чтения идут на основную БД, а не на реплику, которая могла ещё не получить изменения
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Чтения куку не выдают
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            # Куку выдаём только при успешной записи: после ошибки читать свои изменения нечего
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{PRIMARY_READS_COOKIE}=1; Max-Age={SETTINGS.READ_YOUR_WRITES_WINDOW}; Path=/; HttpOnly; "
+                    f"SameSite=Lax"
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
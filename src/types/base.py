@@ -1,4 +1,6 @@
-from pydantic import BaseModel, ConfigDict
+from typing import Annotated, ClassVar, Tuple, Type
+
+from pydantic import BaseModel, ConfigDict, Field, create_model
 
 
 class DTO(BaseModel):
@@ -8,3 +10,21 @@ class DTO(BaseModel):
         from_attributes=True
     )
 
+    # Поля, из которых строится слаг, у схем без слага их нет
+    SLUG_FIELDS: ClassVar[Tuple[str, ...]] = ()
+
+
+def partial_model(model: Type[DTO]) -> Type[DTO]:
+    """
+    Схема с теми же полями и ограничениями, что и у переданной, но без обязательных полей.
+    Используется для частичного обновления: непереданные поля не попадают в model_dump(exclude_unset=True)
+    :param model:
+    :return:
+    """
+    fields = {}
+    for name, field in model.model_fields.items():
+        # Сохраняем ограничения и валидаторы поля, но не разрешаем явный null
+        annotation = Annotated[(field.annotation, *field.metadata)] if field.metadata else field.annotation
+        fields[name] = (annotation, Field(default=None, title=field.title, description=field.description,
+                                          examples=field.examples))
+    return create_model(f"{model.__name__}Partial", __base__=DTO, **fields)
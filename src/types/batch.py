@@ -0,0 +1,80 @@
+from typing import Generic, List, Optional, Self, TypeVar, Union
+
+from pydantic import Field, PositiveInt, model_validator
+
+from .base import DTO
+
+# Максимальное количество записей в одном пакетном запросе
+MAX_BATCH_SIZE = 100
+# Разделитель ключей в параметрах ids и slugs
+BATCH_SEPARATOR = ","
+
+# Тип найденных записей
+ItemT = TypeVar("ItemT")
+# Ключ записи пакетного запроса: ID или слаг
+BatchKey = Union[PositiveInt, str]
+
+
+class BatchKeys(DTO):
+    """
+    Схема ключей пакетного запроса: записи запрашиваются либо по ID, либо по слагам.
+    Повторы отбрасываются, порядок ключей сохраняется
+    """
+    # ID запрашиваемых записей
+    ids: Optional[List[PositiveInt]] = Field(
+        default=None,
+        min_length=1,
+        max_length=MAX_BATCH_SIZE,
+        title="ID записей",
+        description="ID запрашиваемых записей"
+    )
+    # Слаги запрашиваемых записей
+    slugs: Optional[List[str]] = Field(
+        default=None,
+        min_length=1,
+        max_length=MAX_BATCH_SIZE,
+        title="Слаги записей",
+        description="Слаги запрашиваемых записей"
+    )
+
+    @model_validator(mode="after")
+    def validate_keys(self) -> Self:
+        """
+        Проверка, что передан ровно один вид ключей, и отбрасывание повторов
+        :return:
+        """
+        # Если не передано ни одного вида ключей или переданы оба
+        if (self.ids is None) == (self.slugs is None):
+            # Выдаём ошибку
+            raise ValueError("Передайте либо ids, либо slugs")
+        if self.ids is not None:
+            self.ids = list(dict.fromkeys(self.ids))
+        else:
+            self.slugs = list(dict.fromkeys(self.slugs))
+        return self
+
+    @property
+    def keys(self) -> List[BatchKey]:
+        """
+        Переданные ключи в порядке запроса
+        :return:
+        """
+        return self.ids if self.ids is not None else self.slugs
+
+
+class BatchResult(DTO, Generic[ItemT]):
+    """
+    Схема результата пакетного запроса
+    """
+    # Найденные записи
+    items: List[ItemT] = Field(
+        default=...,
+        title="Найденные записи",
+        description="Найденные записи в порядке переданных ключей"
+    )
+    # Ключи ненайденных записей
+    missing: List[BatchKey] = Field(
+        default=...,
+        title="Ненайденные записи",
+        description="ID или слаги записей, которых нет в БД, в порядке переданных ключей"
+    )
@@ -0,0 +1,117 @@
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, Generic, List, Tuple, Type, TypeVar
+
+from pydantic import Field, NonNegativeInt, PositiveInt, TypeAdapter, ValidationError
+
+from .base import DTO
+
+# Максимальное количество записей в одном массовом запросе
+MAX_BULK_SIZE = 10000
+
+# Тип успешно обработанных записей
+ItemT = TypeVar("ItemT")
+# Тип схемы, через которую валидируется каждая запись
+FormT = TypeVar("FormT", bound=DTO)
+
+
+class BulkItemError(DTO):
+    """
+    Схема ошибок конкретной записи массового запроса
+    """
+    # Позиция записи в присланном списке
+    index: NonNegativeInt = Field(
+        default=...,
+        title="Позиция записи",
+        description="Позиция записи в присланном списке, начиная с нуля"
+    )
+    # Описания ошибок записи
+    errors: List[str] = Field(
+        default=...,
+        title="Ошибки записи",
+        description="Описания всех ошибок, из-за которых запись не была обработана"
+    )
+
+
+class BulkResult(DTO, Generic[ItemT]):
+    """
+    Схема результата массового добавления или обновления
+    """
+    # Обработанные записи
+    items: List[ItemT] = Field(
+        default=...,
+        title="Обработанные записи",
+        description="Записи, сохранённые в БД"
+    )
+    # Ошибки необработанных записей
+    errors: List[BulkItemError] = Field(
+        default=...,
+        title="Ошибки",
+        description="Ошибки записей, которые не были сохранены, в порядке их позиций"
+    )
+
+
+class BulkDeleteForm(DTO):
+    """
+    Схема массового удаления
+    """
+    # ID удаляемых записей
+    ids: List[PositiveInt] = Field(
+        default=...,
+        min_length=1,
+        max_length=MAX_BULK_SIZE,
+        title="ID записей",
+        description="ID удаляемых записей"
+    )
+
+
+class BulkDeleteResult(DTO):
+    """
+    Схема результата массового удаления
+    """
+    # ID удалённых записей
+    deleted: List[PositiveInt] = Field(
+        default=...,
+        title="Удалённые записи",
+        description="ID удалённых записей"
+    )
+    # ID ненайденных записей
+    not_found: List[PositiveInt] = Field(
+        default=...,
+        title="Ненайденные записи",
+        description="ID записей, которых не было в БД"
+    )
+
+
+@lru_cache
+def _list_adapter(form: Type[FormT]) -> TypeAdapter:
+    """
+    Адаптер списка схем, собирается один раз на схему
+    :param form:
+    :return:
+    """
+    return TypeAdapter(List[form])
+
+
+def validate_bulk(form: Type[FormT], payload: List[Any]) -> Tuple[List[Tuple[int, FormT]], List[BulkItemError]]:
+    """
+    Валидация списка записей одним адаптером с разбором ошибок по позициям записей
+    :param form:
+    :param payload:
+    :return:
+    """
+    adapter = _list_adapter(form)
+    try:
+        # Обычно весь список валиден, и хватает одного прохода
+        return list(enumerate(adapter.validate_python(payload))), []
+    except ValidationError as exc:
+        messages: Dict[int, List[str]] = defaultdict(list)
+        # Первый элемент пути ошибки - позиция записи в списке, остальное - путь до поля
+        for error in exc.errors(include_url=False):
+            index, *loc = error["loc"]
+            messages[index].append(f"{'.'.join(map(str, loc))}: {error['msg']}" if loc else error["msg"])
+    # Повторно валидируем тем же адаптером только записи без ошибок
+    indexes = [index for index in range(len(payload)) if index not in messages]
+    forms = adapter.validate_python([payload[index] for index in indexes])
+    errors = [BulkItemError(index=index, errors=errors) for index, errors in sorted(messages.items())]
+    return list(zip(indexes, forms)), errors
@@ -1,12 +1,11 @@
 import datetime
-from typing import Self, Optional
+from typing import Self, Optional, ClassVar, Tuple
 
 from slugify import slugify
-from sqlalchemy import select
 
-from pydantic import Field, model_validator, PositiveInt, field_validator
+from pydantic import Field, model_validator, PositiveInt
 
-from .base import DTO
+from .base import DTO, partial_model
 from .custom_types import AlphaStr, TitleStr
 
 
@@ -66,25 +65,6 @@ class CharacterAddForm(CharacterBasic):
     """
     ...
 
-    @field_validator("name", mode="after")
-    def name_validator(cls, name: str) -> str:
-        """
-        Валидатор имени персонажа
-        :param name:
-        :return:
-        """
-        # Открываем сессию
-        from src.database.models import Character
-        with Character.session() as session:
-            # Достаём пресонажа по имени
-            character = session.scalar(select(Character).filter_by(name=name))
-            # Если персонаж найден
-            if character is not None:
-                # Выдаём ошибку
-                raise ValueError("Такой персонаж уже сущетсвует")
-            # В другом случае возвращаем валидные данные
-            return name
-
 
 class CharacterUpdateForm(CharacterBasic):
     """
@@ -93,6 +73,25 @@ class CharacterUpdateForm(CharacterBasic):
     ...
 
 
+class CharacterPatchForm(partial_model(CharacterUpdateForm)):
+    """
+    Схема частичного обновления персонажа: передаются только изменяемые поля
+    """
+    ...
+
+
+class CharacterBulkUpdateForm(CharacterUpdateForm):
+    """
+    Схема обновления персонажа в массовом обновлении
+    """
+    # ID персонажа
+    id: PositiveInt = Field(
+        default=...,
+        title="ID персонажа",
+        description="ID обновляемого персонажа"
+    )
+
+
 class CharacterDetail(CharacterBasic):
     """
     Схема представления данных о конкретном персонаже
@@ -112,6 +111,9 @@ class CharacterDetail(CharacterBasic):
         description="Слаг конкретного персонажа"
     )
 
+    # Поля, из которых строится слаг, в порядке их следования в слаге
+    SLUG_FIELDS: ClassVar[Tuple[str, ...]] = ("name", "date_created")
+
     @model_validator(mode="after")
     def validator(self) -> Self:
         """
@@ -121,7 +123,7 @@ class CharacterDetail(CharacterBasic):
         # Если слаг не передан
         if self.slug is None:
             # Генерируем слаг на основании имени конкретного персонажа
-            self.slug = slugify(f"{self.name}-{self.date_created}")
+            self.slug = slugify("-".join(str(getattr(self, field)) for field in self.SLUG_FIELDS))
 
         # В другом случае возвращаем валидные данные
         return self
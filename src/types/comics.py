@@ -1,13 +1,13 @@
 import datetime
 from decimal import Decimal
-from typing import Optional, Self, List
+from enum import Enum
+from typing import Optional, Self, List, ClassVar, Tuple, Dict
 
-from sqlalchemy import select
-
-from pydantic import Field, PositiveInt, model_validator, field_validator
+from pydantic import Field, PositiveInt, model_validator
 from slugify import slugify
 
-from .base import DTO
+from .base import DTO, partial_model
+from .filters import PriceFilter
 from .custom_types import AlphaStr, TitleStr
 
 
@@ -64,25 +64,6 @@ class ComicsAddForm(ComicsBasic):
     """
     ...
 
-    @field_validator("title", mode="after")
-    def title_validator(cls, title: str) -> str:
-        """
-        Валидатор названия комикса
-        :param title:
-        :return:
-        """
-        from src.database.models import Comics
-        # Открываем сессию
-        with Comics.session() as session:
-            # Достаём комикс по названию
-            comics = session.scalar(select(Comics).filter_by(title=title))
-            # Если комикс найден
-            if comics is not None:
-                # Выдаём ошибку
-                raise ValueError("Такой комикс уже существует")
-            # В другом случае возвращаем валидные данные
-            return title
-
 
 class ComicsUpdateForm(ComicsBasic):
     """
@@ -91,6 +72,25 @@ class ComicsUpdateForm(ComicsBasic):
     ...
 
 
+class ComicsPatchForm(partial_model(ComicsUpdateForm)):
+    """
+    Схема частичного обновления комикса: передаются только изменяемые поля
+    """
+    ...
+
+
+class ComicsBulkUpdateForm(ComicsUpdateForm):
+    """
+    Схема обновления комикса в массовом обновлении
+    """
+    # ID комикса
+    id: PositiveInt = Field(
+        default=...,
+        title="ID комикса",
+        description="ID обновляемого комикса"
+    )
+
+
 class ComicsDetail(ComicsBasic):
     """
     Схема представления данных конкретного комикса
@@ -110,6 +110,9 @@ class ComicsDetail(ComicsBasic):
         description="Слаг конкретного комикса"
     )
 
+    # Поля, из которых строится слаг, в порядке их следования в слаге
+    SLUG_FIELDS: ClassVar[Tuple[str, ...]] = ("title", "volume", "date_created")
+
     @model_validator(mode="after")
     def validator(self) -> Self:
         """
@@ -119,7 +122,52 @@ class ComicsDetail(ComicsBasic):
         # Если слаг не передан
         if self.slug is None:
             # Генерируем слаг на основании названия, тома и даты создания конкретного комикса
-            self.slug = slugify(f"{self.title}-{self.volume}-{self.date_created}")
+            self.slug = slugify("-".join(str(getattr(self, field)) for field in self.SLUG_FIELDS))
 
         # В другом случае возвращаем валидные данные
         return self
+
+
+class ComicsSort(str, Enum):
+    """
+    Ключи сортировки списка комиксов, минус перед ключом - сортировка по убыванию
+    """
+    ID = "id"
+    PRICE = "price"
+    PRICE_DESC = "-price"
+    DATE_CREATED = "date_created"
+    DATE_CREATED_DESC = "-date_created"
+
+
+class ComicsFilter(PriceFilter):
+    """
+    Схема фильтров и сортировки списка комиксов
+    """
+    # Период задаётся по дате создания комикса
+    FILTER_COLUMNS: ClassVar[Dict[str, str]] = {"date": "date_created"}
+
+    # Страна выпуска комикса
+    country: Optional[str] = Field(
+        default=None,
+        max_length=64,
+        title="Страна выпуска",
+        description="Комиксы, выпущенные в конкретной стране"
+    )
+    # Начало периода создания
+    date_from: Optional[datetime.date] = Field(
+        default=None,
+        title="Дата создания от",
+        description="Комиксы, созданные не раньше указанной даты"
+    )
+    # Конец периода создания
+    date_to: Optional[datetime.date] = Field(
+        default=None,
+        title="Дата создания до",
+        description="Комиксы, созданные не позже указанной даты"
+    )
+    # Ключ сортировки
+    sort: ComicsSort = Field(
+        default=ComicsSort.ID,
+        title="Сортировка",
+        description="Поле сортировки, с минусом - по убыванию"
+    )
@@ -1,7 +1,7 @@
 from typing import Optional
 
 from pydantic import Field, PositiveInt
-from .base import DTO
+from .base import DTO, partial_model
 
 
 class ComicsAuthorsBasic(DTO):
@@ -34,6 +34,13 @@ class ComicsAuthorsUpdateForm(ComicsAuthorsBasic):
     ...
 
 
+class ComicsAuthorsPatchForm(partial_model(ComicsAuthorsUpdateForm)):
+    """
+    Схема частичного обновления связи между комиксом и автором: передаются только изменяемые поля
+    """
+    ...
+
+
 class ComicsAuthorsDetail(ComicsAuthorsBasic):
     """
     Схема представления экземпляра связанной модели Комикса и Автора
@@ -1,7 +1,7 @@
 from typing import List, Optional, Self
 
 from pydantic import Field, PositiveInt, model_validator
-from .base import DTO
+from .base import DTO, partial_model
 
 
 class ComicsCharacterBasic(DTO):
@@ -34,6 +34,13 @@ class ComicsCharacterUpdateForm(ComicsCharacterBasic):
     ...
 
 
+class ComicsCharacterPatchForm(partial_model(ComicsCharacterUpdateForm)):
+    """
+    Схема частичного обновления связи между комиксом и персонажем: передаются только изменяемые поля
+    """
+    ...
+
+
 class ComicsCharacterDetail(ComicsCharacterBasic):
     """
     Схема представления экземпляра связанной модели Комикса и Автора
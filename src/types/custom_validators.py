@@ -53,7 +53,7 @@ def age_validator(age: int) -> int:
     :return:
     """
     # Возвраст указан верно
-    if age + "+":
+    if age > 0:
         # Возвращаем его
         return age
     # В противном случае выдаём оибку о том, что возраст введен неправильно
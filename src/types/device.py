@@ -1,12 +1,12 @@
 from decimal import Decimal
-from typing import Self, Optional
+from enum import Enum
+from typing import Self, Optional, ClassVar, Tuple
 
-from sqlalchemy import select
-
-from pydantic import Field, PositiveInt, model_validator, field_validator
+from pydantic import Field, PositiveInt, model_validator
 from slugify import slugify
 
-from .base import DTO
+from .base import DTO, partial_model
+from .filters import ProductFilter
 from .custom_types import AlphaStr, TitleStr
 
 
@@ -56,25 +56,6 @@ class DeviceAddFrom(DeviceBasic):
     """
     ...
 
-    @field_validator("title", mode="after")
-    def title_validator(cls, title: str) -> str:
-        """
-        Валидатор названия девайса
-        :param title:
-        :return:
-        """
-        from src.database.models import Device
-        # Открываем сессию
-        with Device.session() as session:
-            # Достаём девайс по названию
-            device = session.scalar(select(Device).filter_by(title=title))
-            # Если девайс найден
-            if device is not None:
-                # Выдаём ошибку
-                raise ValueError("Такой девайс уже существует")
-            # В другом случае возвращаем валидные значения
-            return title
-
 
 class DeviceUpdateForm(DeviceBasic):
     """
@@ -83,6 +64,25 @@ class DeviceUpdateForm(DeviceBasic):
     ...
 
 
+class DevicePatchForm(partial_model(DeviceUpdateForm)):
+    """
+    Схема частичного обновления девайса: передаются только изменяемые поля
+    """
+    ...
+
+
+class DeviceBulkUpdateForm(DeviceUpdateForm):
+    """
+    Схема обновления девайса в массовом обновлении
+    """
+    # ID девайса
+    id: PositiveInt = Field(
+        default=...,
+        title="ID девайса",
+        description="ID обновляемого девайса"
+    )
+
+
 class DeviceDetail(DeviceBasic):
     """
     Схема представления данных о конкретном девайсе
@@ -102,6 +102,9 @@ class DeviceDetail(DeviceBasic):
         description="Слаг конкретного девайса"
     )
 
+    # Поля, из которых строится слаг, в порядке их следования в слаге
+    SLUG_FIELDS: ClassVar[Tuple[str, ...]] = ("title", "type_of_device", "price")
+
     @model_validator(mode="after")
     def validator(self) -> Self:
         """
@@ -111,7 +114,35 @@ class DeviceDetail(DeviceBasic):
         # Если слаг не передан
         if self.slug is None:
             # Генерируем слаг на основании названия, типа и цены конкретного девайса
-            self.slug = slugify(f"{self.title}-{self.type_of_device}-{self.price}")
+            self.slug = slugify("-".join(str(getattr(self, field)) for field in self.SLUG_FIELDS))
 
         # В другом случае возвращаем валидные данные
         return self
+
+
+class DeviceSort(str, Enum):
+    """
+    Ключи сортировки списка девайсов, минус перед ключом - сортировка по убыванию
+    """
+    ID = "id"
+    PRICE = "price"
+    PRICE_DESC = "-price"
+
+
+class DeviceFilter(ProductFilter):
+    """
+    Схема фильтров и сортировки списка девайсов
+    """
+    # Тип девайса
+    type_of_device: Optional[str] = Field(
+        default=None,
+        max_length=64,
+        title="Тип девайса",
+        description="Девайсы конкретного типа"
+    )
+    # Ключ сортировки
+    sort: DeviceSort = Field(
+        default=DeviceSort.ID,
+        title="Сортировка",
+        description="Поле сортировки, с минусом - по убыванию"
+    )
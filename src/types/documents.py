@@ -0,0 +1,63 @@
+from typing import List
+
+from pydantic import Field
+
+from .character import CharacterDetail
+from .comics import ComicsDetail
+from .device import DeviceDetail
+from .sweet import SweetDetail
+from .toy import ToyDetail
+from .universe import UniverseDetail
+from .аuthor import AuthorDetail
+
+
+class CharacterFull(CharacterDetail):
+    """
+    Схема страницы персонажа: персонаж вместе со вселенной, автором и всеми товарами
+    """
+    # Вселенная персонажа
+    universe: UniverseDetail = Field(
+        default=...,
+        title="Вселенная персонажа"
+    )
+    # Автор персонажа
+    author: AuthorDetail = Field(
+        default=...,
+        title="Автор персонажа"
+    )
+    # Девайсы персонажа
+    devices: List[DeviceDetail] = Field(
+        default=...,
+        title="Девайсы персонажа",
+        description="Все девайсы персонажа в порядке ID"
+    )
+    # Сладости персонажа
+    sweets: List[SweetDetail] = Field(
+        default=...,
+        title="Сладости персонажа",
+        description="Все сладости персонажа в порядке ID"
+    )
+    # Игрушки персонажа
+    toys: List[ToyDetail] = Field(
+        default=...,
+        title="Игрушки персонажа",
+        description="Все игрушки персонажа в порядке ID"
+    )
+
+
+class ComicsFull(ComicsDetail):
+    """
+    Схема страницы комикса: комикс вместе с авторами и персонажами
+    """
+    # Авторы комикса
+    authors: List[AuthorDetail] = Field(
+        default=...,
+        title="Авторы комикса",
+        description="Все авторы комикса в порядке ID"
+    )
+    # Персонажи комикса
+    characters: List[CharacterDetail] = Field(
+        default=...,
+        title="Персонажи комикса",
+        description="Все персонажи комикса в порядке ID"
+    )
@@ -0,0 +1,11 @@
+from enum import Enum
+
+
+class ExportFormat(str, Enum):
+    """
+    Формат выгрузки каталога
+    """
+    # Одна JSON-запись на строку
+    NDJSON = "ndjson"
+    # CSV с заголовком из полей схемы
+    CSV = "csv"
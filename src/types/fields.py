@@ -0,0 +1,84 @@
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Type, get_args
+
+from .base import DTO
+
+# Разделитель полей в параметре fields
+FIELDS_SEPARATOR = ","
+
+
+def _to_date(value: date) -> date:
+    """
+    Дата из значения колонки TIMESTAMP: схема отдаёт такие поля датой без времени
+    :param value:
+    :return:
+    """
+    return value.date() if isinstance(value, datetime) else value
+
+
+# Типы, которые схемы сериализуют в JSON не так, как orjson: Decimal схема отдаёт строкой, а date - без времени,
+# даже если колонка в БД хранит время
+JSON_CONVERTERS: Dict[Any, Callable[[Any], Any]] = {Decimal: str, date: _to_date}
+
+
+def parse_fields(detail: Type[DTO], fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Разбор параметра fields: имена полей схемы представления через запятую, без повторов и в порядке схемы.
+    None означает все поля
+    :param detail:
+    :param fields:
+    :return:
+    """
+    # Если поля не переданы, отдаём запись целиком
+    if fields is None:
+        return None
+    names = {name.strip() for name in fields.split(FIELDS_SEPARATOR)} - {""}
+    unknown = names - detail.model_fields.keys()
+    # Если среди полей есть неизвестные или не передано ни одного, выдаём ошибку со списком допустимых полей
+    if unknown:
+        raise ValueError(f"Неизвестные поля: {', '.join(sorted(unknown))}. "
+                         f"Допустимые поля: {', '.join(detail.model_fields)}")
+    if not names:
+        raise ValueError(f"Не передано ни одного поля. Допустимые поля: {', '.join(detail.model_fields)}")
+    # Порядок полей берём из схемы, чтобы одинаковые наборы давали одинаковый ответ и одну схему в кэше
+    return tuple(name for name in detail.model_fields if name in names)
+
+
+def json_type(annotation: Any) -> Optional[type]:
+    """
+    Тип из JSON_CONVERTERS, к которому относится аннотация поля схемы, если схема сериализует его не так, как orjson.
+    Optional[X] и Annotated[X, ...] сводятся к X
+    :param annotation:
+    :return:
+    """
+    for candidate in (annotation, *get_args(annotation)):
+        if candidate in JSON_CONVERTERS:
+            return candidate
+    return None
+
+
+@lru_cache
+def row_serializer(detail: Type[DTO], fields: Optional[Tuple[str, ...]] = None) -> Callable[[Mapping], Dict[str, Any]]:
+    """
+    Сериализатор строки БД в словарь для orjson без валидации: строки из БД уже прошли валидацию при записи,
+    поэтому повторно прогонять через схему их не нужно. Ответ совпадает с model_dump(mode="json") схемы
+    представления. Сериализатор строится один раз на схему и набор полей
+    :param detail:
+    :param fields:
+    :return:
+    """
+    names = tuple(detail.model_fields) if fields is None else fields
+    converters = tuple(
+        (name, JSON_CONVERTERS.get(json_type(annotation=detail.model_fields[name].annotation))) for name in names
+    )
+
+    def serialize(row: Mapping) -> Dict[str, Any]:
+        return {
+            name: value if convert is None or value is None else convert(value)
+            for name, convert in converters
+            for value in (row[name],)
+        }
+
+    return serialize
@@ -0,0 +1,78 @@
+from enum import Enum
+from typing import ClassVar, Dict, Optional, Self, Tuple
+
+from pydantic import Field, NonNegativeInt, PositiveInt, model_validator
+
+from .base import DTO
+
+# Префикс ключа сортировки по убыванию
+DESCENDING_PREFIX = "-"
+
+
+class ListFilter(DTO):
+    """
+    Базовая схема фильтров и сортировки списка записей.
+    Поля с суффиксами _min/_from задают нижнюю границу, _max/_to - верхнюю, остальные сравниваются на равенство
+    """
+    # Колонки модели для фильтров, чьё имя без суффикса не совпадает с именем колонки
+    FILTER_COLUMNS: ClassVar[Dict[str, str]] = {}
+
+    @model_validator(mode="after")
+    def validate_ranges(self) -> Self:
+        """
+        Проверка, что нижняя граница диапазона не больше верхней
+        :return:
+        """
+        for name, value in self.model_dump(exclude_none=True).items():
+            # Ищем верхнюю границу для каждой нижней
+            for low, high in (("_min", "_max"), ("_from", "_to")):
+                if name.endswith(low):
+                    upper = getattr(self, name.removesuffix(low) + high, None)
+                    if upper is not None and value > upper:
+                        raise ValueError(f"{name} больше {name.removesuffix(low) + high}")
+        return self
+
+
+def sort_key(sort: Enum) -> Tuple[str, bool]:
+    """
+    Имя поля и направление сортировки по значению ключа: price - по возрастанию, -price - по убыванию
+    :param sort:
+    :return:
+    """
+    return sort.value.removeprefix(DESCENDING_PREFIX), sort.value.startswith(DESCENDING_PREFIX)
+
+
+class PriceFilter(ListFilter):
+    """
+    Схема фильтра по диапазону цены
+    """
+    # Минимальная цена
+    price_min: Optional[NonNegativeInt] = Field(
+        default=None,
+        title="Минимальная цена",
+        description="Записи с ценой не меньше указанной"
+    )
+    # Максимальная цена
+    price_max: Optional[NonNegativeInt] = Field(
+        default=None,
+        title="Максимальная цена",
+        description="Записи с ценой не больше указанной"
+    )
+
+
+class ProductFilter(PriceFilter):
+    """
+    Схема фильтров товаров персонажей: цена, персонаж и вселенная персонажа
+    """
+    # Персонаж товара
+    character_id: Optional[PositiveInt] = Field(
+        default=None,
+        title="Персонаж",
+        description="Товары конкретного персонажа"
+    )
+    # Вселенная персонажа товара
+    universe_id: Optional[PositiveInt] = Field(
+        default=None,
+        title="Вселенная",
+        description="Товары персонажей конкретной вселенной"
+    )
@@ -0,0 +1,95 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from typing import Generic, List, Optional, TypeVar, Union
+
+from orjson import dumps, loads, JSONDecodeError
+from pydantic import Field, PositiveInt
+
+from .base import DTO
+
+# Размер страницы по умолчанию
+DEFAULT_PAGE_LIMIT = 50
+# Максимальный размер страницы
+MAX_PAGE_LIMIT = 500
+
+# Максимальное количество ключей в курсоре: поле сортировки и ID
+MAX_CURSOR_KEYS = 2
+
+# Тип элементов страницы
+ItemT = TypeVar("ItemT")
+# Тип ключа сортировки в курсоре: даты хранятся в нём строкой ISO 8601
+CursorKey = Union[int, float, str]
+
+
+class InvalidCursor(ValueError):
+    """
+    Курсор повреждён или получен при другой сортировке списка
+    """
+
+
+def encode_cursor(*keys: CursorKey) -> str:
+    """
+    Кодирование курсора страницы по ключам сортировки последней записи: значению поля сортировки, если оно есть, и ID
+    :param keys:
+    :return:
+    """
+    # Курсор непрозрачен для клиента: это base64 от JSON-списка ключей сортировки
+    return urlsafe_b64encode(dumps(keys)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[CursorKey]:
+    """
+    Декодирование курсора страницы в ключи сортировки последней записи
+    :param cursor:
+    :return:
+    """
+    try:
+        # Восстанавливаем отброшенное выравнивание base64 и разбираем ключи сортировки
+        keys = loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (BinasciiError, JSONDecodeError, ValueError):
+        # Выдаём ошибку, если курсор повреждён
+        raise InvalidCursor("Невалидный курсор")
+    # Если внутри курсора не ключи сортировки, заканчивающиеся ID записи
+    if (not isinstance(keys, list) or not 1 <= len(keys) <= MAX_CURSOR_KEYS or not isinstance(keys[-1], int)
+            or not all(isinstance(key, (int, float, str)) for key in keys)):
+        # Выдаём ошибку
+        raise InvalidCursor("Невалидный курсор")
+    # В другом случае возвращаем ключи последней записи предыдущей страницы
+    return keys
+
+
+class Pagination(DTO):
+    """
+    Схема параметров курсорной пагинации
+    """
+    # Размер страницы
+    limit: PositiveInt = Field(
+        default=DEFAULT_PAGE_LIMIT,
+        le=MAX_PAGE_LIMIT,
+        title="Размер страницы",
+        description="Максимальное количество записей на странице"
+    )
+    # Ключи сортировки последней записи предыдущей страницы
+    after: Optional[List[CursorKey]] = Field(
+        default=None,
+        title="Ключи последней записи",
+        description="Значение поля сортировки и ID последней записи предыдущей страницы, полученные из курсора"
+    )
+
+
+class Page(DTO, Generic[ItemT]):
+    """
+    Схема страницы списка записей
+    """
+    # Записи страницы
+    items: List[ItemT] = Field(
+        default=...,
+        title="Записи страницы",
+        description="Записи текущей страницы в порядке сортировки, по умолчанию по ID"
+    )
+    # Курсор следующей страницы
+    next_cursor: Optional[str] = Field(
+        default=None,
+        title="Курсор следующей страницы",
+        description="Значение параметра after для запроса следующей страницы, отсутствует на последней странице"
+    )
@@ -0,0 +1,57 @@
+from enum import Enum
+
+from pydantic import Field, PositiveInt
+
+from .base import DTO
+
+# Минимальная длина поискового запроса: триграммам нужно хотя бы два символа
+MIN_QUERY_LENGTH = 2
+# Максимальная длина поискового запроса
+MAX_QUERY_LENGTH = 128
+
+
+class SearchKind(str, Enum):
+    """
+    Вид найденной записи каталога
+    """
+    CHARACTER = "character"
+    COMICS = "comics"
+    DEVICE = "device"
+    SWEET = "sweet"
+    TOY = "toy"
+
+
+class SearchHit(DTO):
+    """
+    Схема представления найденной записи каталога
+    """
+    # Вид записи
+    kind: SearchKind = Field(
+        default=...,
+        title="Вид записи",
+        description="Таблица каталога, в которой найдена запись"
+    )
+    # ID записи
+    id: PositiveInt = Field(
+        default=...,
+        title="ID записи",
+        description="ID записи в своей таблице"
+    )
+    # Название записи
+    title: str = Field(
+        default=...,
+        title="Название",
+        description="Название записи, у персонажа - имя"
+    )
+    # Слаг записи
+    slug: str = Field(
+        default=...,
+        title="Слаг",
+        description="Слаг записи"
+    )
+    # Ранг совпадения
+    rank: float = Field(
+        default=...,
+        title="Ранг",
+        description="Релевантность записи запросу: полнотекстовый ранг и сходство названия или слага по триграммам"
+    )
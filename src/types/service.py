@@ -0,0 +1,140 @@
+from typing import Dict, Optional
+
+from pydantic import Field, NonNegativeInt, NonNegativeFloat
+
+from .base import DTO
+
+
+class CacheStats(DTO):
+    """
+    Схема представления счётчиков кэша ответов
+    """
+    hits: NonNegativeInt = Field(
+        default=...,
+        title="Попадания",
+        description="Количество ответов, отданных из кэша"
+    )
+    misses: NonNegativeInt = Field(
+        default=...,
+        title="Промахи",
+        description="Количество запросов, ушедших в БД"
+    )
+    evictions: NonNegativeInt = Field(
+        default=...,
+        title="Вытеснения",
+        description="Количество записей, вытесненных из-за ограничения размера кэша"
+    )
+    size: NonNegativeInt = Field(
+        default=...,
+        title="Размер",
+        description="Текущее количество записей в кэше"
+    )
+    max_size: NonNegativeInt = Field(
+        default=...,
+        title="Максимальный размер",
+        description="Максимальное количество записей в кэше"
+    )
+
+
+class HistogramStats(DTO):
+    """
+    Схема представления гистограммы
+    """
+    buckets: Dict[str, NonNegativeInt] = Field(
+        default=...,
+        title="Корзины",
+        description="Количество наблюдений не больше каждой границы, накопительно, как в Prometheus"
+    )
+    sum: NonNegativeFloat = Field(
+        default=...,
+        title="Сумма",
+        description="Сумма всех наблюдений"
+    )
+    count: NonNegativeInt = Field(
+        default=...,
+        title="Количество",
+        description="Количество наблюдений"
+    )
+
+
+class PoolStats(DTO):
+    """
+    Схема представления состояния пула соединений с БД
+    """
+    size: NonNegativeInt = Field(
+        default=...,
+        title="Размер пула",
+        description="Количество постоянных соединений в пуле"
+    )
+    checked_in: NonNegativeInt = Field(
+        default=...,
+        title="Свободные соединения",
+        description="Количество соединений, ожидающих в пуле"
+    )
+    checked_out: NonNegativeInt = Field(
+        default=...,
+        title="Занятые соединения",
+        description="Количество соединений, выданных запросам"
+    )
+    overflow: int = Field(
+        default=...,
+        title="Переполнение",
+        description="Количество соединений сверх размера пула, отрицательно, пока пул не заполнен"
+    )
+    max_overflow: int = Field(
+        default=...,
+        title="Максимальное переполнение",
+        description="Максимальное количество соединений сверх размера пула"
+    )
+    timeouts: NonNegativeInt = Field(
+        default=...,
+        title="Таймауты",
+        description="Количество запросов, не дождавшихся соединения"
+    )
+    wait_time: HistogramStats = Field(
+        default=...,
+        title="Время ожидания",
+        description="Гистограмма времени получения соединения из пула в секундах"
+    )
+
+
+class ReplicaStats(DTO):
+    """
+    Схема представления состояния реплики только для чтения
+    """
+    name: str = Field(
+        default=...,
+        title="Реплика",
+        description="Адрес реплики без пароля"
+    )
+    available: bool = Field(
+        default=...,
+        title="Доступна",
+        description="Отвечает ли реплика и отстаёт ли она не больше REPLICA_MAX_LAG"
+    )
+    lag: Optional[NonNegativeFloat] = Field(
+        default=...,
+        title="Отставание",
+        description="Последнее измеренное отставание в секундах, null, если реплика не отвечает"
+    )
+    pool: PoolStats = Field(
+        default=...,
+        title="Пул соединений",
+        description="Состояние пула соединений с репликой этого процесса"
+    )
+
+
+class HealthStatus(DTO):
+    """
+    Схема представления готовности процесса принимать запросы
+    """
+    status: str = Field(
+        default=...,
+        title="Статус",
+        description="ok, если БД отвечает через пул соединений, иначе unavailable"
+    )
+    pool: PoolStats = Field(
+        default=...,
+        title="Пул соединений",
+        description="Состояние пула соединений с БД этого процесса"
+    )
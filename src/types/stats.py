@@ -0,0 +1,150 @@
+from decimal import Decimal
+from typing import Optional
+
+from pydantic import Field, NonNegativeInt, PositiveInt
+
+from .base import DTO
+
+
+class PriceStats(DTO):
+    """
+    Базовая схема статистики цен группы записей
+    """
+    # Минимальная цена
+    price_min: int = Field(
+        default=...,
+        title="Минимальная цена",
+        description="Минимальная цена в группе"
+    )
+    # Средняя цена
+    price_avg: Decimal = Field(
+        default=...,
+        title="Средняя цена",
+        description="Средняя цена в группе, округлённая до копеек"
+    )
+    # Максимальная цена
+    price_max: int = Field(
+        default=...,
+        title="Максимальная цена",
+        description="Максимальная цена в группе"
+    )
+
+
+class ProductStats(PriceStats):
+    """
+    Базовая схема статистики товаров: количество всего и по видам, цены
+    """
+    # Количество товаров
+    products: NonNegativeInt = Field(
+        default=...,
+        title="Товары",
+        description="Количество товаров всех видов"
+    )
+    # Количество девайсов
+    devices: NonNegativeInt = Field(
+        default=...,
+        title="Девайсы",
+        description="Количество девайсов"
+    )
+    # Количество сладостей
+    sweets: NonNegativeInt = Field(
+        default=...,
+        title="Сладости",
+        description="Количество сладостей"
+    )
+    # Количество игрушек
+    toys: NonNegativeInt = Field(
+        default=...,
+        title="Игрушки",
+        description="Количество игрушек"
+    )
+
+
+class UniverseStats(ProductStats):
+    """
+    Схема статистики товаров вселенной
+    """
+    # Вселенная
+    universe_id: Optional[PositiveInt] = Field(
+        default=...,
+        title="Вселенная",
+        description="ID вселенной, отсутствует в итоговой строке по всему каталогу"
+    )
+
+
+class CharacterStats(ProductStats):
+    """
+    Схема статистики товаров персонажа
+    """
+    # Персонаж
+    character_id: PositiveInt = Field(
+        default=...,
+        title="Персонаж",
+        description="ID персонажа"
+    )
+    # Вселенная персонажа
+    universe_id: PositiveInt = Field(
+        default=...,
+        title="Вселенная",
+        description="ID вселенной персонажа"
+    )
+
+
+class ProductTypeStats(PriceStats):
+    """
+    Схема статистики товаров вида и типа
+    """
+    # Вид товара
+    kind: Optional[str] = Field(
+        default=...,
+        title="Вид товара",
+        description="device, sweet или toy, отсутствует в итоговой строке по всему каталогу"
+    )
+    # Тип товара
+    type: Optional[str] = Field(
+        default=...,
+        title="Тип товара",
+        description="Тип девайса или игрушки, отсутствует в итоговой строке по виду"
+    )
+    # Количество товаров
+    products: NonNegativeInt = Field(
+        default=...,
+        title="Товары",
+        description="Количество товаров"
+    )
+
+
+class AuthorStats(DTO):
+    """
+    Схема статистики персонажей автора
+    """
+    # Автор
+    author_id: PositiveInt = Field(
+        default=...,
+        title="Автор",
+        description="ID автора"
+    )
+    # Количество персонажей
+    characters: NonNegativeInt = Field(
+        default=...,
+        title="Персонажи",
+        description="Количество персонажей автора"
+    )
+
+
+class ComicsStats(PriceStats):
+    """
+    Схема статистики комиксов страны выпуска
+    """
+    # Страна выпуска
+    country: Optional[str] = Field(
+        default=...,
+        title="Страна выпуска",
+        description="Страна выпуска, отсутствует в итоговой строке по всем странам"
+    )
+    # Количество комиксов
+    comics: NonNegativeInt = Field(
+        default=...,
+        title="Комиксы",
+        description="Количество комиксов"
+    )
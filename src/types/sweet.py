@@ -1,11 +1,12 @@
 from decimal import Decimal
-from typing import Self, Optional
+from enum import Enum
+from typing import Self, Optional, ClassVar, Tuple
 
-from pydantic import Field, model_validator, PositiveInt, field_validator
+from pydantic import Field, model_validator, PositiveInt
 from slugify import slugify
-from sqlalchemy import select
 
-from .base import DTO
+from .base import DTO, partial_model
+from .filters import ProductFilter
 from .custom_types import AlphaStr, TitleStr
 
 
@@ -53,25 +54,6 @@ class SweetAddForm(SweetBasic):
     """
     ...
 
-    @field_validator("title", mode="after")
-    def title_validator(cls, title: str) -> str:
-        """
-        Валидатор названия сладости
-        :param title:
-        :return:
-        """
-        from src.database.models import Sweet
-        # Открываем сессию
-        with Sweet.session() as session:
-            # Достаём сладость по названию
-            sweet = session.scalar(select(Sweet).filter_by(title=title))
-            # Если сладость найдена
-            if sweet is not None:
-                # Выдаём ошибку
-                raise ValueError("Такая сладость уже существует")
-            # В другом случае возвращаем валидные данные
-            return title
-
 
 class SweetUpdateForm(SweetBasic):
     """
@@ -80,6 +62,25 @@ class SweetUpdateForm(SweetBasic):
     ...
 
 
+class SweetPatchForm(partial_model(SweetUpdateForm)):
+    """
+    Схема частичного обновления сладости: передаются только изменяемые поля
+    """
+    ...
+
+
+class SweetBulkUpdateForm(SweetUpdateForm):
+    """
+    Схема обновления сладости в массовом обновлении
+    """
+    # ID сладости
+    id: PositiveInt = Field(
+        default=...,
+        title="ID сладости",
+        description="ID обновляемой сладости"
+    )
+
+
 class SweetDetail(SweetBasic):
     """
     Схема представления данных о конкретной сладости
@@ -99,6 +100,9 @@ class SweetDetail(SweetBasic):
         description="Слаг конкретного девайса"
     )
 
+    # Поля, из которых строится слаг, в порядке их следования в слаге
+    SLUG_FIELDS: ClassVar[Tuple[str, ...]] = ("title", "weight", "price")
+
     @model_validator(mode="after")
     def validator(self) -> Self:
         """
@@ -108,7 +112,28 @@ class SweetDetail(SweetBasic):
         # Если слаг не передан
         if self.slug is None:
             # Генерируем слаг на основании названия, веса и цены конкретной сладости
-            self.slug = slugify(f"{self.title}-{self.weight}-{self.price}")
+            self.slug = slugify("-".join(str(getattr(self, field)) for field in self.SLUG_FIELDS))
 
         # В другом случае возвращаем валидные данные
         return self
+
+
+class SweetSort(str, Enum):
+    """
+    Ключи сортировки списка сладостей, минус перед ключом - сортировка по убыванию
+    """
+    ID = "id"
+    PRICE = "price"
+    PRICE_DESC = "-price"
+
+
+class SweetFilter(ProductFilter):
+    """
+    Схема фильтров и сортировки списка сладостей
+    """
+    # Ключ сортировки
+    sort: SweetSort = Field(
+        default=SweetSort.ID,
+        title="Сортировка",
+        description="Поле сортировки, с минусом - по убыванию"
+    )
@@ -1,11 +1,12 @@
 from decimal import Decimal
-from typing import Self
+from enum import Enum
+from typing import Self, ClassVar, Tuple, Optional
 
-from pydantic import Field, model_validator, PositiveInt, field_validator
+from pydantic import Field, model_validator, PositiveInt
 from slugify import slugify
-from sqlalchemy import select
 
-from .base import DTO
+from .base import DTO, partial_model
+from .filters import ProductFilter
 from .custom_types import AlphaStr, TitleStr, AgeInt
 
 
@@ -62,25 +63,6 @@ class ToyAddForm(ToyBasic):
     """
     ...
 
-    @field_validator("title", mode="after")
-    def title_validator(cls, title: str) -> str:
-        """
-        Валидатор названия игрушки
-        :param title:
-        :return:
-        """
-        from src.database.models import Toy
-        # Открываем сессию
-        with Toy.session() as session:
-            # Достаём игрушку по названию
-            toy = session.scalar(select(Toy).filter_by(title=title))
-            # Если игрушка найдена
-            if toy is not None:
-                # Выдаём ошибку
-                raise ValueError("Такая игрушка уже существует")
-            # В другом случае возвращаем валидные данные
-            return title
-
 
 class ToyUpdateForm(ToyBasic):
     """
@@ -89,6 +71,25 @@ class ToyUpdateForm(ToyBasic):
     ...
 
 
+class ToyPatchForm(partial_model(ToyUpdateForm)):
+    """
+    Схема частичного обновления игрушки: передаются только изменяемые поля
+    """
+    ...
+
+
+class ToyBulkUpdateForm(ToyUpdateForm):
+    """
+    Схема обновления игрушки в массовом обновлении
+    """
+    # ID игрушки
+    id: PositiveInt = Field(
+        default=...,
+        title="ID игрушки",
+        description="ID обновляемой игрушки"
+    )
+
+
 class ToyDetail(ToyBasic):
     """
     Схема представления данных о конкретной игрушке
@@ -108,6 +109,9 @@ class ToyDetail(ToyBasic):
         description="Слаг конкретной игрушки"
     )
 
+    # Поля, из которых строится слаг, в порядке их следования в слаге
+    SLUG_FIELDS: ClassVar[Tuple[str, ...]] = ("title", "type_of_toy", "price")
+
     @model_validator(mode="after")
     def validator(self) -> Self:
         """
@@ -117,7 +121,49 @@ class ToyDetail(ToyBasic):
         # Если слаг не передан
         if self.slug is None:
             # Генерируем слаг на основании имени, весе и цене конкретной игрушки
-            self.slug = slugify(f"{self.title}-{self.type_of_toy}-{self.price}")
+            self.slug = slugify("-".join(str(getattr(self, field)) for field in self.SLUG_FIELDS))
 
         # В другом случае возвращаем валидные данные
-        return Self
+        return self
+
+
+class ToySort(str, Enum):
+    """
+    Ключи сортировки списка игрушек, минус перед ключом - сортировка по убыванию
+    """
+    ID = "id"
+    PRICE = "price"
+    PRICE_DESC = "-price"
+    AGE = "age"
+    AGE_DESC = "-age"
+
+
+class ToyFilter(ProductFilter):
+    """
+    Схема фильтров и сортировки списка игрушек
+    """
+    # Минимальный возраст для игрушки
+    age_min: Optional[AgeInt] = Field(
+        default=None,
+        title="Возраст от",
+        description="Игрушки с возрастным ограничением не меньше указанного"
+    )
+    # Максимальный возраст для игрушки
+    age_max: Optional[AgeInt] = Field(
+        default=None,
+        title="Возраст до",
+        description="Игрушки с возрастным ограничением не больше указанного"
+    )
+    # Тип игрушки
+    type_of_toy: Optional[str] = Field(
+        default=None,
+        max_length=64,
+        title="Тип игрушки",
+        description="Игрушки конкретного типа"
+    )
+    # Ключ сортировки
+    sort: ToySort = Field(
+        default=ToySort.ID,
+        title="Сортировка",
+        description="Поле сортировки, с минусом - по убыванию"
+    )
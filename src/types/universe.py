@@ -1,11 +1,10 @@
 import datetime
-from typing import Self, Optional
+from typing import Self, Optional, ClassVar, Tuple
 
-from pydantic import Field, PositiveInt, model_validator, field_validator
+from pydantic import Field, PositiveInt, model_validator
 from slugify import slugify
-from sqlalchemy import select
 
-from .base import DTO
+from .base import DTO, partial_model
 from .custom_types import AlphaStr, TitleStr
 
 
@@ -37,26 +36,6 @@ class UniverseAddForm(UniverseBasic):
     """
     ...
 
-    @field_validator("title", mode="after")
-    def title_validator(cls, title: str) -> str:
-        """
-        Валидатор названия вселенной
-        :param title:
-        :return:
-        """
-        from src.database.models import Universe
-        # Открываем сессию
-        with Universe.session() as session:
-            # Достаём вселенную по названию
-            universe = session.scalar(select(Universe).filter_by(title=title))
-            # Если вселенная надена
-            if universe is not None:
-                # Выдаём ошибку
-                raise ValueError("Такая вселенная уже сущетсвует")
-
-            # В другом случае возвращаем валлидные данные
-            return title
-
 
 class UniverseUpdateForm(UniverseBasic):
     """
@@ -65,6 +44,25 @@ class UniverseUpdateForm(UniverseBasic):
     ...
 
 
+class UniversePatchForm(partial_model(UniverseUpdateForm)):
+    """
+    Схема частичного обновления вселенной: передаются только изменяемые поля
+    """
+    ...
+
+
+class UniverseBulkUpdateForm(UniverseUpdateForm):
+    """
+    Схема обновления вселенной в массовом обновлении
+    """
+    # ID вселенной
+    id: PositiveInt = Field(
+        default=...,
+        title="ID вселенной",
+        description="ID обновляемой вселенной"
+    )
+
+
 class UniverseDetail(UniverseBasic):
     """
     Схема представления конкретной вселенной персонажей
@@ -84,6 +82,9 @@ class UniverseDetail(UniverseBasic):
         description="Слаг конкретного персонажа"
     )
 
+    # Поля, из которых строится слаг, в порядке их следования в слаге
+    SLUG_FIELDS: ClassVar[Tuple[str, ...]] = ("title", "date_created")
+
     @model_validator(mode="after")
     def validator(self) -> Self:
         """
@@ -93,7 +94,7 @@ class UniverseDetail(UniverseBasic):
         # Если слаг не передан
         if self.slug is None:
             # Генерируем слаг на основании названия и даты создания конкретной вселенной
-            self.slug = slugify(f"{self.title}-{self.date_created}")
+            self.slug = slugify("-".join(str(getattr(self, field)) for field in self.SLUG_FIELDS))
 
         # В другом случае возвращаем валидные данные
         return self
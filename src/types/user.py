@@ -72,25 +72,6 @@ class UserRegisterForm(UserBasic):
         description="Потверждение пароля кокнретного пользователя"
     )
 
-    @field_validator("email", mode="after")
-    def email_validator(cls, email: str) -> str:
-        """
-        Валидатор адреса элетронной почты
-        :param email:
-        :return:
-        """
-        from src.database.models import User
-        # Открываем сессию
-        with User.session() as session:
-            # Достаём пользователя по адрему элетронной почты
-            user = session.scalar(select(User).filter_by(email=email))
-            # Если пользователь найден
-            if user is not None:
-                # Выдаём ошибку
-                raise ValueError("Пользователя с такой элетронной почтой уже существует")
-            # В другом случае возвращаем валидные данные
-            return email
-
     @model_validator(mode="after")
     def validator(self) -> Self:
         """
@@ -1,11 +1,10 @@
 import datetime
-from typing import Self, Optional
+from typing import Self, Optional, ClassVar, Tuple
 
-from pydantic import Field, PositiveInt, model_validator, field_validator
+from pydantic import Field, PositiveInt, model_validator
 from slugify import slugify
-from sqlalchemy import select
 
-from .base import DTO
+from .base import DTO, partial_model
 from .custom_types import AlphaStr
 
 
@@ -46,25 +45,6 @@ class AuthorAddForm(AuthorBasic):
     """
     ...
 
-    @field_validator("name", mode="after")
-    def name_validator(cls, name: str) -> str:
-        """
-        Валидатор имени автора
-        :param name:
-        :return:
-        """
-        from src.database.models import Author
-        # Открываем сессию
-        with Author.session() as session:
-            # Достаём автора по имени
-            author = session.scalar(select(Author).filter_by(name=name))
-            # Если автор найден
-            if author is not None:
-                # Выдаём ошибку
-                raise ValueError("Такой автор уже существует")
-            # В другом случае возвращаем валлидные данные
-            return name
-
 
 class AuthorUpdateForm(AuthorBasic):
     """
@@ -73,6 +53,25 @@ class AuthorUpdateForm(AuthorBasic):
     ...
 
 
+class AuthorPatchForm(partial_model(AuthorUpdateForm)):
+    """
+    Схема частичного обновления автора: передаются только изменяемые поля
+    """
+    ...
+
+
+class AuthorBulkUpdateForm(AuthorUpdateForm):
+    """
+    Схема обновления автора в массовом обновлении
+    """
+    # ID автора
+    id: PositiveInt = Field(
+        default=...,
+        title="ID автора",
+        description="ID обновляемого автора"
+    )
+
+
 class AuthorDetail(AuthorBasic):
     """
     Схема представления данных конкретного автора
@@ -92,6 +91,9 @@ class AuthorDetail(AuthorBasic):
         description="Слаг конкретного автора"
     )
 
+    # Поля, из которых строится слаг, в порядке их следования в слаге
+    SLUG_FIELDS: ClassVar[Tuple[str, ...]] = ("name", "surname", "birthday")
+
     @model_validator(mode="after")
     def validator(self) -> Self:
         """
@@ -101,7 +103,7 @@ class AuthorDetail(AuthorBasic):
         # Если слаг не передан
         if self.slug is None:
             # Генерируем слаг на основании имени, фамилии и даты рождения конкретного автора
-            self.slug = slugify(f"{self.name}-{self.surname}-{self.birthday}")
+            self.slug = slugify("-".join(str(getattr(self, field)) for field in self.SLUG_FIELDS))
 
         # В другом случае возвращаем валидные данные
         return self
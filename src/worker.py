@@ -0,0 +1,14 @@
+from uvicorn.workers import UvicornWorker
+
+
+class UvloopWorker(UvicornWorker):
+    """
+    Воркер gunicorn на uvicorn с обязательными uvloop и httptools.
+    Стандартный UvicornWorker выбирает их в режиме auto и молча откатывается на asyncio и h11
+    """
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        # Lifespan нужен, чтобы при остановке воркера закрыть соединения пула
+        "lifespan": "on"
+    }
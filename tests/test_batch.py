@@ -0,0 +1,27 @@
+"""
+Пакетные запросы записей по ID
+"""
+from fastapi.testclient import TestClient
+from pytest import mark
+from sqlalchemy import Engine
+
+from src.database.statements import assert_statements
+from .conftest import V1
+
+
+@mark.parametrize("path", ("/comics_authors/", "/comics_character/"))
+def test_batch_of_links(client: TestClient, catalog: Engine, path: str):
+    """
+    Связи достаются одним запросом в порядке переданных ID, ненайденные ID возвращаются отдельно,
+    а слагов у связей нет
+    :param client:
+    :param catalog:
+    :param path:
+    :return:
+    """
+    with assert_statements(expected=1):
+        response = client.get(f"{V1}{path}batch/", params={"ids": "3,99,1"})
+    assert response.status_code == 200, response.text
+    assert [item["id"] for item in response.json()["items"]] == [3, 1]
+    assert response.json()["missing"] == [99]
+    assert client.get(f"{V1}{path}batch/", params={"slugs": "link"}).status_code == 422
@@ -0,0 +1,71 @@
+"""
+Массовые запросы, в которых часть записей не проходит проверки
+"""
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, func, select
+
+from src.database.models import Toy
+from .conftest import V1
+
+# Поля новой игрушки, кроме названия и персонажа
+TOY = {"age": 6, "type_of_toy": "Figure", "price": 15}
+
+
+def test_bulk_create_saves_valid_records(client: TestClient, catalog: Engine):
+    """
+    Невалидные записи, записи со ссылкой на несуществующего персонажа и повторы возвращаются ошибками по позициям,
+    а остальные записи сохраняются
+    :param client:
+    :param catalog:
+    :return:
+    """
+    payload = [
+        {"title": "Toy Alpha", "character_id": 1, **TOY},
+        {"title": "Toy Beta", "character_id": 1, **TOY, "age": "old"},
+        {"title": "Toy Gamma", "character_id": 99, **TOY},
+        {"title": "Toy Alpha", "character_id": 1, **TOY},
+        {"title": "Toy Delta", "character_id": 4, **TOY},
+    ]
+    response = client.post(f"{V1}/toys/bulk/", json=payload)
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert [item["title"] for item in result["items"]] == ["Toy Alpha", "Toy Delta"]
+    assert [error["index"] for error in result["errors"]] == [1, 2, 3]
+    assert result["errors"][1]["errors"] == ["character_id: Связанная запись не найдена"]
+    assert result["errors"][2]["errors"] == ["Запись с такими данными уже есть в списке"]
+    # Сохранённые записи читаются по ID из ответа
+    assert client.get(f"{V1}/toys/{result['items'][1]['id']}/").json() == result["items"][1]
+    # Повтор уже сохранённой записи пропускается базой, не откатывая остальные
+    response = client.post(f"{V1}/toys/bulk/", json=[payload[0], {"title": "Toy Omega", "character_id": 1, **TOY}])
+    assert [item["title"] for item in response.json()["items"]] == ["Toy Omega"]
+    assert response.json()["errors"] == [{"index": 0, "errors": ["Запись с такими данными уже существует"]}]
+    with catalog.connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(Toy)) == 7
+
+
+def test_bulk_update_and_delete_report_missing_records(client: TestClient, catalog: Engine):
+    """
+    Массовое обновление пропускает несуществующие и повторные ID, а удаление отдаёт ненайденные ID отдельно
+    :param client:
+    :param catalog:
+    :return:
+    """
+    payload = [
+        {"id": 1, "title": "Toy Renamed", "character_id": 1, **TOY},
+        {"id": 99, "title": "Toy Missing", "character_id": 1, **TOY},
+        {"id": 1, "title": "Toy Again", "character_id": 1, **TOY},
+        {"id": 2, "title": "Toy Orphan", "character_id": 99, **TOY},
+    ]
+    response = client.patch(f"{V1}/toys/bulk/", json=payload)
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert [(item["id"], item["slug"]) for item in result["items"]] == [(1, "toy-renamed-figure-15")]
+    assert result["errors"] == [
+        {"index": 1, "errors": ["id: Запись не найдена"]},
+        {"index": 2, "errors": ["id: Запись уже есть в списке"]},
+        {"index": 3, "errors": ["character_id: Связанная запись не найдена"]},
+    ]
+    assert client.get(f"{V1}/toys/2/").json()["title"] == "Toy 2"
+    response = client.request("DELETE", f"{V1}/toys/bulk/", json={"ids": [4, 99, 1]})
+    assert response.json() == {"deleted": [1, 4], "not_found": [99]}
+    assert client.get(f"{V1}/toys/1/").status_code == 404
@@ -0,0 +1,76 @@
+"""
+Кэш ответов детальных эндпоинтов
+"""
+from src.cache import ResponseCache
+from src.database.models import Character, Universe
+from src.types.service import CacheStats
+
+
+def test_disabled_cache_stores_nothing():
+    """
+    При нулевом размере кэш отдаёт запись для ответа, но не хранит её и не считает попадания, промахи и вытеснения
+    :return:
+    """
+    cache = ResponseCache(max_size=0, ttl=60)
+    entry = cache.set(model=Universe, obj_id=1, content={"id": 1})
+    assert entry.body == b'{"id":1}'
+    assert cache.get(model=Universe, obj_id=1) is None
+    assert cache.stats() == CacheStats(hits=0, misses=0, evictions=0, size=0, max_size=0)
+
+
+def test_cache_evicts_least_recently_used():
+    """
+    Заполненный кэш вытесняет запись, к которой дольше всего не обращались
+    :return:
+    """
+    cache = ResponseCache(max_size=2, ttl=60)
+    for obj_id in (1, 2):
+        cache.set(model=Universe, obj_id=obj_id, content={"id": obj_id})
+    assert cache.get(model=Universe, obj_id=1) is not None
+    cache.set(model=Universe, obj_id=3, content={"id": 3})
+    assert cache.get(model=Universe, obj_id=2) is None
+    assert cache.stats() == CacheStats(hits=1, misses=1, evictions=1, size=2, max_size=2)
+
+
+def test_cache_drops_row_read_before_invalidation():
+    """
+    Строка, прочитанная до сброса записи, не попадает в кэш, а прочитанная после - попадает
+    :return:
+    """
+    cache = ResponseCache(max_size=2, ttl=60)
+    generation = cache.generation()
+    cache.invalidate(model=Universe, obj_id=1)
+    cache.set(model=Universe, obj_id=1, content={"id": 1}, generation=generation)
+    assert cache.get(model=Universe, obj_id=1) is None
+    # Сброс другой записи не мешает кэшировать эту
+    generation = cache.generation()
+    cache.invalidate(model=Universe, obj_id=2)
+    cache.set(model=Universe, obj_id=1, content={"id": 1}, generation=generation)
+    assert cache.get(model=Universe, obj_id=1) is not None
+
+
+def test_cache_drops_row_read_before_model_invalidation():
+    """
+    Строка, прочитанная до сброса всей таблицы, не попадает в кэш, даже если самих сброшенных записей в нём не было
+    :return:
+    """
+    cache = ResponseCache(max_size=2, ttl=60)
+    generation = cache.generation()
+    cache.invalidate_models(Character)
+    cache.set(model=Character, obj_id=1, content={"id": 1}, generation=generation)
+    cache.set(model=Universe, obj_id=1, content={"id": 1}, generation=generation)
+    assert cache.get(model=Character, obj_id=1) is None
+    assert cache.get(model=Universe, obj_id=1) is not None
+
+
+def test_cache_forgets_old_invalidations_conservatively():
+    """
+    Забытые старые сбросы не пропускают в кэш строки, прочитанные до них
+    :return:
+    """
+    cache = ResponseCache(max_size=2, ttl=60)
+    generation = cache.generation()
+    for obj_id in (1, 2, 3):
+        cache.invalidate(model=Universe, obj_id=obj_id)
+    cache.set(model=Universe, obj_id=1, content={"id": 1}, generation=generation)
+    assert cache.get(model=Universe, obj_id=1) is None
@@ -0,0 +1,98 @@
+"""
+Фильтры и сортировка списков по суффиксам имён фильтров
+"""
+from typing import Any, Dict, List
+
+from fastapi.testclient import TestClient
+from pytest import mark
+from sqlalchemy import Engine, text
+
+from .conftest import V1
+
+
+def ids(client: TestClient, path: str, params: Dict[str, Any]) -> List[int]:
+    """
+    ID записей списка с переданными фильтрами
+    :param client:
+    :param path:
+    :param params:
+    :return:
+    """
+    response = client.get(f"{V1}{path}", params=params)
+    assert response.status_code == 200, response.text
+    return [item["id"] for item in response.json()["items"]]
+
+
+@mark.parametrize(("params", "expected"), (
+    ({"price_min": 20}, [2, 3, 4]),
+    ({"price_max": 20}, [1, 2]),
+    ({"price_min": 20, "price_max": 30}, [2, 3]),
+    ({"age_min": 12, "age_max": 16}, [2, 3]),
+    ({"price_min": 20, "character_id": 1}, [2, 3]),
+    ({"price_max": 30, "sort": "-price"}, [3, 2, 1]),
+    ({"sort": "-age"}, [4, 3, 2, 1]),
+))
+def test_min_and_max_filters(client: TestClient, catalog: Engine, params: Dict[str, Any], expected: List[int]):
+    """
+    Фильтры с суффиксами _min и _max задают границы диапазона включительно
+    :param client:
+    :param catalog:
+    :param params:
+    :param expected:
+    :return:
+    """
+    with catalog.begin() as connection:
+        connection.execute(text("UPDATE toy SET price = id * 10, age = (ARRAY[6, 12, 16, 18])[id]"))
+    assert ids(client=client, path="/toys/", params=params) == expected
+
+
+@mark.parametrize(("params", "expected"), (
+    ({"date_from": "1962-08-02"}, [2, 3]),
+    ({"date_to": "1962-08-02"}, [1, 2]),
+    ({"date_from": "1962-08-02", "date_to": "1962-08-02"}, [2]),
+    ({"date_from": "1962-08-02", "sort": "-date_created"}, [3, 2]),
+))
+def test_from_and_to_filters(client: TestClient, catalog: Engine, params: Dict[str, Any], expected: List[int]):
+    """
+    Фильтры с суффиксами _from и _to задают период включительно по колонке из FILTER_COLUMNS
+    :param client:
+    :param catalog:
+    :param params:
+    :param expected:
+    :return:
+    """
+    assert ids(client=client, path="/comics/", params=params) == expected
+
+
+@mark.parametrize(("path", "params"), (
+    ("/toys/", {"price_min": 30, "price_max": 20}),
+    ("/comics/", {"date_from": "1962-08-03", "date_to": "1962-08-01"}),
+))
+def test_inverted_range(client: TestClient, catalog: Engine, path: str, params: Dict[str, Any]):
+    """
+    Нижняя граница больше верхней - ошибка запроса, а не пустой список
+    :param client:
+    :param catalog:
+    :param path:
+    :param params:
+    :return:
+    """
+    assert client.get(f"{V1}{path}", params=params).status_code == 422
+
+
+def test_sorted_pages_keep_filters(client: TestClient, catalog: Engine):
+    """
+    Курсор страницы отсортированного списка продолжает его с той же записи при тех же фильтрах
+    :param client:
+    :param catalog:
+    :return:
+    """
+    with catalog.begin() as connection:
+        connection.execute(text("UPDATE toy SET price = 40 - id * 10 + 10 * (id % 2)"))
+    params = {"price_min": 10, "sort": "-price", "limit": 2}
+    first = client.get(f"{V1}/toys/", params=params).json()
+    second = client.get(f"{V1}/toys/", params={**params, "after": first["next_cursor"]}).json()
+    assert [(toy["id"], float(toy["price"])) for toy in first["items"] + second["items"]] == [
+        (1, 40.0), (3, 20.0), (2, 20.0)
+    ]
+    assert second["next_cursor"] is None
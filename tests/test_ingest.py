@@ -0,0 +1,67 @@
+"""
+Загрузка файлов в таблицы через COPY
+"""
+from io import StringIO
+
+from fastapi.testclient import TestClient
+from pytest import mark
+from sqlalchemy import Engine, select
+
+from src.database.ingest import INGEST_TABLES, ingest
+from src.types.export import ExportFormat
+from .conftest import V1
+
+# Таблицы связей, колонка связанной с комиксом записи и путь к роутеру связей
+LINK_TABLES = (
+    ("comics_authors", "author", "/comics_authors/"),
+    ("comics_characters", "character", "/comics_character/"),
+)
+
+
+def ingest_csv(table_name: str, content: str, keep_ids: bool = False) -> int:
+    """
+    Загрузка CSV из строки
+    :param table_name:
+    :param content:
+    :param keep_ids:
+    :return:
+    """
+    return ingest(table_name=table_name, file=StringIO(content), input_format=ExportFormat.CSV, keep_ids=keep_ids)
+
+
+@mark.parametrize(("table_name", "related", "path"), LINK_TABLES)
+def test_ingest_links_without_ids(catalog: Engine, table_name: str, related: str, path: str):
+    """
+    Связи без ID в файле получают ID из последовательности таблицы, связанные записи можно указать слагами
+    :param catalog:
+    :param table_name:
+    :param related:
+    :param path:
+    :return:
+    """
+    related_slug = "jack-kirby" if related == "author" else "character-4"
+    count = ingest_csv(table_name=table_name, content=f"comics_slug,{related}_slug\ncomics-3,{related_slug}\n")
+    assert count == 1
+    model = INGEST_TABLES[table_name][0]
+    with catalog.connect() as connection:
+        row = connection.execute(select(model.__table__).order_by(model.id.desc()).limit(1)).one()
+    # В фикстуре у таблиц связей по четыре записи, новая связь получает следующий ID
+    assert tuple(row) == (5, 3, 2 if related == "author" else 4)
+
+
+@mark.parametrize(("table_name", "related", "path"), LINK_TABLES)
+def test_ingest_links_keep_ids(client: TestClient, catalog: Engine, table_name: str, related: str, path: str):
+    """
+    После загрузки связей с сохранением ID связи из API получают ID после загруженных, а не повторяют их
+    :param client:
+    :param catalog:
+    :param table_name:
+    :param related:
+    :param path:
+    :return:
+    """
+    count = ingest_csv(table_name=table_name, content=f"id,comics_id,{related}_id\n10,3,2\n", keep_ids=True)
+    assert count == 1
+    response = client.post(V1 + path, json={"comics_id": 2, f"{related}_id": 2})
+    assert response.status_code in (200, 201), response.text
+    assert response.json()["id"] == 11
@@ -0,0 +1,55 @@
+"""
+Частичное обновление записей и пересчёт слага
+"""
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep
+
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, text
+
+from src.database.statements import assert_statements
+from .conftest import V1
+
+
+def test_patch_recomputes_slug_from_current_record(client: TestClient, catalog: Engine):
+    """
+    Слаг пересчитывается по переданным и текущим значениям полей слага под блокировкой записи,
+    а изменение других полей обходится одним UPDATE
+    :param client:
+    :param catalog:
+    :return:
+    """
+    with assert_statements(expected=2) as counter:
+        response = client.patch(f"{V1}/toys/1/", json={"price": 20})
+    assert response.status_code == 200, response.text
+    assert counter.statements[0].rstrip().endswith("FOR UPDATE")
+    assert (response.json()["title"], response.json()["slug"]) == ("Toy 1", "toy-1-figure-20")
+    with assert_statements(expected=1):
+        response = client.patch(f"{V1}/toys/1/", json={"age": 12})
+    assert (response.json()["age"], response.json()["slug"]) == (12, "toy-1-figure-20")
+    assert client.patch(f"{V1}/toys/99/", json={"price": 20}).status_code == 404
+
+
+def test_patch_waits_for_concurrent_update(client: TestClient, catalog: Engine):
+    """
+    PATCH поля слага ждёт транзакцию, изменившую запись, и строит слаг по её итоговым значениям,
+    а не по значениям, прочитанным до её коммита
+    :param client:
+    :param catalog:
+    :return:
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor, catalog.connect() as connection:
+        connection.execute(text("UPDATE toy SET title = 'Toy Renamed' WHERE id = 1"))
+        patch = executor.submit(client.patch, f"{V1}/toys/1/", json={"price": 20})
+        # Ждём, пока PATCH встанет в ожидание блокировки записи
+        waiting, deadline = 0, monotonic() + 5
+        while not waiting and monotonic() < deadline:
+            sleep(0.05)
+            with catalog.connect() as probe:
+                waiting = probe.scalar(text("SELECT count(*) FROM pg_stat_activity "
+                                            "WHERE wait_event_type = 'Lock' AND query LIKE '%FOR UPDATE'"))
+        assert waiting
+        connection.commit()
+        response = patch.result(timeout=5)
+    assert response.status_code == 200, response.text
+    assert response.json()["slug"] == "toy-renamed-figure-20"
@@ -0,0 +1,33 @@
+"""
+Счётчики пулов соединений
+"""
+from asyncio import run
+
+from pytest import raises
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database.base import Base
+from src.database.pool import InstrumentedQueuePool
+
+
+def test_pool_counters_are_per_pool():
+    """
+    Таймаут и ожидание соединения учитываются только в пуле, которому не хватило соединений
+    :return:
+    """
+    engine = create_async_engine(url=Base.async_engine.url, poolclass=InstrumentedQueuePool, pool_size=1,
+                                 max_overflow=0, pool_timeout=0.1)
+    primary_timeouts = Base.async_engine.pool.timeouts
+
+    async def exhaust() -> None:
+        async with engine.connect():
+            with raises(TimeoutError):
+                async with engine.connect():
+                    pass
+        await engine.dispose()
+
+    pool = engine.pool
+    run(exhaust())
+    assert (pool.timeouts, pool.wait_time.count) == (1, 2)
+    assert Base.async_engine.pool.timeouts == primary_timeouts
@@ -0,0 +1,66 @@
+"""
+Вселенная товаров, которую поддерживают триггеры БД
+"""
+from fastapi.testclient import TestClient
+from pytest import mark, raises
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import OperationalError
+
+from .conftest import V1
+
+# Пути товаров и поля, которые нужны для добавления товара кроме названия, слага и персонажа
+PRODUCTS = (
+    ("/devices/", {"type_of_device": "Gadget", "price": 50}),
+    ("/sweets/", {"price": 5, "weight": 100}),
+    ("/toys/", {"age": 6, "type_of_toy": "Figure", "price": 15}),
+)
+
+
+@mark.parametrize(("path", "form"), PRODUCTS)
+def test_product_of_missing_character(client: TestClient, catalog: Engine, path: str, form: dict):
+    """
+    Товар несуществующего персонажа - нарушение внешнего ключа, а не пустая вселенная
+    :param client:
+    :param catalog:
+    :param path:
+    :param form:
+    :return:
+    """
+    response = client.post(f"{V1}{path}", json={"slug": "product-x", "title": "Product X", "character_id": 999, **form})
+    assert response.status_code == 422, response.text
+    assert response.json()["detail"] == "Связанная запись не найдена"
+
+
+@mark.parametrize("path", [path for path, _ in PRODUCTS])
+def test_product_universe_follows_character(client: TestClient, catalog: Engine, path: str):
+    """
+    При переносе персонажа в другую вселенную его товары переносятся вместе с ним
+    :param client:
+    :param catalog:
+    :param path:
+    :return:
+    """
+    with catalog.begin() as connection:
+        connection.execute(text("UPDATE character SET universe_id = 2 WHERE id = 1"))
+    assert client.get(f"{V1}{path}1/universe/").json()["id"] == 2
+
+
+def test_product_waits_for_character_universe_change(catalog: Engine):
+    """
+    Товар, добавляемый во время переноса его персонажа в другую вселенную, ждёт переноса и получает новую вселенную,
+    а не старую, которую UPDATE товаров из триггера персонажа уже не исправит
+    :param catalog:
+    :return:
+    """
+    insert_toy = text("INSERT INTO toy (slug, title, age, type_of_toy, price, character_id) "
+                      "VALUES ('toy-x', 'Toy X', 6, 'Figure', 15, 1) RETURNING universe_id")
+    with catalog.connect() as moving, catalog.connect() as adding:
+        moving.execute(text("UPDATE character SET universe_id = 2 WHERE id = 1"))
+        # Пока перенос не завершён, добавление товара этого персонажа ждёт блокировку строки персонажа
+        adding.execute(text("SET lock_timeout = '100ms'"))
+        with raises(OperationalError, match="lock timeout"):
+            adding.execute(insert_toy)
+        adding.rollback()
+        moving.commit()
+        assert adding.execute(insert_toy).scalar_one() == 2
+        adding.rollback()
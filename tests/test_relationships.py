@@ -0,0 +1,111 @@
+"""
+Количество запросов к БД у эндпоинтов связей. Оно не должно зависеть от количества связанных записей,
+иначе в эндпоинт вернулась загрузка N+1
+"""
+from re import fullmatch, sub
+from typing import Tuple
+
+from fastapi.testclient import TestClient
+from pytest import mark
+from sqlalchemy import Engine
+
+from app import app
+from src.database.statements import assert_statements
+from .conftest import V1
+
+# Эндпоинты связей, ID родительских записей фикстуры catalog с несколькими и с одной связанной записью
+# и количество запросов к БД на один вызов
+RELATIONSHIP_ENDPOINTS = (
+    ("/universes/{universe_id}/characters/", (1, 2), 1),
+    ("/universes/{universe_id}/devices/", (1, 2), 1),
+    ("/universes/{universe_id}/sweets/", (1, 2), 1),
+    ("/universes/{universe_id}/toys/", (1, 2), 1),
+    ("/authors/{author_id}/characters/", (1, 2), 1),
+    ("/authors/{author_id}/comics/", (1, 2), 1),
+    ("/characters/{character_id}/universe/", (1, 4), 1),
+    ("/characters/{character_id}/author/", (1, 4), 1),
+    ("/characters/{character_id}/devices/", (1, 4), 1),
+    ("/characters/{character_id}/sweets/", (1, 4), 1),
+    ("/characters/{character_id}/toys/", (1, 4), 1),
+    ("/characters/{character_id}/full/", (1, 4), 1),
+    ("/comics/{comics_id}/authors/", (1, 2), 1),
+    ("/comics/{comics_id}/characters/", (1, 2), 1),
+    ("/comics/{comics_id}/full/", (1, 2), 1),
+    ("/devices/{device_id}/universe/", (1, 4), 1),
+    ("/devices/{device_id}/character/", (1, 4), 1),
+    ("/sweets/{sweet_id}/universe/", (1, 4), 1),
+    ("/sweets/{sweet_id}/character/", (1, 4), 1),
+    ("/toys/{toy_id}/universe/", (1, 4), 1),
+    ("/toys/{toy_id}/character/", (1, 4), 1),
+)
+
+
+def test_every_relationship_endpoint_is_checked():
+    """
+    Новый эндпоинт связи попадает в проверку количества запросов
+    :return:
+    """
+    routes = {
+        route.path.removeprefix(V1) for route in app.routes
+        if "GET" in getattr(route, "methods", ()) and fullmatch(rf"{V1}/\w+/{{\w+_id}}/\w+/", route.path)
+    }
+    assert routes == {path for path, _, _ in RELATIONSHIP_ENDPOINTS}
+
+
+@mark.parametrize(("path", "parent_ids", "expected"), RELATIONSHIP_ENDPOINTS)
+def test_relationship_statements(client: TestClient, catalog: Engine, path: str, parent_ids: Tuple[int, int],
+                                 expected: int):
+    """
+    Эндпоинт связи выполняет одно и то же количество запросов при нескольких и при одной связанной записи
+    :param client:
+    :param catalog:
+    :param path:
+    :param parent_ids:
+    :param expected:
+    :return:
+    """
+    for parent_id in parent_ids:
+        with assert_statements(expected=expected):
+            response = client.get(V1 + sub(r"{\w+}", str(parent_id), path))
+        assert response.status_code == 200, response.text
+
+
+def test_relationship_rows_match_detail(client: TestClient, catalog: Engine):
+    """
+    Строки, которые эндпоинты связей отдают без валидации, совпадают с ответами детальных эндпоинтов
+    :param client:
+    :param catalog:
+    :return:
+    """
+    characters = client.get(f"{V1}/authors/1/characters/").json()
+    assert [character["id"] for character in characters] == [1, 2, 3]
+    assert characters[0] == client.get(f"{V1}/characters/1/").json()
+    assert client.get(f"{V1}/devices/1/universe/").json() == client.get(f"{V1}/universes/1/").json()
+    assert client.get(f"{V1}/comics/1/authors/").json()[1] == client.get(f"{V1}/authors/2/").json()
+
+
+def test_relationship_of_missing_parent(client: TestClient, catalog: Engine):
+    """
+    Пустой список связей отличается от несуществующей родительской записи
+    :param client:
+    :param catalog:
+    :return:
+    """
+    assert client.get(f"{V1}/comics/3/characters/").json() == []
+    assert client.get(f"{V1}/comics/99/characters/").status_code == 404
+    assert client.get(f"{V1}/characters/99/toys/").status_code == 404
+    assert client.get(f"{V1}/toys/99/character/").status_code == 404
+
+
+def test_characters_of_universe_are_paginated(client: TestClient, catalog: Engine):
+    """
+    Персонажи вселенной отдаются страницами с курсором и выбранными полями, как товары вселенной
+    :param client:
+    :param catalog:
+    :return:
+    """
+    first = client.get(f"{V1}/universes/1/characters/", params={"limit": 2, "fields": "slug"}).json()
+    assert first["items"] == [{"slug": "character-1"}, {"slug": "character-2"}]
+    second = client.get(f"{V1}/universes/1/characters/", params={"limit": 2, "after": first["next_cursor"]}).json()
+    assert [character["id"] for character in second["items"]] == [3]
+    assert second["next_cursor"] is None
@@ -0,0 +1,58 @@
+"""
+Чтения с реплик: кэш ответов и состояние пулов
+"""
+from typing import Iterator
+
+from fastapi.testclient import TestClient
+from pytest import MonkeyPatch, fixture
+from sqlalchemy import Engine
+
+from src.database import replicas
+from src.database.replicas import Replica
+from src.database.statements import count_statements
+from src.settings import SETTINGS
+from .conftest import V1
+
+
+@fixture
+def replica(client: TestClient, monkeypatch: MonkeyPatch) -> Iterator[Replica]:
+    """
+    Доступная реплика, которая указывает на ту же тестовую БД: по счётчику запросов её движка видно,
+    какие чтения ушли на реплику
+    :param client:
+    :param monkeypatch:
+    :return:
+    """
+    replica = Replica(url=SETTINGS.DATABASE_URL.unicode_string())
+    replica.lag = 0
+    monkeypatch.setattr(replicas, "REPLICAS", [replica])
+    yield replica
+    # Соединения реплики открыты в цикле событий клиента, там же их и закрываем
+    client.portal.call(replica.engine.dispose)
+
+
+def test_cached_reads_skip_replica(client: TestClient, catalog: Engine, replica: Replica):
+    """
+    Запись, ответ с которой попадает в кэш, читается с основной БД, а списки - с реплики
+    :param client:
+    :param catalog:
+    :param replica:
+    :return:
+    """
+    with count_statements(bind=replica.engine) as counter:
+        assert client.get(f"{V1}/toys/1/").status_code == 200
+    assert counter.count == 0
+    with count_statements(bind=replica.engine) as counter:
+        assert client.get(f"{V1}/toys/").status_code == 200
+    assert counter.count > 0
+
+
+def test_replica_pool_stats(client: TestClient, replica: Replica):
+    """
+    Состояние пула реплики отдаётся вместе с пулом основной БД
+    :param client:
+    :param replica:
+    :return:
+    """
+    assert set(client.get("/api/service/pool/").json()) == {"primary", replica.name}
+    assert f'db_pool_size{{pool="{replica.name}"}}' in client.get("/metrics").text
@@ -0,0 +1,66 @@
+"""
+Ранжирование и листание поиска по каталогу
+"""
+from fastapi.testclient import TestClient
+from pytest import fixture
+from sqlalchemy import Engine, text
+
+from src.settings import SETTINGS
+from .conftest import V1
+
+# Количество игрушек, название которых начинается с запроса, больше количества кандидатов из одной таблицы
+PREFIX_MATCHES = SETTINGS.SEARCH_CANDIDATES + 100
+
+
+@fixture
+def toys(catalog: Engine) -> Engine:
+    """
+    Каталог с PREFIX_MATCHES игрушками "Robot N" и последней добавленной игрушкой, название которой точно равно
+    "Robot"
+    :param catalog:
+    :return:
+    """
+    with catalog.begin() as connection:
+        connection.execute(text("""
+            INSERT INTO toy (slug, title, age, type_of_toy, price, character_id)
+            SELECT 'robot-' || n, 'Robot ' || n, 6, 'Figure', 15, 1 FROM generate_series(1, :last) AS n
+        """), {"last": PREFIX_MATCHES})
+        connection.execute(text("""
+            INSERT INTO toy (slug, title, age, type_of_toy, price, character_id)
+            VALUES ('robot', 'Robot', 6, 'Figure', 15, 1)
+        """))
+    return catalog
+
+
+def test_exact_title_outranks_prefix_matches(client: TestClient, toys: Engine):
+    """
+    Точное совпадение названия первое в выдаче, даже если оно не попало бы в первые SEARCH_CANDIDATES
+    записей сканирования
+    :param client:
+    :param toys:
+    :return:
+    """
+    response = client.get(f"{V1}/search/", params={"q": "Robot", "limit": 5})
+    assert response.status_code == 200, response.text
+    hits = response.json()["items"]
+    assert (hits[0]["kind"], hits[0]["title"]) == ("toy", "Robot")
+    assert hits[0]["rank"] > hits[1]["rank"]
+
+
+def test_pages_stop_at_search_candidates(client: TestClient, toys: Engine):
+    """
+    Страницы выдачи не пересекаются и заканчиваются на SEARCH_CANDIDATES записях без курсора дальше
+    :param client:
+    :param toys:
+    :return:
+    """
+    seen, params = [], {"q": "Robot", "limit": 300}
+    while True:
+        response = client.get(f"{V1}/search/", params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        seen += [(hit["kind"], hit["id"]) for hit in page["items"]]
+        if page["next_cursor"] is None:
+            break
+        params["after"] = page["next_cursor"]
+    assert len(seen) == len(set(seen)) == SETTINGS.SEARCH_CANDIDATES